@@ -0,0 +1,88 @@
+"""
+Finds where encoding in worker processes (``Stage.encode_parallel()``) starts to beat encoding in process,
+for growing numbers of tables & each worker count, e.g. ``python benchmarks/bench_parallel.py --workers 2 4 8``.
+
+Each timing is a first write of a freshly laid out diagram, so every table has to be encoded.
+``PARALLEL_MIN`` is lowered for the run, so small diagrams use the workers too. On a machine with
+fewer cores than workers the workers only add overhead, & no crossover is found.
+"""
+
+# Standard Library
+import argparse
+import io
+import multiprocessing
+import os
+import time
+# Third Party
+# Local
+from common import report
+from gliffy import stage
+from gliffy.gliffy import Gliffy
+
+SIZES = (32, 64, 128, 256, 512, 1024, 2048)
+
+
+def diagram(n, workers):
+    # type: (int, int) -> Gliffy
+    g = Gliffy().set_workers(workers)
+    g.add([g.table('table_{}'.format(i), ['id'] + ['column_{}'.format(j) for j in range(i % 15)])
+           for i in range(n)])
+    g.stage.layout()
+
+    return g
+
+
+def time_write(n, workers, repeat):
+    # type: (int, int, int) -> float
+    """
+    :return: Seconds for the fastest first write of an n table diagram
+    :rtype: float
+    """
+    times = []
+    for _ in range(repeat):
+        g = diagram(n, workers)
+        start = time.perf_counter()
+        g.stage.write(io.StringIO())
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    # type: () -> None
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({2, 4, max(2, cores)}))
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print('Worker processes are forked, which this platform can\'t do.')
+        return
+
+    print('{} cores'.format(cores))
+    default = stage.PARALLEL_MIN
+    stage.PARALLEL_MIN = 0
+    crossover = {}
+    for n in args.sizes:
+        serial = time_write(n, 1, args.repeat)
+        report('{} tables, in process'.format(n), serial)
+        for workers in args.workers:
+            seconds = time_write(n, workers, args.repeat)
+            report('{} tables, {} workers'.format(n, workers), seconds, serial)
+            # the crossover is where the workers win from then on
+            if seconds < serial:
+                crossover.setdefault(workers, n)
+            else:
+                crossover.pop(workers, None)
+
+    for workers in args.workers:
+        if workers in crossover:
+            print('{} workers: faster from {} tables'.format(workers, crossover[workers]))
+        else:
+            print('{} workers: no crossover up to {} tables'.format(workers, max(args.sizes)))
+    print('(PARALLEL_MIN is {})'.format(default))
+
+
+if __name__ == '__main__':
+    main()
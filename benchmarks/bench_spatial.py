@@ -0,0 +1,76 @@
+"""
+Benchmarks for ``SpatialIndex``: building it, querying it & ``overlaps()``, against scanning every box,
+for table-sized boxes packed in shelves (like the 'shelf' layout) as the number of boxes grows.
+"""
+
+# Standard Library
+import random
+# Third Party
+# Local
+from common import best, report
+from gliffy.spatial import SpatialIndex, intersects
+
+SIZES = (1000, 10000, 50000)
+QUERIES = 1000
+
+
+def make_boxes(n, seed=0):
+    # type: (int, int) -> list
+    """
+    :return: n table-sized (left, top, right, bottom) boxes packed in shelves, with a few overlaps
+    :rtype: list
+    """
+    rng = random.Random(seed)
+    width = int((n ** 0.5) * 240)
+    boxes = []
+    x = y = shelf = 0
+    for _ in range(n):
+        w = rng.randrange(120, 240)
+        h = rng.randrange(60, 400)
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + 20, 0
+        # every 50th box is nudged onto its neighbour
+        left = x - 30 if rng.randrange(50) == 0 else x
+        boxes.append((left, y, left + w, y + h))
+        x += w + 20
+        shelf = max(shelf, h)
+
+    return boxes
+
+
+def build(boxes):
+    # type: (list) -> SpatialIndex
+    index = SpatialIndex()
+    for i, box in enumerate(boxes):
+        index.insert(i, box)
+
+    return index
+
+
+def scan(boxes, box):
+    # type: (list, tuple) -> set
+    return {i for i, b in enumerate(boxes) if intersects(b, box)}
+
+
+def main():
+    # type: () -> None
+    for n in SIZES:
+        boxes = make_boxes(n)
+        rng = random.Random(n)
+        # each query is a box's own area, as when checking a table for collisions
+        queries = [boxes[rng.randrange(n)] for _ in range(QUERIES)]
+        index = build(boxes)
+        assert all(index.query(q) == scan(boxes, q) for q in queries[:20])
+
+        report('build, {} boxes'.format(n), best(lambda: build(boxes), repeat=3))
+        query = best(lambda: [index.query(q) for q in queries], repeat=3) / QUERIES
+        report('query, {} boxes'.format(n), query)
+        linear = best(lambda: [scan(boxes, q) for q in queries[:20]], repeat=3) / 20
+        report('scan, {} boxes'.format(n), linear)
+        report('query vs scan, {} boxes'.format(n), query, linear)
+        report('overlaps, {} boxes'.format(n), best(index.overlaps, repeat=3))
+        report('check every box, {} boxes'.format(n), best(lambda: [index.query(b) for b in boxes], repeat=3))
+
+
+if __name__ == '__main__':
+    main()
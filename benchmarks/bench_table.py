@@ -0,0 +1,83 @@
+"""
+Benchmarks ``Gliffy.table()`` against making every cell with ``rectangle()``/``text()``, as
+``GliffyDB.make_cell()`` did, for 1,000 tables of 100 columns (100k column cells).
+"""
+
+# Standard Library
+import gc
+import time
+# Third Party
+# Local
+from common import report
+from gliffy.gliffy import Gliffy
+from utils import util
+
+TABLES = 1000
+COLUMNS = ['column_{}'.format(i) for i in range(100)]
+STYLES = Gliffy.table_styles
+
+
+def per_cell(g, name):
+    # type: (Gliffy, str) -> Entity
+    """
+    A table made the way GliffyDB made them before ``Gliffy.table()``.
+    """
+    cont = g.rectangle(STYLES['table'])
+    cell = g.rectangle(STYLES['name_cell']).add_child(g.text({'text': name, 'css': STYLES['name_text']}))
+    cont.add_child(cell)
+    text = {'text': '', 'css': STYLES['column_text']}
+    for col in COLUMNS:
+        text['text'] = col
+        cont.add_child(g.rectangle(STYLES['column_cell']).add_child(g.text(text)))
+
+    return cont
+
+
+def build(make):
+    # type: (Callable) -> list
+    g = Gliffy()
+
+    return [make(g, 'table_{}'.format(i)) for i in range(TABLES)]
+
+
+def by_table(g, name):
+    # type: (Gliffy, str) -> Entity
+    return g.table(name, COLUMNS)
+
+
+def timed(make, paused, repeat=3):
+    # type: (Callable, bool, int) -> float
+    """
+    :return: Seconds for the fastest build; ``timeit`` isn't used since it turns the cyclic GC off,
+             which is part of what's measured
+    :rtype: float
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        if paused:
+            with util.gc_paused():
+                tables = build(make)
+        else:
+            tables = build(make)
+        times.append(time.perf_counter() - start)
+        del tables
+
+    return min(times)
+
+
+def main():
+    # type: () -> None
+    assert [t.to_json() for t in build(per_cell)[:3]] == [t.to_json() for t in build(by_table)[:3]]
+
+    old = timed(per_cell, False)
+    report('rectangle()/text() per cell', old)
+    report('table()', timed(by_table, False), old)
+    # as GliffyDB.draw_tables() builds them
+    report('rectangle()/text() per cell, gc paused', timed(per_cell, True), old)
+    report('table(), gc paused', timed(by_table, True), old)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks for ``util.join_dicts()`` & the converters made by ``validate.type_converter()``,
+against the recursive ``join_dicts()`` & the per-key ``validate.in_dict_as_type()`` checks they replaced.
+"""
+
+# Standard Library
+from copy import deepcopy
+# Third Party
+# Local
+from common import best, report
+from utils import util, validate
+
+STYLE = {'strokeWidth': 2, 'strokeColor': '#000000', 'fillColor': '#FFFFFF', 'gradient': False,
+         'opacity': 1, 'Line': {'strokeWidth': 2, 'ortho': True, 'cornerRadius': 10,
+                                'lockSegments': {'a': 1, 'b': 2}}}
+UPDATES = ({'strokeWidth': 4, 'Line': {'ortho': False, 'lockSegments': {'b': 3}}},
+           {'fillColor': '#FF0000', 'Line': {'cornerRadius': 5}, 'unknown': 1})
+
+CHECKS = {'strokeWidth': int, 'strokeColor': 'hex', 'fillColor': 'hex'}
+PROPS = {'strokeWidth': '3', 'strokeColor': 'FF0000', 'fillColor': '#00FF00'}
+
+
+def recursive_join_dicts(*dicts):
+    # type: (*dict) -> None
+    """
+    ``join_dicts()`` before it was made iterative: for each key, the dicts are searched right -> left
+    & sub-dicts are recursed into.
+    """
+    dicts = list(dicts)
+    res = dicts.pop(0)
+    dicts.reverse()
+
+    def find_key(key):
+        for d in dicts:
+            if key in d:
+                return d[key]
+        raise ValueError('no value')
+
+    for key in res:
+        try:
+            if isinstance(res[key], dict):
+                subs = [d[key] for d in dicts if key in d]
+                subs.reverse()
+                recursive_join_dicts(res[key], *subs)
+            else:
+                res[key] = find_key(key)
+        except ValueError:
+            continue
+
+
+def check_per_key(props):
+    # type: (dict) -> None
+    for k, t in CHECKS.items():
+        validate.in_dict_as_type(props, k, str if t == 'hex' else t, True)
+        if t == 'hex' and k in props and not props[k].startswith('#'):
+            props[k] = '#' + props[k][0:6]
+
+
+CONVERTERS = tuple((k, validate.type_converter(t)) for k, t in CHECKS.items())
+
+
+def check_converters(props):
+    # type: (dict) -> None
+    for k, convert in CONVERTERS:
+        if k in props:
+            props[k] = convert(props[k])
+
+
+def main():
+    # type: () -> None
+    number = 20000
+    copy = best(lambda: deepcopy(STYLE), number)
+    old = best(lambda: recursive_join_dicts(deepcopy(STYLE), *UPDATES), number) - copy
+    new = best(lambda: util.join_dicts(deepcopy(STYLE), *UPDATES), number) - copy
+    report('join_dicts, recursive', old)
+    report('join_dicts', new, old)
+
+    old = best(lambda: check_per_key(dict(PROPS)), number)
+    new = best(lambda: check_converters(dict(PROPS)), number)
+    report('in_dict_as_type per key', old)
+    report('type_converter', new, old)
+
+    for t, value in ((int, '3'), (bool, 'true'), ('hex', 'FF0000')):
+        convert = validate.type_converter(t)
+        report('type_converter({!r})'.format(getattr(t, '__name__', t)), best(lambda: convert(value), number * 5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Shared helpers for the benchmark scripts, which are run directly, e.g. ``python benchmarks/bench_validate.py``.
+"""
+
+# Standard Library
+import os
+import sys
+import timeit
+# Third Party
+# Local
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def best(fn, number=1, repeat=5):
+    # type: (Callable, int, int) -> float
+    """
+    :param Callable fn: Takes no arguments
+    :param int number: Calls per timing
+    :param int repeat: Number of timings
+    :return: Seconds per call, from the fastest timing
+    :rtype: float
+    """
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def report(name, seconds, baseline=None):
+    # type: (str, float, float) -> None
+    """
+    Prints a timing, & the speedup over a baseline timing if one is given.
+    """
+    if seconds < 1e-3:
+        line = '{:<48} {:>10.2f} us'.format(name, seconds * 1e6)
+    else:
+        line = '{:<48} {:>10.2f} ms'.format(name, seconds * 1e3)
+    if baseline:
+        line += '  ({:.1f}x)'.format(baseline / seconds)
+    print(line)
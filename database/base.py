@@ -0,0 +1,158 @@
+"""
+The 'root' of all database adapters.
+"""
+
+# Standard Library
+from collections import OrderedDict
+# Third Party
+# Local
+from .schema import ForeignKey, Index
+
+
+class Adapter(object):
+    """
+    Reads a database's catalog into a :py:class:`database.schema.Schema`.
+
+    Adapters work on any DB-API 2.0 connection & read the catalog in a handful of bulk queries
+    (one per kind of object) instead of a round-trip per table, which is what makes
+    introspecting schemas with thousands of tables fast.
+    """
+
+    __slots__ = ('connection', 'page_size')
+
+    def __init__(self, connection, page_size=5000):
+        # type: (Any, int) -> Adapter
+        """
+        :param Any connection: An open DB-API 2.0 connection; the adapter doesn't close it
+        :param int page_size: Number of rows fetched from the cursor at once
+        :rtype: Adapter
+        """
+        self.connection = connection
+        self.page_size = page_size
+
+    def introspect(self, schema=None):
+        # type: (str) -> Schema
+        """
+        :param str schema: The schema to read; the connection's default schema if not given
+        :rtype: Schema
+        """
+        # MUST be overridden in child classes
+        raise NotImplementedError()
+
+    def iter_tables(self, schema=None):
+        # type: (str) -> Iterator[Table]
+        """
+        Yields the schema's tables one at a time, for drawing schemas too big to hold in memory
+        (see ``GliffyDB.stream_tables()``).
+
+        The tables are read as they are asked for, so a slow consumer holds back the reads instead of
+        tables piling up. This version reads the whole schema first; adapters that can assemble each
+        table from queries ordered by table name override it, so only one table is held at once.
+
+        :param str schema: The schema to read; see ``introspect()``
+        :rtype: Iterator[Table]
+        """
+        return iter(self.introspect(schema))
+
+    def fingerprint(self, schema=None):
+        # type: (str) -> Any
+        """
+        Cheaply identifies the database & the current state of its catalog, so a saved snapshot of
+        the schema can be reused instead of introspecting it again (see :py:mod:`database.snapshot`).
+
+        :param str schema: The schema to fingerprint; see ``introspect()``
+        :return: A (database, fingerprint) tuple of hashable values, where the fingerprint changes whenever
+                 the schema does; None if the database can't be fingerprinted
+        :rtype: Any
+        """
+        return None
+
+    def rows(self, sql, params=()):
+        # type: (str, Any) -> Iterator[tuple]
+        """
+        Runs a query & yields its rows, ``page_size`` rows at a time, so a large catalog is never
+        held in memory twice.
+
+        :param str sql: The query, using the driver's paramstyle
+        :param Any params: The query parameters
+        :rtype: Iterator[tuple]
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                page = cursor.fetchmany(self.page_size)
+                if not page:
+                    break
+                for row in page:
+                    yield row
+        finally:
+            cursor.close()
+
+    def scalar(self, sql, params=()):
+        # type: (str, Any) -> Any
+        """
+        :return: The first value of the query's first row; None if there are no rows
+        :rtype: Any
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        return row[0] if row else None
+
+    @staticmethod
+    def add_foreign_keys(schema, rows, named=True):
+        # type: (Schema, Iterable[tuple], bool) -> None
+        """
+        Adds foreign keys to the schema's tables from catalog rows with 1 row per key column.
+
+        :param Schema schema: The schema being built
+        :param Iterable[tuple] rows: (table, key name, column, referenced schema, referenced table,
+                                     referenced column) rows, grouped by key & in key column order
+        :param bool named: False if the database doesn't name keys; the 'names' then only tell the
+                           keys apart (e.g. SQLite's key ids) & the keys are added without a name
+        """
+        keys = OrderedDict()
+        for t_name, name, col, ref_schema, ref_table, ref_col in rows:
+            key = keys.get((t_name, name))
+            if key is None:
+                key = keys[(t_name, name)] = (ref_schema, ref_table, [], [])
+            key[2].append(col)
+            key[3].append(ref_col)
+
+        for (t_name, name), (ref_schema, ref_table, cols, ref_cols) in keys.items():
+            table = schema.tables.get(t_name)
+            if table is not None:
+                ref_schema = ref_schema if ref_schema != schema.name else None
+                table.foreign_keys.append(ForeignKey(name if named else None, cols, ref_table, ref_cols,
+                                                     ref_schema))
+
+    @staticmethod
+    def add_indexes(schema, rows):
+        # type: (Schema, Iterable[tuple]) -> None
+        """
+        Adds indexes to the schema's tables from catalog rows with 1 row per index column.
+        The columns of primary key indexes are flagged as primary key columns.
+
+        :param Schema schema: The schema being built
+        :param Iterable[tuple] rows: (table, index name, unique, primary, column) rows, grouped by index &
+                                     in index column order
+        """
+        indexes = OrderedDict()
+        for t_name, name, unique, primary, col in rows:
+            indexes.setdefault((t_name, name, bool(unique), bool(primary)), []).append(col)
+
+        for (t_name, name, unique, primary), cols in indexes.items():
+            table = schema.tables.get(t_name)
+            if table is None:
+                continue
+            table.indexes.append(Index(name, cols, unique, primary))
+            if primary:
+                by_name = {c.name: c for c in table.columns}
+                for pos, col in enumerate(cols, 1):
+                    if col in by_name:
+                        by_name[col].pk = pos
@@ -0,0 +1,127 @@
+"""
+Concurrent introspection of many databases.
+
+DB-API drivers block, so each database is introspected on a worker thread while asyncio keeps
+track of the jobs. At most ``limit`` databases are read at once, each one gets its own timeout,
+& results are handed back as soon as each database is done rather than after all of them.
+
+Example::
+
+    async for job, schema, error in introspect_many(jobs, limit=8, timeout=300):
+        ...
+"""
+
+# Standard Library
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+# Third Party
+# Local
+
+
+class Job(object):
+    """
+    A schema to introspect.
+    """
+
+    __slots__ = ('name', 'connect', 'schema')
+
+    def __init__(self, name, connect, schema=None):
+        # type: (str, Callable, str) -> Job
+        """
+        :param str name: Identifies the job, e.g. in output file names
+        :param Callable connect: Takes no arguments & returns an :py:class:`database.base.Adapter` with an open
+                                 connection. It's called on the worker thread, since some drivers (e.g. sqlite3)
+                                 don't allow connections to be shared between threads. The connection is closed
+                                 once the schema has been read.
+        :param str schema: The schema to read; the connection's default schema if not given
+        :rtype: Job
+        """
+        self.name = name
+        self.connect = connect
+        self.schema = schema
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Job {}>'.format(self.name)
+
+    def run(self, cache=None):
+        # type: (SnapshotCache) -> Schema
+        """
+        Connects & reads the schema; this blocks.
+
+        :param SnapshotCache cache: Where schema snapshots are kept; the schema is always introspected if not given
+        :rtype: Schema
+        """
+        adapter = self.connect()
+        try:
+            if cache is None:
+                return adapter.introspect(self.schema)
+            return cache.introspect(adapter, self.schema)
+        finally:
+            adapter.connection.close()
+
+
+async def introspect_many(jobs, limit=8, timeout=None, cache=None, executor=None):
+    # type: (Iterable[Job], int, float, SnapshotCache, Executor) -> AsyncIterator[tuple]
+    """
+    Introspects the jobs' databases concurrently, yielding each result as soon as it's ready.
+
+    A job that fails or times out doesn't stop the others; its error is yielded instead.
+
+    .. note:: Threads can't be interrupted, so a timed out job is abandoned rather than stopped & keeps its
+              worker thread until the driver returns. It keeps its place in the ``limit`` until then too, so
+              no more than ``limit`` databases are ever read at once, & a job's timeout only starts once a
+              worker thread picks it up, so it isn't used up waiting behind abandoned jobs.
+
+    :param Iterable[Job] jobs: The databases to read
+    :param int limit: Max number of databases read at once
+    :param float timeout: Max number of seconds for each database; no limit if not given
+    :param SnapshotCache cache: Where schema snapshots are kept; the schemas are always introspected if not given
+    :param Executor executor: Runs the blocking introspection; a thread pool of ``limit`` threads if not given
+    :return: (job, schema, error) tuples in the order the jobs finish; either schema or error is None
+    :rtype: AsyncIterator[tuple]
+    """
+    loop = asyncio.get_running_loop()
+    pool = executor or ThreadPoolExecutor(max_workers=limit, thread_name_prefix='introspect')
+    slots = asyncio.Semaphore(limit)
+
+    async def run(job):
+        await slots.acquire()
+        started = loop.create_future()
+
+        def work():
+            loop.call_soon_threadsafe(_set_result, started, None)
+            return job.run(cache)
+
+        future = loop.run_in_executor(pool, work)
+        # the slot is only freed when the thread is, even if the job timed out
+        future.add_done_callback(lambda f: slots.release())
+        try:
+            await asyncio.wait({started, future}, return_when=asyncio.FIRST_COMPLETED)
+            # shielded, so a timeout doesn't mark the job done while its thread is still running
+            schema = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.CancelledError:
+            # jobs that haven't started yet never will
+            future.cancel()
+            raise
+        except Exception as e:
+            return job, None, e
+
+        return job, schema, None
+
+    tasks = [loop.create_task(run(job)) for job in jobs]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if executor is None:
+            # don't wait for abandoned (timed out) jobs
+            pool.shutdown(wait=False)
+
+
+def _set_result(future, result):
+    # type: (asyncio.Future, Any) -> None
+    if not future.done():
+        future.set_result(result)
@@ -0,0 +1,121 @@
+"""
+Compares two versions of a schema, so only the tables that changed have to be redrawn.
+"""
+
+# Standard Library
+# Third Party
+# Local
+from .schema import astuple
+
+
+class TableDiff(object):
+    """
+    What changed in a table that is in both versions of a schema.
+    """
+
+    __slots__ = ('name', 'added_columns', 'removed_columns', 'changed_columns', 'added_foreign_keys',
+                 'removed_foreign_keys', 'added_indexes', 'removed_indexes')
+
+    def __init__(self, name):
+        # type: (str) -> TableDiff
+        self.name = name
+        # column names
+        self.added_columns = []
+        self.removed_columns = []
+        self.changed_columns = []
+        # ForeignKey/Index objects
+        self.added_foreign_keys = []
+        self.removed_foreign_keys = []
+        self.added_indexes = []
+        self.removed_indexes = []
+
+    def __repr__(self):
+        # type: () -> str
+        parts = ('{} {}'.format(len(getattr(self, s)), s.replace('_', ' ')) for s in self.__slots__[1:]
+                 if getattr(self, s))
+        return '<TableDiff {} ({})>'.format(self.name, ', '.join(parts) or 'reordered')
+
+
+class SchemaDiff(object):
+    """
+    The tables added to, removed from & changed in a schema.
+    """
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self):
+        # type: () -> SchemaDiff
+        # table names
+        self.added = []
+        self.removed = []
+        # TableDiff objects
+        self.changed = []
+
+    def __repr__(self):
+        # type: () -> str
+        return '<SchemaDiff +{} -{} ~{}>'.format(len(self.added), len(self.removed), len(self.changed))
+
+    def __bool__(self):
+        # type: () -> bool
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def affected(self):
+        # type: () -> set
+        """
+        :return: Names of the tables that have to be (re)drawn: the added & changed ones
+        :rtype: set
+        """
+        return set(self.added).union(t.name for t in self.changed)
+
+
+def diff(old, new):
+    # type: (Schema, Schema) -> SchemaDiff
+    """
+    :param Schema old: The previous version of the schema
+    :param Schema new: The current version of the schema
+    :return: What changed between them
+    :rtype: SchemaDiff
+    """
+    result = SchemaDiff()
+    for name, table in new.tables.items():
+        before = old.tables.get(name)
+        if before is None:
+            result.added.append(name)
+        elif before != table:
+            result.changed.append(diff_table(before, table))
+    result.removed = [name for name in old.tables if name not in new.tables]
+
+    return result
+
+
+def diff_table(old, new):
+    # type: (Table, Table) -> TableDiff
+    """
+    :param Table old: The previous version of the table
+    :param Table new: The current version of the table
+    :return: What changed between them; all lists are empty if only the column order or table kind changed
+    :rtype: TableDiff
+    """
+    result = TableDiff(new.name)
+    before = {c.name: c for c in old.columns}
+    after = {c.name: c for c in new.columns}
+    result.added_columns = [c.name for c in new.columns if c.name not in before]
+    result.removed_columns = [c.name for c in old.columns if c.name not in after]
+    result.changed_columns = [c.name for c in new.columns if c.name in before and before[c.name] != c]
+    result.added_foreign_keys, result.removed_foreign_keys = _changes(old.foreign_keys, new.foreign_keys)
+    result.added_indexes, result.removed_indexes = _changes(old.indexes, new.indexes)
+
+    return result
+
+
+def _changes(old, new):
+    # type: (list, list) -> tuple
+    """
+    :return: The (added, removed) items of 2 lists of model objects
+    :rtype: tuple
+    """
+    before = {astuple(o) for o in old}
+    after = {astuple(o) for o in new}
+
+    return [o for o in new if astuple(o) not in before], [o for o in old if astuple(o) not in after]
@@ -1,7 +1,132 @@
 """
+Microsoft SQL Server adapter.
 
+The schema is read from the ``sys.*`` catalog views in one set-based query per kind of object
+(columns, indexes, foreign keys & stored procedure/function definitions), instead of querying
+each table, & the rows are streamed into the schema model a page at a time.
+
+Works with any DB-API 2.0 driver using the 'qmark' paramstyle (e.g. pyodbc).
 """
 
 # Standard Library
 # Third Party
 # Local
+from .base import Adapter
+from .schema import Schema, Column, Routine
+
+COLUMNS_SQL = '''
+SELECT o.name, o.type, c.name, t.name, c.max_length, c.precision, c.scale, c.is_nullable, dc.definition
+FROM sys.objects AS o
+JOIN sys.columns AS c ON c.object_id = o.object_id
+JOIN sys.types AS t ON t.user_type_id = c.user_type_id
+LEFT JOIN sys.default_constraints AS dc ON dc.object_id = c.default_object_id
+WHERE o.schema_id = SCHEMA_ID(?) AND o.type IN ('U', 'V') AND o.is_ms_shipped = 0
+ORDER BY o.name, c.column_id
+'''
+
+INDEXES_SQL = '''
+SELECT t.name, i.name, i.is_unique, i.is_primary_key, c.name
+FROM sys.tables AS t
+JOIN sys.indexes AS i ON i.object_id = t.object_id
+JOIN sys.index_columns AS ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+JOIN sys.columns AS c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE t.schema_id = SCHEMA_ID(?) AND t.is_ms_shipped = 0 AND ic.is_included_column = 0
+ORDER BY t.name, i.name, ic.key_ordinal
+'''
+
+FOREIGN_KEYS_SQL = '''
+SELECT t.name, fk.name, pc.name, SCHEMA_NAME(r.schema_id), r.name, rc.name
+FROM sys.tables AS t
+JOIN sys.foreign_keys AS fk ON fk.parent_object_id = t.object_id
+JOIN sys.foreign_key_columns AS fkc ON fkc.constraint_object_id = fk.object_id
+JOIN sys.columns AS pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+JOIN sys.tables AS r ON r.object_id = fkc.referenced_object_id
+JOIN sys.columns AS rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+WHERE t.schema_id = SCHEMA_ID(?) AND t.is_ms_shipped = 0
+ORDER BY t.name, fk.name, fkc.constraint_column_id
+'''
+
+MODULES_SQL = '''
+SELECT o.name, o.type, m.definition
+FROM sys.objects AS o
+JOIN sys.sql_modules AS m ON m.object_id = o.object_id
+WHERE o.schema_id = SCHEMA_ID(?) AND o.type IN ('P', 'FN', 'IF', 'TF') AND o.is_ms_shipped = 0
+ORDER BY o.name
+'''
+
+FINGERPRINT_SQL = '''
+SELECT COALESCE(@@SERVERNAME, '') + '/' + DB_NAME() + '/' + ?, COUNT(*), MAX(modify_date)
+FROM sys.objects
+WHERE schema_id = SCHEMA_ID(?) AND is_ms_shipped = 0
+'''
+
+# types whose max_length is shown, & the ones that store 2 bytes per character
+_SIZED = {'char', 'varchar', 'binary', 'varbinary', 'nchar', 'nvarchar'}
+_WIDE = {'nchar', 'nvarchar'}
+_SCALED = {'decimal', 'numeric'}
+
+
+class MSSQLAdapter(Adapter):
+
+    __slots__ = ()
+
+    def introspect(self, schema=None):
+        # type: (str) -> Schema
+        """
+        :param str schema: The schema to read; the login's default schema (usually 'dbo') if not given
+        :rtype: Schema
+        """
+        if schema is None:
+            schema = self.scalar('SELECT SCHEMA_NAME()')
+        params = (schema,)
+        result = Schema(schema)
+
+        for row in self.rows(COLUMNS_SQL, params):
+            t_name, o_type, c_name, c_type, max_len, precision, scale, nullable, default = row
+            table = result.table(t_name, 'view' if o_type.strip() == 'V' else 'table')
+            data_type = _type_name(c_type, max_len, precision, scale)
+            table.columns.append(Column(c_name, data_type, bool(nullable), default))
+
+        self.add_indexes(result, self.rows(INDEXES_SQL, params))
+        self.add_foreign_keys(result, self.rows(FOREIGN_KEYS_SQL, params))
+
+        for name, o_type, definition in self.rows(MODULES_SQL, params):
+            kind = 'procedure' if o_type.strip() == 'P' else 'function'
+            result.routines[name] = Routine(name, kind, definition)
+
+        return result
+
+    def fingerprint(self, schema=None):
+        # type: (str) -> Any
+        """
+        Uses the number of objects in the schema & their latest ``modify_date``; creating, altering or
+        dropping a table, key or procedure changes one or the other.
+
+        :rtype: Any
+        """
+        if schema is None:
+            schema = self.scalar('SELECT SCHEMA_NAME()')
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(FINGERPRINT_SQL, (schema, schema))
+            source, count, modified = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        return source, (count, str(modified))
+
+
+def _type_name(name, max_len, precision, scale):
+    # type: (str, int, int, int) -> str
+    """
+    :return: The column type as it would be declared, e.g. 'nvarchar(50)' or 'decimal(10, 2)'
+    :rtype: str
+    """
+    if name in _SIZED:
+        if max_len == -1:
+            return '{}(max)'.format(name)
+        return '{}({})'.format(name, max_len // 2 if name in _WIDE else max_len)
+    if name in _SCALED:
+        return '{}({}, {})'.format(name, precision, scale)
+
+    return name
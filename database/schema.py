@@ -0,0 +1,244 @@
+"""
+Database-neutral schema model.
+
+Every adapter turns its database's catalog into these objects, so GliffyDB never has to know
+which kind of database a schema came from.
+"""
+
+# Standard Library
+from collections import OrderedDict
+# Third Party
+# Local
+
+
+class Column(object):
+
+    __slots__ = ('name', 'data_type', 'nullable', 'default', 'pk')
+
+    def __init__(self, name, data_type='', nullable=True, default=None, pk=0):
+        # type: (str, str, bool, Any, int) -> Column
+        """
+        :param str name: Column name
+        :param str data_type: Type as the database reports it, e.g. 'VARCHAR(20)'
+        :param bool nullable: Whether the column allows NULLs
+        :param Any default: The default value expression; None if there isn't one
+        :param int pk: Position of the column in the primary key, starting at 1; 0 if it isn't part of it
+        :rtype: Column
+        """
+        self.name = name
+        self.data_type = data_type
+        self.nullable = nullable
+        self.default = default
+        self.pk = pk
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Column {} {}>'.format(self.name, self.data_type)
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, Column) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+
+class ForeignKey(object):
+
+    __slots__ = ('name', 'columns', 'ref_table', 'ref_columns', 'ref_schema')
+
+    def __init__(self, name, columns, ref_table, ref_columns, ref_schema=None):
+        # type: (str, tuple, str, tuple, str) -> ForeignKey
+        """
+        :param str name: Constraint name; may be None (e.g. SQLite doesn't name them)
+        :param tuple columns: The referencing columns, in key order
+        :param str ref_table: The referenced table
+        :param tuple ref_columns: The referenced columns, in the same order as ``columns``
+        :param str ref_schema: The referenced table's schema; None if it's the same schema
+        :rtype: ForeignKey
+        """
+        self.name = name
+        self.columns = tuple(columns)
+        self.ref_table = ref_table
+        self.ref_columns = tuple(ref_columns)
+        self.ref_schema = ref_schema
+
+    def __repr__(self):
+        # type: () -> str
+        return '<ForeignKey ({}) -> {}({})>'.format(', '.join(self.columns), self.ref_table,
+                                                     ', '.join(self.ref_columns))
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, ForeignKey) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+
+class Index(object):
+
+    __slots__ = ('name', 'columns', 'unique', 'primary')
+
+    def __init__(self, name, columns, unique=False, primary=False):
+        # type: (str, tuple, bool, bool) -> Index
+        """
+        :param str name: Index name
+        :param tuple columns: The indexed columns, in index order
+        :param bool unique: Whether the index is unique
+        :param bool primary: Whether the index backs the primary key
+        :rtype: Index
+        """
+        self.name = name
+        self.columns = tuple(columns)
+        self.unique = unique
+        self.primary = primary
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Index {} ({})>'.format(self.name, ', '.join(self.columns))
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, Index) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+
+class Routine(object):
+
+    __slots__ = ('name', 'kind', 'definition')
+
+    def __init__(self, name, kind='procedure', definition=None):
+        # type: (str, str, str) -> Routine
+        """
+        :param str name: Routine name
+        :param str kind: 'procedure' or 'function'
+        :param str definition: The routine's source; None if the database doesn't expose it
+        :rtype: Routine
+        """
+        self.name = name
+        self.kind = kind
+        self.definition = definition
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Routine {} ({})>'.format(self.name, self.kind)
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, Routine) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+
+class Table(object):
+
+    __slots__ = ('name', 'kind', 'columns', 'foreign_keys', 'indexes')
+
+    def __init__(self, name, kind='table'):
+        # type: (str, str) -> Table
+        """
+        :param str name: Table name
+        :param str kind: 'table' or 'view'
+        :rtype: Table
+        """
+        self.name = name
+        self.kind = kind
+        self.columns = []
+        self.foreign_keys = []
+        self.indexes = []
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Table {} ({} columns)>'.format(self.name, len(self.columns))
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, Table) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+    @property
+    def primary_key(self):
+        # type: () -> tuple
+        """
+        :return: The primary key column names, in key order
+        :rtype: tuple
+        """
+        return tuple(c.name for c in sorted((c for c in self.columns if c.pk), key=lambda c: c.pk))
+
+    def column(self, name):
+        # type: (str) -> Any
+        """
+        :return: The named Column; None if the table doesn't have it
+        :rtype: Any
+        """
+        for c in self.columns:
+            if c.name == name:
+                return c
+
+        return None
+
+
+class Schema(object):
+    """
+    The tables (& stored procedures/functions) of one database schema, by name.
+    """
+
+    __slots__ = ('name', 'tables', 'routines')
+
+    def __init__(self, name=None):
+        # type: (str) -> Schema
+        """
+        :param str name: Schema (or database) name
+        :rtype: Schema
+        """
+        self.name = name
+        self.tables = OrderedDict()
+        self.routines = OrderedDict()
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Schema {} ({} tables)>'.format(self.name, len(self.tables))
+
+    def __eq__(self, other):
+        # type: (Any) -> bool
+        return isinstance(other, Schema) and astuple(self) == astuple(other)
+
+    __hash__ = None
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.tables)
+
+    def __iter__(self):
+        # type: () -> Iterator[Table]
+        return iter(self.tables.values())
+
+    def __contains__(self, name):
+        # type: (str) -> bool
+        return name in self.tables
+
+    def __getitem__(self, name):
+        # type: (str) -> Table
+        return self.tables[name]
+
+    def table(self, name, kind='table'):
+        # type: (str, str) -> Table
+        """
+        :return: The named Table, which is added to the Schema if it isn't there yet
+        :rtype: Table
+        """
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = Table(name, kind)
+
+        return table
+
+
+def astuple(obj):
+    # type: (Any) -> tuple
+    """
+    :return: The values of a model object, in ``__slots__`` order; used for comparing objects
+    :rtype: tuple
+    """
+    return tuple(getattr(obj, s) for s in obj.__slots__)
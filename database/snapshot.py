@@ -0,0 +1,208 @@
+"""
+On-disk schema snapshots.
+
+Introspecting a big database is by far the slowest step of making a diagram, so the schema model
+can be saved to a compact (pickled & zlib compressed) snapshot & reused for as long as the
+database's catalog fingerprint (see ``Adapter.fingerprint()``) stays the same.
+
+.. warning:: Loading a snapshot unpickles it, which can run arbitrary code, so only load snapshot files &
+             use cache directories that nobody but trusted users can write to (a directory ``SnapshotCache``
+             makes is private to its user).
+"""
+
+# Standard Library
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import zlib
+# Third Party
+# Local
+from .schema import Schema
+
+# bumped whenever the schema model changes, so old snapshots aren't loaded into new code
+VERSION = 1
+
+EXTENSION = '.snapshot'
+
+
+def save(path, schema):
+    # type: (str, Schema) -> None
+    """
+    Writes a schema snapshot; the file is replaced atomically, so readers never see a partial snapshot.
+
+    :param str path: Path of the snapshot file
+    :param Schema schema: The schema to save
+    """
+    data = zlib.compress(pickle.dumps((VERSION, schema), pickle.HIGHEST_PROTOCOL))
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(path):
+    # type: (str) -> Schema
+    """
+    :param str path: Path of the snapshot file; it has to be trusted, see the module docs
+    :return: The saved schema
+    :rtype: Schema
+    :raises: :py:class:`ValueError` if the file isn't a snapshot from this version
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        version, schema = pickle.loads(zlib.decompress(data))
+    except Exception as e:
+        raise ValueError('`{}` is not a schema snapshot: {}'.format(path, e))
+    if version != VERSION or not isinstance(schema, Schema):
+        raise ValueError('`{}` is a snapshot from a different version.'.format(path))
+
+    return schema
+
+
+class SnapshotCache(object):
+    """
+    Directory of schema snapshots, keyed by database & catalog fingerprint.
+
+    Each database only keeps the snapshot of its latest fingerprint. Snapshots that haven't been
+    used for ``max_age`` seconds are evicted, as are the least recently used ones once the
+    directory is over ``max_bytes``.
+    """
+
+    __slots__ = ('directory', 'max_bytes', 'max_age', 'hits', 'misses')
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, max_age=30 * 24 * 60 * 60):
+        # type: (str, int, int) -> SnapshotCache
+        """
+        :param str directory: Where the snapshots are kept (Default ~/.gliffydb/snapshots); it has to be
+                              trusted, see the module docs
+        :param int max_bytes: Max total size of the snapshots
+        :param int max_age: Max number of seconds a snapshot is kept without being used
+        :rtype: SnapshotCache
+        """
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.gliffydb', 'snapshots')
+        # private to this user, if it's made here
+        os.makedirs(directory, 0o700, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def introspect(self, adapter, schema=None):
+        # type: (Adapter, str) -> Schema
+        """
+        Reads a schema through a database adapter, unless a snapshot of it with the database's current
+        catalog fingerprint has already been saved.
+
+        :param Adapter adapter: Adapter for the database to read
+        :param str schema: The schema to read; the connection's default schema if not given
+        :rtype: Schema
+        """
+        found = adapter.fingerprint(schema)
+        if found is None:
+            return adapter.introspect(schema)
+
+        source, fingerprint = found
+        key = (type(adapter).__name__, source, schema)
+        result = self.get(key, fingerprint)
+        if result is None:
+            result = adapter.introspect(schema)
+            self.put(key, fingerprint, result)
+
+        return result
+
+    def get(self, key, fingerprint):
+        # type: (Any, Any) -> Any
+        """
+        :param Any key: Identifies the database & schema, e.g. (adapter name, server, schema)
+        :param Any fingerprint: The database's current catalog fingerprint
+        :return: The snapshot saved with the same key & fingerprint; None if there isn't one
+        :rtype: Any
+        """
+        path = self._path(key, fingerprint)
+        try:
+            schema = load(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # recently used snapshots are evicted last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+
+        return schema
+
+    def put(self, key, fingerprint, schema):
+        # type: (Any, Any, Schema) -> SnapshotCache
+        """
+        Saves a snapshot, replacing the database's snapshots of older fingerprints.
+
+        :rtype: SnapshotCache
+        """
+        path = self._path(key, fingerprint)
+        save(path, schema)
+        for old in glob.glob(os.path.join(self.directory, _digest(key) + '-*' + EXTENSION)):
+            if old != path:
+                _remove(old)
+
+        return self.evict()
+
+    def evict(self):
+        # type: () -> SnapshotCache
+        """
+        Removes the snapshots that are too old, then the least recently used ones until the
+        snapshots fit in ``max_bytes``.
+
+        :rtype: SnapshotCache
+        """
+        now = time.time()
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*' + EXTENSION)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                _remove(path)
+            else:
+                files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(f[1] for f in files)
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+        return self
+
+    def _path(self, key, fingerprint):
+        # type: (Any, Any) -> str
+        return os.path.join(self.directory, _digest(key) + '-' + _digest(fingerprint)[:16] + EXTENSION)
+
+
+def _digest(value):
+    # type: (Any) -> str
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+def _remove(path):
+    # type: (str) -> None
+    # another process may have removed it already
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -1,7 +1,164 @@
 """
+SQLite adapter.
 
+The whole catalog is read in 3 queries by joining ``sqlite_master`` against the table-valued
+``pragma_table_info``/``pragma_foreign_key_list``/``pragma_index_list`` functions, instead of
+running a PRAGMA per table. The queries are ordered by table name, so tables can be streamed
+one at a time (see ``iter_tables()``). Requires SQLite 3.16+.
 """
 
 # Standard Library
+import sqlite3
+from urllib.request import pathname2url
+from itertools import groupby
+from operator import itemgetter
 # Third Party
 # Local
+from .base import Adapter
+from .schema import Schema, Table, Column
+
+COLUMNS_SQL = '''
+SELECT m.name, m.type, p.name, p.type, p."notnull", p.dflt_value, p.pk
+FROM {schema}.sqlite_master AS m
+JOIN pragma_table_info(m.name, '{name}') AS p
+WHERE m.type IN ('table', 'view') AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+ORDER BY m.name, p.cid
+'''
+
+FOREIGN_KEYS_SQL = '''
+SELECT m.name, f.id, f."from", NULL, f."table", f."to"
+FROM {schema}.sqlite_master AS m
+JOIN pragma_foreign_key_list(m.name, '{name}') AS f
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+ORDER BY m.name, f.id, f.seq
+'''
+
+INDEXES_SQL = '''
+SELECT m.name, il.name, il."unique", il.origin = 'pk', ii.name
+FROM {schema}.sqlite_master AS m
+JOIN pragma_index_list(m.name, '{name}') AS il
+JOIN pragma_index_info(il.name, '{name}') AS ii
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+ORDER BY m.name, il.name, ii.seqno
+'''
+
+PRIMARY_KEY_SQL = '''
+SELECT name, pk FROM pragma_table_info(?, ?)
+'''
+
+
+class SQLiteAdapter(Adapter):
+
+    __slots__ = ()
+
+    @classmethod
+    def connect(cls, path):
+        # type: (str) -> SQLiteAdapter
+        """
+        :param str path: Path of the SQLite database file
+        :return: An adapter for a new, read-only connection to the file
+        :rtype: SQLiteAdapter
+        """
+        # read-only, so a mistyped path is an error instead of a new empty database
+        return cls(sqlite3.connect('file:{}?mode=ro'.format(pathname2url(path)), uri=True))
+
+    def fingerprint(self, schema=None):
+        # type: (str) -> Any
+        """
+        Uses the database file's path & ``schema_version``, which SQLite bumps on every schema change.
+        In-memory databases can't be fingerprinted.
+
+        :rtype: Any
+        """
+        name = schema or 'main'
+        path = self.scalar('SELECT file FROM pragma_database_list WHERE name = ?', (name,))
+        if not path:
+            return None
+
+        return path, self.scalar('PRAGMA {}.schema_version'.format(_quote(name)))
+
+    def introspect(self, schema=None):
+        # type: (str) -> Schema
+        """
+        :param str schema: The attached database to read (Default 'main')
+        :rtype: Schema
+        """
+        result = Schema(schema or 'main')
+        for table in self.iter_tables(schema):
+            result.tables[table.name] = table
+
+        return result
+
+    def iter_tables(self, schema=None):
+        # type: (str) -> Iterator[Table]
+        """
+        Yields the tables one at a time, in name order.
+
+        The 3 catalog queries are all ordered by table name, so they're read side by side (a merge
+        join) & each table is yielded as soon as the column query moves past it. Only one table &
+        a page of rows from each query are held in memory.
+
+        :param str schema: The attached database to read (Default 'main')
+        :rtype: Iterator[Table]
+        """
+        name = schema or 'main'
+        fmt = {'schema': _quote(name), 'name': name.replace("'", "''")}
+        keys = _by_table(self.rows(FOREIGN_KEYS_SQL.format(**fmt)))
+        indexes = _by_table(self.rows(INDEXES_SQL.format(**fmt)))
+        next_keys = next(keys, None)
+        next_indexes = next(indexes, None)
+        # the shared helpers add keys & indexes to a Schema, so each table is read into this one
+        current = Schema(name)
+
+        for t_name, rows in _by_table(self.rows(COLUMNS_SQL.format(**fmt))):
+            table = Table(t_name, rows[0][1])
+            for _, _, c_name, c_type, not_null, default, pk in rows:
+                table.columns.append(Column(c_name, c_type, not not_null, default, pk))
+            current.tables.clear()
+            current.tables[t_name] = table
+            # keys & indexes only exist for some of the tables, but always in the same order
+            if next_keys is not None and next_keys[0] == t_name:
+                # SQLite doesn't name foreign keys, but numbers them
+                self.add_foreign_keys(current, next_keys[1], named=False)
+                self._resolve_references(table, name)
+                next_keys = next(keys, None)
+            if next_indexes is not None and next_indexes[0] == t_name:
+                self.add_indexes(current, next_indexes[1])
+                next_indexes = next(indexes, None)
+
+            yield table
+
+    def _resolve_references(self, table, schema):
+        # type: (Table, str) -> None
+        """
+        `REFERENCES parent` without columns means the parent's primary key; the parent may not have been
+        read yet, so it's looked up.
+
+        :param Table table: The table the keys belong to
+        :param str schema: The attached database being read
+        """
+        for key in table.foreign_keys:
+            if all(key.ref_columns):
+                continue
+            if key.ref_table == table.name:
+                key.ref_columns = table.primary_key
+            else:
+                info = list(self.rows(PRIMARY_KEY_SQL, (key.ref_table, schema)))
+                if info:
+                    key.ref_columns = tuple(c for c, pk in sorted(info, key=lambda r: r[1]) if pk)
+
+
+def _by_table(rows):
+    # type: (Iterable[tuple]) -> Iterator[tuple]
+    """
+    :param Iterable[tuple] rows: Catalog rows ordered by table name, which is their first value
+    :return: A (table name, rows) tuple for each table
+    :rtype: Iterator[tuple]
+    """
+    for t_name, group in groupby(rows, key=itemgetter(0)):
+        yield t_name, list(group)
+
+
+def _quote(name):
+    # type: (str) -> str
+    return '"' + name.replace('"', '""') + '"'
@@ -3,24 +3,26 @@
 """
 
 # Standard Library
-import json
 from collections import OrderedDict
+from copy import deepcopy
 # Third Party
 # Local
 from .base import GliffyObject
 from . import graphics
+from utils import util
 
 
 class Entity(GliffyObject):
     """
     The basic building block for all Gliffy entity objects.
 
-    You will mostly be setting .graphic or adding to .children.
+    You will mostly be setting .graphic or adding children with ``add_child()``; appending to .children
+    directly leaves the children out of the JSON & doesn't flag the Entity as changed.
     """
 
     # limit the instance variables created; no __dict__ or __weakref__ to save RAM
     # you have to set the variables in __init__ if you define this
-    __slots__ = ('settings', 'graphic', 'children', 'type_def')
+    __slots__ = ('settings', 'graphic', 'children', 'type_def', 'parent', '_fragment')
 
     def __init__(self, entity_settings={}, graphic_type='', graphic_props={}):
         # type: (dict, str, dict) -> Entity
@@ -49,24 +51,44 @@ class Entity(GliffyObject):
         }
         self.graphic = None
         self.children = []
-        self.type_def = OrderedDict([
-            ('x', None),
-            ('y', None),
-            ('rotation', 0),
-            ('id', 0),
-            ('uid', 'com.gliffy.shape.erd.erd_v1.default.entity'),
-            ('width', None),
-            ('height', None),
-            ('lockAspectRatio', False),
-            ('lockShape', False),
-            ('order', 0),
-            ('graphic', None),
-            ('children', []),
-            ('linkMap', []),
-        ])
+        # the Entity this one is a child of, if any
+        self.parent = None
+        # cached JSON for the Entity; None when it (or any descendant) has changed since the last to_json()
+        self._fragment = None
+        # a plain (insertion ordered) dict, since clone() copies it for every cell of a table & copying an
+        # OrderedDict costs about 10x as much
+        self.type_def = {
+            'x': None,
+            'y': None,
+            'rotation': 0,
+            'id': 0,
+            'uid': 'com.gliffy.shape.erd.erd_v1.default.entity',
+            'width': None,
+            'height': None,
+            'lockAspectRatio': False,
+            'lockShape': False,
+            'order': 0,
+            'graphic': None,
+            'children': [],
+            'linkMap': [],
+        }
 
         self._define_graphic(graphic_type, graphic_props)
 
+    def __getstate__(self):
+        # type: () -> tuple
+        # the parent is left out (the parent's __setstate__ puts it back), so a subtree can be pickled on its own
+        return self.settings, self.graphic, self.children, self.type_def, self._fragment
+
+    def __setstate__(self, state):
+        # type: (tuple) -> None
+        self.settings, self.graphic, self.children, self.type_def, self._fragment = state
+        self.parent = None
+        for c in self.children:
+            c.parent = self
+        if self.graphic is not None:
+            self.graphic.owner = self
+
     def __getattr__(self, attr):
         if attr == 'set_properties' and self.graphic:
             return self.graphic.set_properties
@@ -103,7 +125,9 @@ class Entity(GliffyObject):
         if not new_graphic or not isinstance(new_graphic, graphics.Graphic):
             raise ValueError('Cannot assign non-Graphic object as Entity\'s graphic')
         self.graphic = new_graphic
+        self.graphic.owner = self
         self.type_def['uid'] = self.graphic.entity_uid
+        self.touch()
 
         return self
 
@@ -141,6 +165,7 @@ class Entity(GliffyObject):
         # these are inherent entity values
         for s in ['x', 'y', 'width', 'height']:
             self.type_def[s] = settings.get(s, 0)
+        self.touch()
 
         return self
 
@@ -170,7 +195,7 @@ class Entity(GliffyObject):
             return
         for c in ['x', 'y']:
             if c in coords:
-                self.type_def[c] = int(coords[c])
+                self._set_value(c, int(coords[c]))
 
         return self
 
@@ -198,7 +223,7 @@ class Entity(GliffyObject):
             return
         for s in ['width', 'height']:
             if s in size:
-                self.type_def[s] = int(size[s])
+                self._set_value(s, int(size[s]))
 
         return self
 
@@ -220,7 +245,7 @@ class Entity(GliffyObject):
         :param int order: The z-index order of the Entity
         :rtype: Entity
         """
-        self.type_def['order'] = order
+        self._set_value('order', order)
 
         return self
 
@@ -242,10 +267,45 @@ class Entity(GliffyObject):
         :param int id: The id (nodeIndex) order of the Entity
         :rtype: Entity
         """
-        self.type_def['id'] = id
+        self._set_value('id', id)
 
         return self
 
+    @property
+    def dirty(self):
+        # type: () -> bool
+        """
+        :return: True if the Entity (or any descendant) has changed since its JSON was last generated
+        :rtype: bool
+        """
+        return self._fragment is None
+
+    def touch(self):
+        # type: () -> Entity
+        """
+        Flags the Entity & its ancestors as changed, so their cached JSON is regenerated.
+
+        An Entity is never clean while one of its descendants is dirty, so the walk up
+        stops at the first ancestor that is already dirty.
+
+        :rtype: Entity
+        """
+        ent = self
+        while ent is not None and ent._fragment is not None:
+            ent._fragment = None
+            ent = ent.parent
+
+        return self
+
+    def _set_value(self, key, value):
+        # type: (str, Any) -> None
+        """
+        Sets a ``type_def`` value, only flagging the Entity as changed if the value is actually different.
+        """
+        if self.type_def[key] != value:
+            self.type_def[key] = value
+            self.touch()
+
     def is_type(self, ent_type):
         # type: (str) -> bool
         """
@@ -260,26 +320,174 @@ class Entity(GliffyObject):
         else:
             return False
 
-    def get_type_def(self):
-        # type: () -> dict
-        # reset so we don't add copies
-        self.type_def['children'] = []
-        if self.graphic:
-            self.type_def['graphic'] = self.graphic.get_type_def()
-        for c in self.children:
-            self.type_def['children'].append(c.get_type_def())
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
+        """
+        .. note:: The children type defs are kept in sync as they are added, but Graphics build their
+                  type defs on demand (from their shared style), so those are filled in here for the
+                  Entity & all of its descendants. ``to_json()`` doesn't need this.
+
+        :param Any text_style: The Stage's global ``TextStyle`` when styles are shared; None when inlined
+        :rtype: dict
+        """
+        stack = [self]
+        while stack:
+            ent = stack.pop()
+            if ent.graphic:
+                ent.type_def['graphic'] = ent.graphic.get_type_def(text_style)
+            stack.extend(ent.children)
 
         return self.type_def
 
+    def clone(self):
+        # type: () -> Entity
+        """
+        Copies the Entity & all of its descendants, e.g. to stamp out many cells from a prototype.
+
+        The copies share their Graphics' styles, so nothing is validated again; ids, coordinates
+        & sizes are copied as they are & are assigned when the copy is added to the Stage.
+
+        :return: A new Entity with no parent
+        :rtype: Entity
+        """
+        root = None
+        stack = [(self, None)]
+        while stack:
+            ent, parent = stack.pop()
+            graphic = ent.graphic
+            new = ent.shallow_clone(parent, None if graphic is None else graphic.clone())
+            if parent is None:
+                root = new
+            if ent.children:
+                # reversed, so the children are copied (& appended) in order
+                stack.extend([(c, new) for c in reversed(ent.children)])
+
+        return root
+
+    def shallow_clone(self, parent=None, graphic=None):
+        # type: (Entity, Any) -> Entity
+        """
+        Copies just the Entity, not its children; see ``clone()``.
+
+        :param Entity parent: What the copy is added to, if anything; it has to be dirty already, so it isn't touched
+        :param Any graphic: The copy's Graphic, e.g. a clone of the Entity's; None for no Graphic
+        :return: The copy
+        :rtype: Entity
+        """
+        cls = self.__class__
+        new = cls.__new__(cls)
+        new.settings = self.settings.copy()
+        new.children = []
+        new.parent = parent
+        new._fragment = None
+        new.type_def = td = self.type_def.copy()
+        td['children'] = []
+        link_map = td.get('linkMap')
+        if link_map:
+            td['linkMap'] = deepcopy(link_map)
+        elif link_map is not None:
+            td['linkMap'] = []
+        if 'constraints' in td:
+            td['constraints'] = deepcopy(td['constraints'])
+        new.graphic = graphic
+        if graphic is not None:
+            graphic.owner = new
+            td['graphic'] = None
+        if parent is not None:
+            parent.children.append(new)
+            parent.type_def['children'].append(td)
+
+        return new
+
     def add_child(self, child):
         # type: (Entity) -> Entity
+        child.parent = self
         self.children.append(child)
+        self.type_def['children'].append(child.type_def)
+        self.touch()
 
         return self
 
-    def to_json(self):
-        # type: () -> str
-        return json.dumps(self.get_type_def())
+    def connect(self, source, target, points, sides=(1, 0)):
+        # type: (Entity, Entity, list, tuple) -> Entity
+        """
+        Attaches a Line Entity's ends to two Entities & sets the route between them.
+
+        :param Entity source: The Entity the Line starts at
+        :param Entity target: The Entity the Line ends at
+        :param list points: Absolute [x, y] points of the route
+        :param tuple sides: Which side of the source/target the Line is attached to; 0 = left, 1 = right
+        :rtype: Entity
+        :raises: :py:class:`ValueError`
+        """
+        if not self.is_type('line'):
+            raise ValueError('Only Line Entities can be connected.')
+
+        constraints = OrderedDict([
+            ('constraints', []),
+            ('startConstraint', OrderedDict([
+                ('type', 'StartPositionConstraint'),
+                ('StartPositionConstraint', OrderedDict([('nodeId', str(source.id)), ('py', 0.5), ('px', float(sides[0]))]))
+            ])),
+            ('endConstraint', OrderedDict([
+                ('type', 'EndPositionConstraint'),
+                ('EndPositionConstraint', OrderedDict([('nodeId', str(target.id)), ('py', 0.5), ('px', float(sides[1]))]))
+            ])),
+        ])
+        if self.type_def.get('constraints') != constraints:
+            self.type_def['constraints'] = constraints
+            # gliffy expects the constraints before the graphic
+            for k in ('graphic', 'children', 'linkMap'):
+                self.type_def[k] = self.type_def.pop(k)
+            self.touch()
+
+        x, y = points[0]
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self.coords = {'x': x, 'y': y}
+        self.size = {'width': max(xs) - min(xs), 'height': max(ys) - min(ys)}
+        self.graphic.set_path([[px - x, py - y] for px, py in points])
+
+        return self
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        """
+        Only Entities that have changed since the last call are re-encoded; everything else
+        is spliced in from the cached JSON.
+
+        .. note:: The cached JSON doesn't depend on ``text_style``; the Stage clears it when that changes.
+
+        :param Any text_style: The Stage's global ``TextStyle`` when styles are shared; None when inlined
+        :rtype: str
+        """
+        # '' is a clean Entity whose JSON isn't cached (see set_json())
+        if not self._fragment:
+            children = ', '.join(c.to_json(text_style) for c in self.children)
+            graphic = self.graphic.to_json(text_style) if self.graphic else 'null'
+            self._fragment = util.json_splice(self.type_def, {'graphic': graphic, 'children': '[' + children + ']'})
+
+        return self._fragment
+
+    def set_json(self, fragment):
+        # type: (str) -> Entity
+        """
+        Uses JSON encoded elsewhere (e.g. by a worker process) as the Entity's cached JSON.
+
+        The descendants are flagged as clean without caching their own JSON, so they're only
+        re-encoded if one of them changes & the Entity has to be re-encoded.
+
+        :param str fragment: The Entity's JSON, as ``to_json()`` would make it
+        :rtype: Entity
+        """
+        stack = list(self.children)
+        while stack:
+            ent = stack.pop()
+            ent._fragment = ''
+            stack.extend(ent.children)
+        self._fragment = fragment
+
+        return self
 
 
 class Group(Entity):
@@ -287,7 +495,7 @@ class Group(Entity):
     Group objects allow multiple objects to be combined into a single 'linked object' for easy manipulation.
     """
 
-    __slots__ = ('settings', 'children', 'graphic', 'type_def')
+    __slots__ = ('settings', 'children', 'graphic', 'type_def', 'parent', '_fragment')
 
     def __init__(self):
         """
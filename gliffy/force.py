@@ -0,0 +1,187 @@
+"""
+Force-directed layout that pulls linked (e.g. foreign key related) top-level Entities together.
+
+Every top-level Entity repels every other one, linked Entities attract each other
+(Fruchterman-Reingold), and a weak pull towards the middle keeps unlinked Entities from
+drifting off. All of the maths is done on NumPy coordinate arrays; the Entities are only
+touched to read their sizes at the start & to write the final x/y coords at the end.
+
+The shelf-packed layout is used as the starting point. Once the simulation has cooled down the
+Entities are shelf-packed again, in the order of their simulated positions, which removes any
+overlaps while keeping neighbours together.
+
+.. note:: Requires NumPy (``pip install numpy``).
+"""
+
+# Standard Library
+# Third Party
+try:
+    import numpy as np
+except ImportError:
+    np = None
+# Local
+from . import layout
+
+# number of rows of the pairwise (n x n) calculations done at once; bounds the memory used
+BLOCK_ROWS = 256
+
+
+def update_coordinates(stage, iterations=100, gravity=3.0):
+    # type: (Stage, int, float) -> None
+    """
+    Positions the Stage's top-level 'auto' Entities so that linked Entities sit close together,
+    & sets the Stage's width/height to fit everything.
+
+    'Fixed' Entities aren't moved, but still push & pull on the others.
+
+    :param Stage stage: The Stage to lay out; links are taken from ``Stage.links``
+    :param int iterations: Number of simulation steps
+    :param float gravity: Strength of the pull towards the middle of the layout
+    :raises: :py:class:`ImportError`
+    """
+    if np is None:
+        raise ImportError('The force-directed layout requires NumPy (pip install numpy).')
+
+    # the packed layout is a good, overlap-free place to start
+    layout.update_coordinates(stage)
+    ents = stage.children
+    if len(ents) < 2:
+        return
+
+    tds = [e.type_def for e in ents]
+    size = np.array([[td['width'] or 0, td['height'] or 0] for td in tds], dtype=float)
+    pos = np.array([[td['x'] or 0, td['y'] or 0] for td in tds], dtype=float) + size / 2
+    movable = np.array([e.settings['position'] == 'auto' for e in ents])
+    pad = np.array([stage.pad_x, stage.pad_y], dtype=float)
+    edges = _edges(ents, stage.links)
+
+    # ideal distance between Entity centers; about the size of an average (padded) Entity
+    k = float(np.sqrt(np.mean((size[:, 0] + pad[0]) * (size[:, 1] + pad[1])))) or 1.0
+    _simulate(pos, movable, edges, k, iterations, gravity)
+
+    # write the results back in one pass
+    for ent, xy in zip(ents, _legalize(stage, ents, pos, movable)):
+        td = ent.type_def
+        if xy is not None and (td['x'] != xy['x'] or td['y'] != xy['y']):
+            td['x'] = xy['x']
+            td['y'] = xy['y']
+            ent.touch()
+
+    layout.update_stage_size(stage)
+
+
+def _edges(ents, links):
+    # type: (list[Entity], list) -> np.ndarray
+    """
+    :return: (m, 2) array of the indexes of linked top-level Entities
+    :rtype: np.ndarray
+    """
+    index = {id(e): i for i, e in enumerate(ents)}
+    pairs = set()
+    for source, target in links:
+        s = index.get(id(_top(source)))
+        t = index.get(id(_top(target)))
+        if s is not None and t is not None and s != t:
+            pairs.add((min(s, t), max(s, t)))
+
+    return np.array(sorted(pairs), dtype=int).reshape(-1, 2)
+
+
+def _top(ent):
+    # type: (Entity) -> Entity
+    """
+    :return: The top-level ancestor of the Entity
+    :rtype: Entity
+    """
+    while ent.parent is not None:
+        ent = ent.parent
+
+    return ent
+
+
+def _simulate(pos, movable, edges, k, iterations, gravity):
+    # type: (np.ndarray, np.ndarray, np.ndarray, float, int, float) -> None
+    """
+    Runs the Fruchterman-Reingold simulation, updating ``pos`` in place.
+    """
+    n = len(pos)
+    # max distance an Entity can move in a step; cools linearly to 0
+    temp = k * np.sqrt(n)
+    cooling = temp / max(iterations, 1)
+    for _ in range(iterations):
+        disp = _repulsion(pos, k)
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            dist = np.sqrt((delta ** 2).sum(axis=1))[:, None]
+            pull = delta * dist / k
+            np.add.at(disp, edges[:, 0], -pull)
+            np.add.at(disp, edges[:, 1], pull)
+        disp -= gravity * (pos - pos.mean(axis=0))
+
+        length = np.sqrt((disp ** 2).sum(axis=1))[:, None]
+        disp *= np.minimum(length, temp) / np.maximum(length, 1e-9)
+        disp[~movable] = 0
+        pos += disp
+        temp -= cooling
+
+
+def _repulsion(pos, k):
+    # type: (np.ndarray, float) -> np.ndarray
+    """
+    :return: The sum of the k^2 / distance repulsion on each Entity from every other one
+    :rtype: np.ndarray
+    """
+    k2 = k * k
+    x = pos[:, 0]
+    y = pos[:, 1]
+    disp = np.empty_like(pos)
+    for i in range(0, len(pos), BLOCK_ROWS):
+        dx = x[i:i + BLOCK_ROWS, None] - x[None, :]
+        dy = y[i:i + BLOCK_ROWS, None] - y[None, :]
+        # an Entity's distance to itself is 0, so it adds nothing
+        f = dx * dx
+        f += dy * dy
+        np.maximum(f, 1e-2, out=f)
+        np.divide(k2, f, out=f)
+        disp[i:i + BLOCK_ROWS, 0] = np.einsum('ij,ij->i', dx, f)
+        disp[i:i + BLOCK_ROWS, 1] = np.einsum('ij,ij->i', dy, f)
+
+    return disp
+
+
+def _legalize(stage, ents, pos, movable):
+    # type: (Stage, list[Entity], np.ndarray, np.ndarray) -> list
+    """
+    Turns the simulated positions into overlap-free ones.
+
+    The 'auto' Entities are cut into rows by their simulated y coord, sorted by their simulated x
+    coord within each row, & then shelf-packed in that order, so neighbours stay neighbours.
+
+    :return: The x/y coords dict for each 'auto' Entity, in the same order as ``ents``
+    :rtype: list
+    """
+    pad_x = stage.pad_x
+    auto = [i for i in np.lexsort((pos[:, 0], pos[:, 1])).tolist() if movable[i]]
+    row_width = layout.row_width([ents[i] for i in auto], pad_x, stage.pad_y)
+
+    order = []
+    row = []
+    used = 0
+    for i in auto:
+        w = (ents[i].type_def['width'] or 0) + pad_x
+        if row and used + w > row_width:
+            order.extend(sorted(row, key=lambda r: pos[r, 0]))
+            row = []
+            used = 0
+        row.append(i)
+        used += w
+    order.extend(sorted(row, key=lambda r: pos[r, 0]))
+
+    fixed = [layout.bbox(e) for e, m in zip(ents, movable.tolist()) if not m]
+    packer = layout.ShelfPacker(stage.x, stage.y, row_width, pad_x, stage.pad_y, fixed)
+    coords = [None] * len(ents)
+    for i in order:
+        td = ents[i].type_def
+        coords[i] = packer.place(td['width'] or 0, td['height'] or 0)
+
+    return coords
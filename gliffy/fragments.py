@@ -0,0 +1,318 @@
+"""
+Persistent cache of top-level Entity JSON, so unchanged tables aren't rebuilt on every run.
+
+``Stage.add_cached()`` looks a top-level Entity up by a key describing what it would be made from (e.g. a
+table's name, columns & styles), plus the Stage's styles mode. On a hit the Entity is never built: a
+``Cached`` placeholder with the saved size, JSON & the ids/positions of its direct children is put on the
+Stage instead. On a miss the Entity is built & added as usual, & its JSON is saved the next time the Stage
+is written.
+
+The JSON is saved without the Entity's x/y, which are put back in when it's written, so a table that
+only moves on the canvas is still a hit. Its ids/orders are saved along with the id/order they were
+numbered from & shifted on a hit (see ``restamp()``), so a table that is only renumbered, e.g. because a
+table before it changed in 'sequential' ids mode, is still a hit as well.
+
+Entries are files in one directory (pickled & zlib compressed, like schema snapshots), replaced
+atomically, so any number of processes can share the directory. The least recently used entries are
+evicted once the directory is over ``max_bytes``.
+
+.. warning:: Loading an entry unpickles it, which can run arbitrary code, so only use a directory that
+             nobody but trusted users can write to (a directory the cache makes is private to its user).
+"""
+
+# Standard Library
+import glob
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+import zlib
+# Third Party
+# Local
+from .base import GliffyObject
+from .ids import IdAllocator
+from .spill import Spilled
+from . import layout
+
+# bumped whenever the JSON an Entity is written as changes, so old entries aren't used by new code
+VERSION = 2
+
+EXTENSION = '.fragment'
+
+# the ids & (numeric) orders in an Entity's JSON; a string can't contain an unescaped quote, so only keys match
+_NUMBERS = re.compile(r'"(id|order)": (\d+)')
+
+
+class FragmentCache(object):
+    """
+    Directory of cached top-level Entity JSON, keyed by what the Entities are made from.
+    """
+
+    __slots__ = ('directory', 'max_bytes', 'hits', 'misses')
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        # type: (str, int) -> FragmentCache
+        """
+        :param str directory: Where the entries are kept (Default ~/.gliffydb/fragments); it has to be trusted,
+                              see the module docs
+        :param int max_bytes: Max total size of the entries
+        :rtype: FragmentCache
+        """
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.gliffydb', 'fragments')
+        # private to this user, if it's made here
+        os.makedirs(directory, 0o700, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        # type: (Any) -> dict
+        """
+        :param Any key: What the Entity is made from; its repr has to be the same from run to run
+        :return: The saved entry; None if there isn't one
+        :rtype: dict
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                version, saved_key, entry = pickle.loads(zlib.decompress(f.read()))
+        except Exception:
+            # missing, half evicted by another process, or not an entry
+            self.misses += 1
+            return None
+        if version != VERSION or saved_key != repr(key):
+            self.misses += 1
+            return None
+
+        # recently used entries are evicted last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+
+        return entry
+
+    def put(self, key, entry):
+        # type: (Any, dict) -> FragmentCache
+        """
+        Saves an entry; the file is replaced atomically, so readers never see a partial entry.
+
+        :param Any key: What the Entity is made from
+        :param dict entry: The entry made by ``Stage`` (size, ids, styles & JSON)
+        :rtype: FragmentCache
+        """
+        data = zlib.compress(pickle.dumps((VERSION, repr(key), entry), pickle.HIGHEST_PROTOCOL))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            _remove(tmp)
+            raise
+
+        return self
+
+    def evict(self):
+        # type: () -> FragmentCache
+        """
+        Removes the least recently used entries until the entries fit in ``max_bytes``.
+
+        :rtype: FragmentCache
+        """
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*' + EXTENSION)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(f[1] for f in files)
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+        return self
+
+    def _path(self, key):
+        # type: (Any) -> str
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + EXTENSION)
+
+
+class Cached(Spilled):
+    """
+    Stands in for a top-level Entity whose JSON came from a ``FragmentCache``.
+
+    Like a ``Spilled`` handle it has no graphic or children & its content can't be changed; ``parts``
+    are stubs for its direct children, so they can still be linked.
+    """
+
+    __slots__ = ('cache', 'key', 'entry', 'build', 'first_id', 'first_order', 'parts')
+
+    def __init__(self, cache, key, entry, build, first_id, first_order):
+        # type: (FragmentCache, Any, dict, Callable, int, int) -> Cached
+        """
+        :param FragmentCache cache: Where the entry came from
+        :param Any key: The entry's key
+        :param dict entry: The entry
+        :param Callable build: Makes the Entity, if it's needed after all (see ``to_json()``)
+        :param int first_id: The id the Entity is numbered from
+        :param int first_order: The order the Entity is numbered from
+        :rtype: Cached
+        """
+        entry = restamp(entry, first_id, first_order)
+        super().__init__(None, None, None, dict(entry['settings']), {
+            'x': None, 'y': None, 'id': entry['id'], 'width': entry['width'], 'height': entry['height'],
+        })
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.build = build
+        self.first_id = first_id
+        self.first_order = first_order
+        self.parts = [Part(self, *p) for p in entry['parts']]
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Cached {}>'.format(self.type_def['id'])
+
+    @property
+    def style_counts(self):
+        # type: () -> list
+        """
+        :return: (Style, number of uses) pairs for the Entity & its descendants; see ``StyleTable.collect()``
+        :rtype: list
+        """
+        return self.entry['styles']
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        """
+        The JSON depends on the global TextStyle when styles are shared; if the entry has no JSON for
+        ``text_style`` the Entity is built, encoded & the entry saved again.
+
+        :rtype: str
+        """
+        data = self.entry['json'].get(text_style)
+        if data is None:
+            data = self._encode(text_style)
+
+        return '{{"x": {}, "y": {}, '.format(json.dumps(self.type_def['x']), json.dumps(self.type_def['y'])) + data
+
+    def _encode(self, text_style):
+        # type: (Any) -> str
+        ent = self.build()
+        IdAllocator().number(ent, self.first_id, self.first_order)
+        layout.update_sizes([ent])
+        ent.coords = {'x': 0, 'y': 0}
+        data = strip_coords(ent.to_json(text_style), 0, 0)
+        self.entry['json'][text_style] = data
+        self.cache.put(self.key, self.entry)
+
+        return data
+
+
+class Part(GliffyObject):
+    """
+    Stub for a direct child of a ``Cached`` Entity: just its id & position relative to the Entity,
+    which is all Lines need.
+    """
+
+    __slots__ = ('parent', 'type_def')
+
+    def __init__(self, parent, id, x, y, width, height):
+        # type: (Cached, int, int, int, int, int) -> Part
+        self.parent = parent
+        self.type_def = {'x': x, 'y': y, 'id': id, 'width': width, 'height': height}
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Part {} of {}>'.format(self.type_def['id'], self.parent.type_def['id'])
+
+    @property
+    def id(self):
+        # type: () -> int
+        return self.type_def['id']
+
+
+def numbered_from(ent):
+    # type: (Entity) -> tuple
+    """
+    :param Entity ent: A numbered top-level Entity
+    :return: The (id, order) it was numbered from; see ``IdAllocator.number()``
+    :rtype: tuple
+    """
+    first_id = ent.id
+    # ids & orders are handed out in step, so order - id is the same for every Entity with a numeric order
+    offset = None
+    stack = [ent]
+    while stack:
+        e = stack.pop()
+        first_id = min(first_id, e.id)
+        if offset is None and isinstance(e.order, int):
+            offset = e.order - e.id
+        stack.extend(e.children)
+
+    return first_id, first_id + (offset or 0)
+
+
+def restamp(entry, first_id, first_order):
+    # type: (dict, int, int) -> dict
+    """
+    Shifts the ids/orders of an entry to those of an Entity numbered from a different id/order.
+
+    :param dict entry: An entry from ``FragmentCache.get()``; it's changed in place
+    :param int first_id: The id the Entity is numbered from now
+    :param int first_order: The order the Entity is numbered from now
+    :return: The entry
+    :rtype: dict
+    """
+    shift = {'id': first_id - entry['first_id'], 'order': first_order - entry['first_order']}
+    if not shift['id'] and not shift['order']:
+        return entry
+
+    def sub(match):
+        # type: (Any) -> str
+        return '"{}": {}'.format(match.group(1), int(match.group(2)) + shift[match.group(1)])
+
+    entry['json'] = {k: _NUMBERS.sub(sub, v) for k, v in entry['json'].items()}
+    entry['id'] += shift['id']
+    entry['parts'] = [(p[0] + shift['id'],) + tuple(p[1:]) for p in entry['parts']]
+    entry['first_id'] = first_id
+    entry['first_order'] = first_order
+
+    return entry
+
+
+def strip_coords(data, x, y):
+    # type: (str, Any, Any) -> str
+    """
+    :param str data: JSON of a top-level Entity
+    :param Any x: The Entity's x
+    :param Any y: The Entity's y
+    :return: The JSON without its leading x & y, as kept in the cache
+    :rtype: str
+    :raises: :py:class:`ValueError`
+    """
+    prefix = '{{"x": {}, "y": {}, '.format(json.dumps(x), json.dumps(y))
+    if not data.startswith(prefix):
+        raise ValueError('Only Entities whose type def starts with x & y can be cached.')
+
+    return data[len(prefix):]
+
+
+def _remove(path):
+    # type: (str) -> None
+    # another process may have removed it already
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -8,6 +8,8 @@
 from .stage import Stage
 from .entities import Entity, Group
 from .graphics import Shape, Text, Line
+from .styles import freeze
+from .stream import StreamWriter
 
 
 # this is going to be ugly as sin as i figure out the best way to set it up
@@ -23,11 +25,22 @@ class Gliffy(object):
         Properly sizing/positioning automatically generated objects can be somewhat of a pain.
     """
 
-    __slots__ = 'stage'
+    __slots__ = ('stage', 'prototypes')
+
+    # default styles for ``table()``; the *_text values are CSS (see ``text()``)
+    table_styles = {
+        'table': {'strokeColor': '#000000', 'fillColor': 'none'},
+        'name_cell': {'strokeWidth': 1, 'strokeColor': '#000000'},
+        'name_text': {'font-size': '14px', 'font-family': 'Courier', 'bold': True},
+        'column_cell': {'strokeWidth': 1, 'strokeColor': '#cccccc'},
+        'column_text': {'font-size': '12px', 'font-family': 'Courier'},
+    }
 
     def __init__(self):
         # type: () -> Gliffy
         self.stage = Stage()
+        # frozen table styles -> (container, name cell, column cell) prototypes; see ``table()``
+        self.prototypes = {}
         self.set_start_coords()
         self.set_entity_padding()
 
@@ -65,6 +78,92 @@ class Gliffy(object):
 
         return self
 
+    def set_layout(self, mode='shelf'):
+        # type: (str) -> Gliffy
+        """
+        Set how the top-level Entities are positioned on the Stage
+
+        :param str mode: 'shelf' packs them tightly (Default). 'force' puts linked Entities close together
+                         & requires NumPy.
+        :rtype: Gliffy
+        :raises: :py:class:`ValueError` for any other mode
+        """
+        self.stage.set_layout(mode)
+
+        return self
+
+    def set_styles(self, mode='inline'):
+        # type: (str) -> Gliffy
+        """
+        Set how Text & Shape styles are written out
+
+        :param str mode: 'inline' puts the full CSS in every Text (Default). 'shared' lists the styles once in
+                         the Stage's textStyles/shapeStyles tables, so Text in the most common style only needs
+                         minimal html; this makes diagrams with many identical cells much smaller.
+        :rtype: Gliffy
+        :raises: :py:class:`ValueError` for any other mode
+        """
+        self.stage.set_styles(mode)
+
+        return self
+
+    def set_ids(self, mode='sequential'):
+        # type: (str) -> Gliffy
+        """
+        Set how Entity ids/orders are handed out. Call this before adding anything.
+
+        :param str mode: 'sequential' numbers the Entities one after the other (Default). 'stable' numbers
+                         each top-level Entity from a block picked by hashing its key (e.g. the table it
+                         draws), so adding or removing one doesn't renumber the rest & regenerated diagrams
+                         only differ where their content does; the ids are much bigger numbers.
+        :rtype: Gliffy
+        """
+        self.stage.set_ids(mode)
+
+        return self
+
+    def set_fragment_cache(self, cache):
+        # type: (FragmentCache) -> Gliffy
+        """
+        Reuse the JSON of top-level Entities that were made from the same things in an earlier run (see
+        :py:mod:`gliffy.fragments` & ``add_cached()``). The output is the same.
+
+        :param FragmentCache cache: Where the JSON is kept; None turns caching off
+        :rtype: Gliffy
+        """
+        self.stage.set_fragment_cache(cache)
+
+        return self
+
+    def set_workers(self, workers=1):
+        # type: (int) -> Gliffy
+        """
+        Encode the diagram's JSON in several forked processes (see ``Stage.encode_parallel()``). It only
+        pays off for big diagrams on a machine with cores to spare; the output is the same.
+
+        :param int workers: Number of processes (Default 1, encode in this process)
+        :rtype: Gliffy
+        """
+        self.stage.settings['workers'] = max(1, int(workers))
+
+        return self
+
+    def set_spill(self, directory=None):
+        # type: (str) -> Gliffy
+        """
+        Keep the diagram out of memory: each top-level Entity is written to a temp file as soon as it's
+        added & the Stage only keeps a small handle for it (see :py:mod:`gliffy.spill`). The output is the
+        same, but added Entities can't be changed & must be finished (children added) before they're added.
+
+        Call this before adding anything.
+
+        :param str directory: Where to make the temp file (Default the system temp directory)
+        :rtype: Gliffy
+        """
+        self.stage.set_spill(directory)
+
+        return self
+
     def entity(self):
         # type: () -> Entity
         """
@@ -131,7 +230,7 @@ class Gliffy(object):
         :return: Entity with a Rectangle graphic
         :rtype: Entity
         """
-        return Entity('rectangle', properties)
+        return Entity(graphic_type='rectangle', graphic_props=properties)
 
     def text(self, properties={}):
         # type: (dict) -> Text
@@ -151,21 +250,117 @@ class Gliffy(object):
                             ``bold``, ``italic``, ``underline``
         :rtype: Text
         """
-        return Entity('text', properties)
+        return Entity(graphic_type='text', graphic_props=properties)
 
-    def add(self, children):
-        # type: (Any) -> Gliffy
+    def table(self, name, columns, styles=None):
+        # type: (str, Iterable[str], dict) -> Entity
+        """
+        Creates a table: a rectangle holding a name cell & a cell for each column, each cell being
+        a rectangle with a text child.
+
+        The styles are only validated the first time they're used; after that the cells are copied
+        from prototypes & only their text is set, which is much faster than making each cell from
+        scratch with ``rectangle()``/``text()``.
+
+        :param str name: Text of the name cell
+        :param Iterable[str] columns: Text of each column cell
+        :param dict styles: Styles to use instead of ``table_styles``
+        :keyword table:       (:py:class:`dict`) Properties of the container rectangle
+        :keyword name_cell:   (:py:class:`dict`) Properties of the name cell's rectangle
+        :keyword name_text:   (:py:class:`dict`) CSS of the name cell's text
+        :keyword column_cell: (:py:class:`dict`) Properties of the column cells' rectangles
+        :keyword column_text: (:py:class:`dict`) CSS of the column cells' text
+        :return: Entity with a Rectangle graphic; its children are the name cell & then the column cells
+        :rtype: Entity
+        """
+        styles = styles or {}
+        try:
+            key = tuple(sorted((k, freeze(v)) for k, v in styles.items()))
+            prototypes = self.prototypes.get(key)
+        except TypeError:
+            # unhashable values can't be cached
+            key = prototypes = None
+        if prototypes is None:
+            s = dict(self.table_styles, **styles)
+            name_cell = self.rectangle(s['name_cell']).add_child(self.text({'css': s['name_text']}))
+            column_cell = self.rectangle(s['column_cell']).add_child(self.text({'css': s['column_text']}))
+            prototypes = (self.rectangle(s['table']), name_cell, column_cell)
+            if key is not None:
+                self.prototypes[key] = prototypes
+
+        cont, name_cell, column_cell = prototypes
+        cont = cont.clone()
+        _stamp_cells(cont, name_cell, [name])
+        _stamp_cells(cont, column_cell, columns)
+
+        return cont
+
+    def add(self, children, keys=None):
+        # type: (Any, list) -> Gliffy
         """
         Adds a single Entity or list of Entities to the 'Stage', allowing them to be viewed/manipulated
 
         :param Any children: Single Entity or :py:class:`list` of Entities
+        :param list keys: What each Entity is numbered by when ids are 'stable' (see ``set_ids()``)
         :rtype: Gliffy
         :raises: :py:class:`TypeError`
         """
-        self.stage.add(list(children))
+        self.stage.add(list(children), keys)
+
+        return self
+
+    def add_cached(self, key, build):
+        # type: (Any, Callable) -> tuple
+        """
+        Adds a top-level Entity, reusing its JSON from the fragment cache instead of building it if it's
+        there; see ``Stage.add_cached()``
+
+        :param Any key: Identifies what ``build()`` makes; its repr has to be the same from run to run
+        :param Callable build: Makes the Entity, with all of its children
+        :return: The Entity (or its cached placeholder) & a list of its direct children (or their stubs)
+        :rtype: tuple
+        """
+        return self.stage.add_cached(key, build)
+
+    def remove(self, children):
+        # type: (Any) -> Gliffy
+        """
+        Removes a single Entity or list of Entities from the 'Stage', along with their links
+
+        :param Any children: Single Entity or :py:class:`list` of Entities
+        :rtype: Gliffy
+        """
+        self.stage.remove(children)
 
         return self
 
+    def link(self, source, target):
+        # type: (Entity, Entity) -> Gliffy
+        """
+        Records that two Entities are related, e.g. a foreign key column & the column it references.
+
+        :param Entity source: The Entity the link starts at
+        :param Entity target: The Entity the link ends at
+        :rtype: Gliffy
+        """
+        self.stage.link(source, target)
+
+        return self
+
+    def stream(self, fp, width=None):
+        # type: (Any, int) -> StreamWriter
+        """
+        Starts writing the Gliffy JSON before the diagram is finished, for diagrams too big to hold in memory.
+
+        Pass each top-level Entity to ``StreamWriter.write()`` as soon as it's made (instead of ``add()``),
+        then call ``StreamWriter.close()``. The Stage must be empty & use the 'shelf' layout.
+
+        :param Any fp: A writable file-like object
+        :param int width: Width of the shelves the Entities are placed on (Default the Stage's maxWidth)
+        :rtype: StreamWriter
+        """
+        return StreamWriter(self.stage, fp, width)
+
     def to_json(self):
         # type: () -> str
         """
@@ -174,4 +369,38 @@ class Gliffy(object):
         """
         return self.stage.to_json()
 
+    def dump(self, fp):
+        # type: (Any) -> Gliffy
+        """
+        Streams the Gliffy JSON to a file-like object without building the whole string in memory.
+
+        Example::
+
+            with open('output.gliffy', 'w') as f:
+                g.dump(f)
 
+        :param Any fp: A writable file-like object
+        :rtype: Gliffy
+        """
+        self.stage.write(fp)
+
+        return self
+
+
+def _stamp_cells(cont, proto, texts):
+    # type: (Entity, Entity, Iterable[str]) -> None
+    """
+    Adds a copy of a prototype cell (a rectangle with a text child) to a container for each text.
+
+    Each cell & its text are copied on their own (see ``Entity.clone()``), so the text is set as its
+    Graphic is copied instead of being changed afterwards.
+
+    :param Entity cont: The (dirty) container the cells are added to
+    :param Entity proto: The prototype cell
+    :param Iterable[str] texts: Text of each cell
+    """
+    shape = proto.graphic
+    label = proto.children[0]
+    text = label.graphic
+    for t in texts:
+        label.shallow_clone(proto.shallow_clone(cont, shape.clone()), text.clone(t))
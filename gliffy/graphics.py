@@ -5,9 +5,11 @@ Gliffy 'graphics' are the basic shapes, text, lines, etc.
 # Standard Library
 import json
 from collections import OrderedDict
+from copy import deepcopy
 # Third Party
 # Local
 from .base import GliffyObject
+from . import metrics, styles
 from utils import util, validate
 
 
@@ -16,9 +18,13 @@ class Graphic(GliffyObject):
     Base class for the Entity.graphic value. Graphics are used to display shapes, images, text, lines, etc.
     """
 
-    __slots__ = ('type_def', 'graphic_type', 'properties')
+    __slots__ = ('graphic_type', 'owner')
 
     defaults = {}
+    # key -> type of the property values checked by ``validate_properties()``; 'hex' for color codes
+    checks = {}
+    # (key, type name, converter) for each of the ``checks``; compiled once per class
+    _validators = ()
     bad_val_err = '\n\n----- @@@ ERROR: Invalid `({}) {}` value `{}` -----\n\n'
 
     # tid value used in the graphic type def
@@ -38,20 +44,33 @@ class Graphic(GliffyObject):
         'default': 'com.gliffy.shape.basic.basic_v1.default.{}',
     }
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._validators = tuple((k, 'str' if t == 'hex' else t.__name__, validate.type_converter(t))
+                                for k, t in cls.checks.items())
+
+    def __getstate__(self):
+        # type: () -> dict
+        # the owner is left out; the owner's __setstate__ puts it back
+        return {s: getattr(self, s) for cls in type(self).__mro__ for s in getattr(cls, '__slots__', ())
+                if s != 'owner' and hasattr(self, s)}
+
+    def __setstate__(self, state):
+        # type: (dict) -> None
+        self.owner = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __init__(self):
         # type: () -> Graphic
         """
         :return: A Graphic object for use as an Entity.graphic value
         :rtype: Graphic
         """
-        # these MUST be overridden in child classes
+        # this MUST be overridden in child classes
         self.graphic_type = 'UNDEFINED'
-        self.type_def = {
-            'type': 'UNDEFINED',
-            'UNDEFINED': {}
-        }
-        # the modifiable Graphic properties - will be defined in child classes
-        self.properties = {}
+        # the Entity the Graphic is assigned to
+        self.owner = None
 
     @property
     def width(self):
@@ -103,24 +122,76 @@ class Graphic(GliffyObject):
         for k in keys:
             valid = validate.in_dict_as_type(dic, k, data_type, convert)
             if valid is False:
-                print(self.bad_val_err.format(data_type.__name__, k, keys[k]))
+                print(self.bad_val_err.format(data_type.__name__, k, dic[k]))
                 dic[k] = self.defaults[k]
             elif valid is not None:
                 if hex_check and not dic[k].startswith('#'):
                     dic[k] = '#'+dic[k][0:6]
 
-    def get_type_def(self):
-        # type: () -> dict
-        return self.type_def
+    def validate_properties(self, props={}):
+        # type: (dict) -> None
+        """
+        Validates user-supplied properties to be applied to the Graphic, using the class' precompiled ``checks``.
 
-    def to_json(self):
-        # type: () -> str
-        return json.dumps(self.get_type_def())
+        Invalid values will be replaced by the defaults.
+        """
+        if not props:
+            return
+        for k, type_name, convert in self._validators:
+            if k in props:
+                try:
+                    props[k] = convert(props[k])
+                except ValueError:
+                    print(self.bad_val_err.format(type_name, k, props[k]))
+                    props[k] = self.defaults[k]
+
+    def clone(self):
+        # type: () -> Graphic
+        """
+        :return: A copy of the Graphic that isn't assigned to an Entity; styles are shared, not copied
+        :rtype: Graphic
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.graphic_type = self.graphic_type
+        new.owner = None
+
+        return new
+
+    def touch(self):
+        # type: () -> Graphic
+        """
+        Flags the Entity the Graphic is assigned to as changed, so its cached JSON is regenerated.
+
+        :rtype: Graphic
+        """
+        if self.owner is not None:
+            self.owner.touch()
+
+        return self
+
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
+        """
+        :param Any text_style: The Stage's global ``TextStyle`` when styles are shared; None when inlined
+        :rtype: dict
+        """
+        # MUST be overridden in child classes
+        return {'type': 'UNDEFINED', 'UNDEFINED': {}}
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        return json.dumps(self.get_type_def(text_style))
 
 
 class Shape(Graphic):
+    """
+    A Gliffy Graphic for shapes (rectangles, circles, etc).
+
+    The Shape's values are held in a shared ``ShapeStyle``, so Shapes that look the same
+    share a single copy of their values & JSON.
+    """
 
-    __slots__ = ('graphic_type', 'type_def', 'properties')
+    __slots__ = ('style',)
 
     # default property values - these are Class properties & can be set without having a Shape instance
     defaults = {
@@ -128,6 +199,14 @@ class Shape(Graphic):
         'strokeColor': '#000000',
         'fillColor': '#FFFFFF',
     }
+    checks = {
+        'strokeWidth': int,
+        'strokeColor': 'hex',
+        'fillColor': 'hex',
+    }
+
+    # (tid, frozen defaults) or (style, frozen props) -> ShapeStyle, so each distinct input is only merged once
+    _styles = styles.StyleCache()
 
     def __init__(self, graphic_type, graphic_props={}):
         # type: (str, dict) -> Shape
@@ -144,10 +223,21 @@ class Shape(Graphic):
         """
         super().__init__()
         self.graphic_type = graphic_type
-        self.type_def = OrderedDict([
-            ('type', 'Shape'),
-            ('Shape', OrderedDict([
-                ('tid', None),
+        self.style = self._base_style()
+        self.set_properties(graphic_props)
+
+    def _base_style(self):
+        # type: () -> styles.ShapeStyle
+        """
+        :return: The style of a new Shape of this type, using the current ``Shape.defaults``
+        :rtype: styles.ShapeStyle
+        """
+        tid = self.graphic_tid
+        key = (tid, styles.freeze(self.defaults))
+        style = self._styles.get(key)
+        if style is None:
+            values = OrderedDict([
+                ('tid', tid),
                 ('strokeWidth', 0),
                 ('strokeColor', '#000000'),
                 ('fillColor', '#FFFFFF'),
@@ -157,30 +247,82 @@ class Shape(Graphic):
                 ('shadowX', 0),
                 ('shadowY', 0),
                 ('opacity', 1)
-            ]))
-        ])
-        self.properties = self.defaults.copy()
-        self.set_properties(graphic_props)
-        self.type_def['Shape']['tid'] = self.graphic_tid
+            ])
+            for k in values.keys() & self.defaults.keys():
+                values[k] = self.defaults[k]
+            style = self._styles[key] = styles.ShapeStyle.get(values)
 
-    def validate_properties(self, props={}):
-        # type: (dict) -> None
-        """
-        Validates user-supplied properties to be applied to the Shape Graphic.
+        return style
 
-        Invalid values will be replaced by the defaults.
+    def clone(self):
+        # type: () -> Shape
+        # Graphic.clone() isn't called, since a table copies its Shapes & Texts once per cell
+        new = self.__class__.__new__(self.__class__)
+        new.graphic_type = self.graphic_type
+        new.owner = None
+        new.style = self.style
+
+        return new
+
+    @property
+    def properties(self):
+        # type: () -> dict
         """
-        if not props:
-            return
-        self.check_values(props, ['strokeWidth'], int, True)
-        self.check_values(props, ['strokeColor', 'fillColor'], 'hex', True)
+        :return: A copy of the Shape's current property values
+        :rtype: dict
+        """
+        props = self.style.to_dict()
+        del props['tid']
+
+        return props
 
     def set_properties(self, props):
         # type: (dict) -> Shape
-        util.join_dicts(self.type_def['Shape'], self.properties, props)
+        """
+        Updates the Shape's properties; unknown properties are ignored & invalid ones are replaced by the
+        defaults (see ``validate_properties()``). Each distinct update is only validated once.
+
+        :param dict props: Properties to assign to the Shape
+        :rtype: Shape
+        """
+        if not props:
+            return self
+
+        try:
+            key = (self.style, styles.freeze(props))
+            style = self._styles.get(key)
+        except TypeError:
+            # unhashable values can't be cached
+            key = style = None
+        if style is None:
+            props = dict(props)
+            self.validate_properties(props)
+            values = self.style.to_dict()
+            for k in values.keys() & props.keys():
+                if k != 'tid':
+                    values[k] = props[k]
+            style = styles.ShapeStyle.get(values)
+            if key is not None:
+                self._styles[key] = style
+
+        if style is not self.style:
+            self.style = style
+            self.touch()
 
         return self
 
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
+        """
+        :return: A new type def for the Shape
+        :rtype: dict
+        """
+        return self.style.type_def()
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        return self.style.json
+
 
 class Text(Graphic):
     """
@@ -188,9 +330,12 @@ class Text(Graphic):
 
     You can override the default values without instantiating the object by
     manually setting ``graphic.Text.defaults`` before any are created.
+
+    The CSS is held in a shared ``TextStyle``, so each Text only carries its own text;
+    the CSS is validated & turned into html once per distinct style.
     """
 
-    __slots__ = ('graphic_type', 'type_def', 'properties')
+    __slots__ = ('style', 'text')
 
     # valid property values
     valid = {
@@ -214,6 +359,12 @@ class Text(Graphic):
         'paddingBottom': 2,
         'paddingTop': 2,
     }
+    checks = OrderedDict([('color', 'hex')] +
+                         [(k, bool) for k in ('bold', 'italic', 'underline')] +
+                         [('padding' + k, int) for k in ('Vert', 'Horiz', 'Top', 'Bottom', 'Left', 'Right')])
+
+    # (frozen defaults) or (style, frozen css) -> TextStyle, so each distinct input is only validated once
+    _styles = styles.StyleCache()
 
     def __init__(self, properties={}):
         # type: (dict) -> Text
@@ -240,29 +391,89 @@ class Text(Graphic):
         """
         super().__init__()
         self.graphic_type = 'Text'
-        self.type_def = OrderedDict([
-            ('type', 'Text'),
-            ('Text', OrderedDict([
-                ('tid', None),
-                ('valign', 'middle'),
-                ('overflow', 'none'),
-                ('vposition', 'none'),
-                ('hposition', 'none'),
-                ('html', '<p><span></span></p>'),
-                ('paddingLeft', 0),
-                ('paddingRight', 0),
-                ('paddingBottom', 0),
-                ('paddingTop', 0)
-            ]))
-        ])
-        # customizable Text settings
-        self.properties = {
-            # the text to show
-            'text': '',
-            'css': self.defaults.copy(),
-        }
+        self.text = ''
+        self.style = self._base_style()
         self.set_properties(properties)
 
+    def _base_style(self):
+        # type: () -> styles.TextStyle
+        """
+        :return: The style of a new Text, using the current ``Text.defaults``
+        :rtype: styles.TextStyle
+        """
+        key = styles.freeze(self.defaults)
+        style = self._styles.get(key)
+        if style is None:
+            style = self._styles[key] = styles.TextStyle.get(self.defaults)
+
+        return style
+
+    def clone(self, text=None):
+        # type: (str) -> Text
+        """
+        :param str text: Text for the copy to display; the same text if not given
+        :return: A copy of the Text that isn't assigned to an Entity; the style is shared, not copied
+        :rtype: Text
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.graphic_type = self.graphic_type
+        new.owner = None
+        new.style = self.style
+        new.text = self.text if text is None else str(text)
+
+        return new
+
+    @property
+    def properties(self):
+        # type: () -> dict
+        """
+        :return: A copy of the Text's current text & CSS
+        :rtype: dict
+        """
+        return {'text': self.text, 'css': self.style.to_dict()}
+
+    @property
+    def width(self):
+        # type: () -> int
+        """
+        :return: Width of the rendered text, including padding
+        :rtype: int
+        """
+        css = self.style.values
+        w = metrics.measure(self.text, css['font-family'], css['font-size'], css['bold'])[0]
+
+        return w + css['paddingLeft'] + css['paddingRight']
+
+    @property
+    def height(self):
+        # type: () -> int
+        """
+        :return: Height of the rendered text, including padding
+        :rtype: int
+        """
+        css = self.style.values
+        h = metrics.measure(self.text, css['font-family'], css['font-size'], css['bold'])[1]
+
+        return h + css['paddingTop'] + css['paddingBottom']
+
+    @classmethod
+    def measure_many(cls, texts, css={}):
+        # type: (Iterable[str], dict) -> list
+        """
+        Measures many strings that share the same CSS, e.g. every column name of a table.
+
+        :param Iterable[str] texts: The strings to measure
+        :param dict css: CSS settings (see ``__init__``); missing values use ``Text.defaults``
+        :return: A (width, height) tuple for each string, including padding
+        :rtype: list
+        """
+        css = dict(cls.defaults, **css)
+        pad_w = css['paddingLeft'] + css['paddingRight']
+        pad_h = css['paddingTop'] + css['paddingBottom']
+
+        return [(w + pad_w, h + pad_h)
+                for w, h in metrics.measure_many(texts, css['font-family'], css['font-size'], css['bold'])]
+
     def set_properties(self, props={}):
         # type: (dict) -> Text
         """
@@ -277,18 +488,63 @@ class Text(Graphic):
         if not props:
             return self
 
-        self.validate_properties(props)
-        css = self.properties['css']
-        if css['paddingVert']:
-            css['paddingTop'] = css['paddingBottom'] = css['paddingVert']
-        if css['paddingHoriz']:
-            css['paddingLeft'] = css['paddingRight'] = css['paddingHoriz']
+        style = self.style
+        if props.get('css'):
+            style = self._derive_style(props['css'])
+        text = str(props.get('text', self.text))
+        if style is not self.style or text != self.text:
+            self.style = style
+            self.text = text
+            self.touch()
+
+        return self
+
+    def set_text(self, text):
+        # type: (str) -> Text
+        """
+        Changes only the text, keeping the current style.
 
-        util.join_dicts(self.properties, props)
-        self._set_html()
+        :param str text: Text to display
+        :rtype: Text
+        """
+        text = str(text)
+        if text != self.text:
+            self.text = text
+            self.touch()
 
         return self
 
+    def _derive_style(self, css):
+        # type: (dict) -> styles.TextStyle
+        """
+        :param dict css: CSS settings to apply on top of the current style
+        :return: The resulting style
+        :rtype: styles.TextStyle
+        """
+        try:
+            key = (self.style, styles.freeze(css))
+            style = self._styles.get(key)
+        except TypeError:
+            # unhashable values can't be cached
+            key = style = None
+        if style is not None:
+            return style
+
+        css = dict(css)
+        self.validate_properties({'css': css})
+        values = self.style.to_dict()
+        for k in values.keys() & css.keys():
+            values[k] = css[k]
+        if 'paddingVert' in css:
+            values['paddingTop'] = values['paddingBottom'] = values['paddingVert']
+        if 'paddingHoriz' in css:
+            values['paddingLeft'] = values['paddingRight'] = values['paddingHoriz']
+        style = styles.TextStyle.get(values)
+        if key is not None:
+            self._styles[key] = style
+
+        return style
+
     def validate_properties(self, props={}):
         # type: (dict) -> None
         """
@@ -306,41 +562,36 @@ class Text(Graphic):
             if props[v] not in self.valid[v]:
                 print(self.bad_val_err.format('css', v, props[v]))
                 props[v] = self.defaults[v]
-        self.check_values(props, ['color'], 'hex', True)
-        self.check_values(props, ['bold', 'italic', 'underline'], bool, True)
-        self.check_values(props, ['padding' + k for k in ['Vert', 'Horiz', 'Top', 'Bottom', 'Left', 'Right']], int, True)
+        super().validate_properties(props)
 
-    def _set_html(self):
-        # type: () -> None
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
         """
-        Sets the Text Graphic's ``html`` property based on supplied/default CSS settings
+        :param Any text_style: The Stage's global ``TextStyle`` when styles are shared; Text in that
+                               style leaves the font & color out of its html
+        :return: A new type def for the Text
+        :rtype: dict
         """
-        txt = self.properties['text']
-        css = self.properties['css']
-
-        p_css = 'text-align: {};'.format(css['text-align'])
-        css_props = ['font-size: {};', 'font-family: {};', 'white-space: pre-wrap;',
-                     'text-decoration: {};', 'line-height: {};', 'color: {};']
-        if css['bold']:
-            css_props.append('font-weight: bold;')
-        if css['italic']:
-            css_props.append('font-style: italic;')
-        text_dec = 'underline' if css['underline'] else 'none'
-        span_css = ' '.join(css_props).format(css['font-size'], css['font-family'], text_dec,
-                                              css['font-size'], css['color'])
+        return styles.text_type_def(self.style.html(self.text, self.style is text_style))
 
-        self.type_def['Text']['html'] = '<p style=\'{}\'><span style=\'{}\'>{}</span></p>'.format(p_css, span_css, txt)
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        return self.style.to_json(self.text, self.style is text_style)
 
 
 # this class requires constraints be added
 class Line(Graphic):
 
-    __slots__ = ('graphic_type', 'type_def', 'properties')
+    __slots__ = ('type_def', 'properties', '_fragment')
 
     defaults = {
         'strokeWidth': 2,
         'strokeColor': '#000000',
     }
+    checks = {
+        'strokeWidth': int,
+        'strokeColor': 'hex',
+    }
 
     def __init__(self, properties={}):
         # type: (dict) -> Line
@@ -377,23 +628,61 @@ class Line(Graphic):
             'strokeWidth': 2,
             'strokeColor': '#000000',
         }
+        # cached JSON; None when the Line has changed since the last to_json()
+        self._fragment = None
         self.set_properties(properties)
 
-    def validate_properties(self, props={}):
-        # type: (dict) -> None
-        """
-        Validates user-supplied properties to be applied to the Line Graphic.
-
-        Invalid values will be replaced by the defaults.
-        """
-        if not props:
-            return
-        self.check_values(props, ['strokeWidth'], int, True)
-        self.check_values(props, ['strokeColor'], 'hex', True)
-
     def set_properties(self, props):
         # type: (dict) -> Line
         self.validate_properties(props)
         util.join_dicts(self.type_def['Line'], self.properties, props)
+        self.touch()
 
         return self
+
+    def clone(self):
+        # type: () -> Line
+        new = super().clone()
+        new.type_def = deepcopy(self.type_def)
+        new.properties = self.properties.copy()
+        new._fragment = self._fragment
+
+        return new
+
+    def set_path(self, points):
+        # type: (list) -> Line
+        """
+        Sets the points the Line passes through.
+
+        :param list points: [x, y] points, relative to the Line Entity's x/y coords
+        :rtype: Line
+        """
+        points = [[float(x), float(y)] for x, y in points]
+        if points != self.type_def['Line']['controlPath']:
+            self.type_def['Line']['controlPath'] = points
+            self.touch()
+
+        return self
+
+    def touch(self):
+        # type: () -> Line
+        self._fragment = None
+
+        return super().touch()
+
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
+        """
+        .. note:: This is the live type def. Change it via ``set_properties()``/``set_path()`` so the
+                  cached JSON is invalidated.
+
+        :rtype: dict
+        """
+        return self.type_def
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        if self._fragment is None:
+            self._fragment = json.dumps(self.type_def)
+
+        return self._fragment
@@ -0,0 +1,200 @@
+"""
+Allocation of Entity ``id`` (Stage ``nodeIndex``) & z-index ``order`` values.
+"""
+
+# Standard Library
+import hashlib
+from itertools import count
+# Third Party
+# Local
+from .base import GliffyObject
+from . import graphics
+
+
+# ids/orders each top-level Entity gets in 'stable' mode; a bigger Entity can't be numbered
+BLOCK = 2 ** 16
+
+# number of blocks in 'stable' mode; the ids stay well below 2 ** 53, so JavaScript reads them exactly
+SLOTS = 2 ** 32
+
+
+class IdAllocator(GliffyObject):
+    """
+    Hands out ids/orders to Entities as they are added to the Stage.
+
+    Only the Entities passed to ``assign()`` are numbered, so adding to a Stage costs time
+    in proportion to what is being added, not to what is already there.
+
+    Numbering rules:
+
+        - Entities get their id/order before their children; each reserves 2 ids/orders.
+        - Groups get their id/order after their children; each reserves 1 id/order.
+        - Text Entities always have an 'auto' order.
+
+    By default top-level Entities are numbered one after the other, so adding or removing one
+    renumbers everything after it. In 'stable' mode each top-level Entity is numbered from the
+    start of its own block of ``BLOCK`` ids/orders, picked by hashing a key (e.g. the table it
+    draws), so its ids only change when it does. Blocks never overlap: a key whose block is taken
+    is re-hashed until a free one is found.
+    """
+
+    __slots__ = ('next_id', 'next_order', 'debug', 'stable', 'taken')
+
+    def __init__(self, debug=False, stable=False):
+        # type: (bool, bool) -> IdAllocator
+        """
+        :param bool debug: Flag to (en|dis)able printing each id/order as it is assigned
+        :param bool stable: Flag to number each top-level Entity from a block picked by its key
+        :rtype: IdAllocator
+        """
+        self.next_id = 0
+        self.next_order = 0
+        self.debug = debug
+        self.stable = stable
+        # block -> key of the top-level Entity numbered from it, in 'stable' mode
+        self.taken = {}
+
+    def reset(self):
+        # type: () -> IdAllocator
+        """
+        Starts numbering from 0 again
+
+        :rtype: IdAllocator
+        """
+        self.next_id = 0
+        self.next_order = 0
+        self.taken = {}
+
+        return self
+
+    def assign(self, entities, keys=None):
+        # type: (list, list) -> int
+        """
+        Assigns ids/orders to the Entities & all of their descendants.
+
+        :param list entities: The (top-level) Entities to number
+        :param list keys: A key for each Entity, for 'stable' mode; when not given (or None) an
+                          Entity's key is made from its content, see ``content_key()``
+        :return: The next free id, i.e. the Stage's ``nodeIndex``
+        :rtype: int
+        """
+        for i, ent in enumerate(entities):
+            key = keys[i] if keys is not None else None
+            start_id, start_order = self.start(key if key is not None or not self.stable else content_key(ent))
+            self.number(ent, start_id, start_order)
+
+        return self.next_id
+
+    def start(self, key=None):
+        # type: (Any) -> tuple
+        """
+        Picks where the next top-level Entity is numbered from; in 'stable' mode its block is taken.
+
+        :param Any key: Identifies the Entity in 'stable' mode; its repr has to be the same from run to run
+        :return: The first (id, order)
+        :rtype: tuple
+        """
+        if not self.stable:
+            return self.next_id, self.next_order
+
+        for attempt in count():
+            digest = hashlib.sha1(repr((key, attempt)).encode('utf-8')).digest()
+            block = int.from_bytes(digest[:8], 'big') % SLOTS
+            if block not in self.taken:
+                self.taken[block] = key
+                return block * BLOCK, block * BLOCK
+
+    def release(self, ids):
+        # type: (Iterable[int]) -> IdAllocator
+        """
+        Frees the blocks of removed top-level Entities in 'stable' mode.
+
+        :param Iterable[int] ids: An id from each removed Entity
+        :rtype: IdAllocator
+        """
+        if self.stable:
+            for eid in ids:
+                self.taken.pop(eid // BLOCK, None)
+
+        return self
+
+    def key(self, eid):
+        # type: (int) -> Any
+        """
+        :param int eid: An id of a top-level Entity (or one of its descendants)
+        :return: The key the Entity was numbered with in 'stable' mode; None if it wasn't
+        :rtype: Any
+        """
+        return self.taken.get(eid // BLOCK) if self.stable else None
+
+    def number(self, ent, start_id, start_order):
+        # type: (Entity, int, int) -> tuple
+        """
+        Numbers a top-level Entity & its descendants from the given id/order.
+
+        The tree is walked with an explicit stack, so deeply nested Groups can't hit the recursion limit.
+
+        :param Entity ent: The Entity to number
+        :param int start_id: Its first id, from ``start()``
+        :param int start_order: Its first order, from ``start()``
+        :return: The (id, order) after the last ones used
+        :rtype: tuple
+        :raises: :py:class:`ValueError` if the Entity needs more than a block in 'stable' mode
+        """
+        eid = start_id
+        order = start_order
+        # (entity, start id, start order); a start id of None means the entity hasn't been visited yet
+        stack = [(ent, None, None)]
+        while stack:
+            ent, first_id, first_order = stack.pop()
+            is_group = ent.is_type('group')
+            if first_id is None:
+                stack.append((ent, eid, order))
+                if not is_group:
+                    ent.id = eid
+                    ent.order = 'auto' if isinstance(ent.graphic, graphics.Text) else order
+                    self._trace(ent)
+                    eid += 1
+                    order += 1
+                stack.extend((c, None, None) for c in reversed(ent.children))
+            elif is_group:
+                # groups can have an order AFTER their children are ordered
+                ent.id = eid
+                ent.order = order
+                self._trace(ent)
+                eid += 1
+                order += 1
+            else:
+                eid = max(eid, first_id + 2)
+                order = max(order, first_order + 2)
+
+        if self.stable and max(eid - start_id, order - start_order) > BLOCK:
+            raise ValueError('An Entity with more than {} ids can\'t be numbered in \'stable\' mode.'.format(BLOCK))
+        # the nodeIndex has to be above every id
+        self.next_id = max(self.next_id, eid)
+        self.next_order = max(self.next_order, order)
+
+        return eid, order
+
+    def _trace(self, ent):
+        # type: (Entity) -> None
+        if self.debug:
+            print('-- {} id: {}, order: {}'.format(ent.settings['_type'], ent.id, ent.order))
+
+
+def content_key(ent):
+    # type: (Entity) -> tuple
+    """
+    :param Entity ent: A top-level Entity
+    :return: A key made from the types & text of the Entity & its descendants, for numbering an
+             Entity that wasn't given a key in 'stable' mode
+    :rtype: tuple
+    """
+    key = []
+    stack = [ent]
+    while stack:
+        e = stack.pop()
+        key.append((e.settings['_type'], getattr(e.graphic, 'text', None)))
+        stack.extend(reversed(e.children))
+
+    return tuple(key)
@@ -0,0 +1,278 @@
+"""
+Automatic sizing & positioning of Entities.
+
+Sizing works bottom-up: an Entity with children stacks its 'auto' positioned children
+as rows (like the cells of a DB table), and an 'auto' sized Entity grows to fit them.
+
+Positioning packs the Stage's top-level Entities onto the canvas with a 'shelf' algorithm:
+Entities are sorted by height & laid left -> right in rows (shelves), starting a new shelf
+when the current one is full. Sorting makes it O(n log n); 'fixed' Entities are left where
+they are & auto Entities are moved around them.
+
+Laying out again isn't a full re-pack: auto Entities that were placed by the last layout & haven't moved
+or changed size since stay where they are, & only new or resized Entities are placed, into the free space
+around them. ``Stage.repack()`` packs everything from scratch.
+"""
+
+# Standard Library
+import math
+# Third Party
+# Local
+from .spatial import SpatialIndex
+
+# size used for Entities that have no children & whose graphic can't be measured
+DEFAULT_WIDTH = 100
+DEFAULT_HEIGHT = 100
+
+
+def update_sizes(entities):
+    # type: (list[Entity]) -> None
+    """
+    Sizes the Entities & all of their descendants, positioning 'auto' children inside their parents.
+
+    The tree is walked with an explicit stack (children before parents), so deep nesting is fine.
+    Entities that haven't changed since they were last serialized (& so were already sized) are skipped,
+    along with their descendants.
+
+    :param list entities: The Entities to size
+    """
+    # (entity, children done?)
+    stack = [(e, False) for e in entities]
+    while stack:
+        ent, done = stack.pop()
+        if done:
+            _size_entity(ent)
+        elif ent.dirty:
+            stack.append((ent, True))
+            stack.extend((c, False) for c in ent.children)
+
+
+def _size_entity(ent):
+    # type: (Entity) -> None
+    """
+    Sizes a single Entity, assuming its children are already sized.
+    """
+    width = height = 0
+    if ent.children:
+        rows = []
+        y = 0
+        for c in ent.children:
+            cw = c.type_def['width'] or 0
+            ch = c.type_def['height'] or 0
+            if c.settings['position'] == 'auto':
+                c.coords = {'x': 0, 'y': y}
+                rows.append(c)
+                y += ch
+                width = max(width, cw)
+            else:
+                width = max(width, (c.type_def['x'] or 0) + cw)
+                height = max(height, (c.type_def['y'] or 0) + ch)
+        height = max(height, y)
+        # stretch the rows so their edges line up
+        _stretch(rows, width)
+    if ent.graphic:
+        width = max(width, ent.graphic.width)
+        height = max(height, ent.graphic.height)
+
+    if not ent.is_type('group'):
+        width = width or DEFAULT_WIDTH
+        height = height or DEFAULT_HEIGHT
+    if ent.settings['size'] == 'auto':
+        ent.size = {'width': width, 'height': height}
+
+
+def _stretch(entities, width):
+    # type: (list[Entity], int) -> None
+    """
+    Widens 'auto' sized Entities (& their 'auto' sized rows) to the given width.
+    """
+    stack = list(entities)
+    while stack:
+        ent = stack.pop()
+        if ent.settings['size'] != 'auto' or ent.type_def['width'] == width:
+            continue
+        ent.size = {'width': width}
+        stack.extend(c for c in ent.children if c.settings['position'] == 'auto')
+
+
+def update_coordinates(stage):
+    # type: (Stage) -> None
+    """
+    Positions the Stage's top-level 'auto' Entities & sets the Stage's width/height to fit everything.
+
+    'auto' Entities whose box is still the one in the Stage's spatial index (i.e. they were placed by the
+    last layout & haven't moved or been resized since) are kept where they are, like 'fixed' ones; only
+    the rest are placed.
+
+    :param Stage stage: The Stage to lay out
+    """
+    pad_x = stage.pad_x
+    pad_y = stage.pad_y
+    placed = stage.index.boxes
+    auto = []
+    fixed = []
+    for c in stage.children:
+        box = bbox(c)
+        if c.settings['position'] != 'auto' or placed.get(c) == box:
+            fixed.append(box)
+        else:
+            auto.append(c)
+
+    # the kept Entities count towards the area too, so Entities added to an already laid out Stage fill its gaps
+    packer = ShelfPacker(stage.x, stage.y, row_width(stage.children, pad_x, pad_y), pad_x, pad_y, fixed)
+    # tallest first, so each shelf is only as tall as the first Entity on it
+    auto.sort(key=lambda e: (e.type_def['height'] or 0, e.type_def['width'] or 0), reverse=True)
+    for c in auto:
+        c.coords = packer.place(c.type_def['width'] or 0, c.type_def['height'] or 0)
+
+    update_stage_size(stage)
+
+
+def update_stage_size(stage):
+    # type: (Stage) -> None
+    """
+    Sets the Stage's width/height to fit all of its top-level Entities.
+
+    :param Stage stage: The Stage to resize
+    """
+    right = bottom = 0
+    for c in stage.children:
+        box = bbox(c)
+        right = max(right, box[2])
+        bottom = max(bottom, box[3])
+    stage.width = right + stage.pad_x
+    stage.height = bottom + stage.pad_y
+    stg = stage.type_def['stage']
+    stg['maxWidth'] = max(stg['maxWidth'], stage.width)
+    stg['maxHeight'] = max(stg['maxHeight'], stage.height)
+
+
+def bbox(ent):
+    # type: (Entity) -> tuple
+    """
+    :return: The Entity's (left, top, right, bottom) bounding box
+    :rtype: tuple
+    """
+    x = ent.type_def['x'] or 0
+    y = ent.type_def['y'] or 0
+
+    return x, y, x + (ent.type_def['width'] or 0), y + (ent.type_def['height'] or 0)
+
+
+def absolute_bbox(ent):
+    # type: (Entity) -> tuple
+    """
+    :return: The Entity's (left, top, right, bottom) bounding box on the Stage, rather than relative to its parent
+    :rtype: tuple
+    """
+    left, top, right, bottom = bbox(ent)
+    parent = ent.parent
+    while parent is not None:
+        x = parent.type_def['x'] or 0
+        y = parent.type_def['y'] or 0
+        left += x
+        right += x
+        top += y
+        bottom += y
+        parent = parent.parent
+
+    return left, top, right, bottom
+
+
+def row_width(entities, pad_x, pad_y):
+    # type: (list[Entity], int, int) -> int
+    """
+    :return: A shelf width that makes the packed Entities roughly square overall
+    :rtype: int
+    """
+    area = 0
+    widest = 0
+    for e in entities:
+        w = (e.type_def['width'] or 0) + pad_x
+        area += w * ((e.type_def['height'] or 0) + pad_y)
+        widest = max(widest, w)
+
+    return max(widest, int(math.sqrt(area)))
+
+
+class ShelfPacker(object):
+    """
+    Places rectangles left -> right on 'shelves', moving down to a new shelf when the current one is full.
+
+    Rectangles should be placed tallest first. Fixed rectangles (obstacles) are stepped around;
+    they're kept in a SpatialIndex, so each placement only checks the obstacles near it.
+    """
+
+    __slots__ = ('left', 'width', 'pad_x', 'pad_y', 'obstacles', 'x', 'y', 'shelf_height', 'right', 'bottom')
+
+    def __init__(self, x, y, width, pad_x=0, pad_y=0, obstacles=()):
+        # type: (int, int, int, int, int, list) -> ShelfPacker
+        """
+        :param int x: X coord of the upper-left corner of the packing area
+        :param int y: Y coord of the upper-left corner of the packing area
+        :param int width: Width of the shelves
+        :param int pad_x: Horizontal space between rectangles
+        :param int pad_y: Vertical space between rectangles
+        :param list obstacles: (left, top, right, bottom) boxes that must not be overlapped
+        :rtype: ShelfPacker
+        """
+        self.left = x
+        self.width = width
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.obstacles = SpatialIndex()
+        for o in obstacles:
+            self.obstacles.insert(o, o)
+        # where the next rectangle goes
+        self.x = x
+        self.y = y
+        self.shelf_height = 0
+        # extent of everything placed so far
+        self.right = x
+        self.bottom = y
+
+    def place(self, width, height):
+        # type: (int, int) -> dict
+        """
+        :return: The x/y coords for a rectangle of the given size; {'x': :py:class:`int`, 'y': :py:class:`int`}
+        :rtype: dict
+        """
+        limit = self.left + self.width
+        while True:
+            if self.x != self.left and self.x + width > limit:
+                self._next_shelf()
+            hit = self._hit(self.x, self.y, width, height)
+            if hit is None:
+                break
+            self.x = hit[2] + self.pad_x
+            if self.x + width > limit and not self.shelf_height:
+                # nothing on this shelf yet, so drop below the obstacle instead
+                self.x = self.left
+                self.y = hit[3] + self.pad_y
+
+        coords = {'x': self.x, 'y': self.y}
+        self.x += width + self.pad_x
+        self.shelf_height = max(self.shelf_height, height)
+        self.right = max(self.right, coords['x'] + width)
+        self.bottom = max(self.bottom, coords['y'] + height)
+
+        return coords
+
+    def _next_shelf(self):
+        # type: () -> None
+        self.x = self.left
+        self.y += self.shelf_height + self.pad_y
+        self.shelf_height = 0
+
+    def _hit(self, x, y, width, height):
+        # type: (int, int, int, int) -> Any
+        """
+        :return: The first obstacle the (padded) rectangle overlaps; None if there isn't one
+        :rtype: Any
+        """
+        hits = self.obstacles.query((x - self.pad_x, y - self.pad_y, x + width + self.pad_x, y + height + self.pad_y))
+        if not hits:
+            return None
+
+        # stepping past the one that reaches furthest right skips the most
+        return max(hits, key=lambda o: (o[2], o[3]))
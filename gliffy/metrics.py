@@ -0,0 +1,163 @@
+"""
+Font metrics used to size Text graphics without a renderer.
+
+Character widths are the standard AFM widths (1/1000 em) for the printable ASCII characters
+of the fonts Gliffy offers; Arial is metric-compatible with Helvetica. Verdana's widths
+are approximations & its bold face is estimated by scaling.
+
+Lines are as tall as the font size, matching the ``line-height`` used in ``Text`` html.
+"""
+
+# Standard Library
+import functools
+import math
+# Third Party
+# Local
+
+# max number of distinct (text, font-family, font-size, bold) measurements remembered
+CACHE_SIZE = 8192
+
+# widths of chars 32 (space) -> 126 (~)
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+_TIMES = (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+_TIMES_BOLD = (
+    250, 333, 555, 500, 500, 1000, 833, 278, 333, 333, 500, 570, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 333, 333, 570, 570, 570, 500,
+    930, 722, 667, 722, 722, 667, 611, 778, 778, 389, 500, 778, 667, 944, 722, 778,
+    611, 778, 722, 556, 667, 722, 722, 1000, 722, 722, 667, 333, 278, 333, 581, 500,
+    333, 500, 556, 444, 556, 444, 333, 500, 556, 278, 333, 556, 278, 833, 556, 500,
+    556, 556, 444, 389, 333, 556, 500, 722, 500, 500, 444, 394, 220, 394, 520,
+)
+_VERDANA = (
+    352, 394, 459, 818, 636, 1076, 727, 269, 454, 454, 636, 818, 364, 454, 364, 454,
+    636, 636, 636, 636, 636, 636, 636, 636, 636, 636, 454, 454, 818, 818, 818, 545,
+    1000, 684, 686, 698, 771, 632, 575, 775, 751, 421, 455, 693, 557, 843, 748, 787,
+    603, 787, 695, 684, 616, 732, 684, 989, 685, 615, 685, 454, 454, 454, 818, 636,
+    636, 601, 623, 521, 623, 596, 352, 623, 633, 274, 344, 592, 274, 973, 633, 607,
+    623, 623, 427, 521, 394, 633, 592, 818, 592, 592, 525, 635, 454, 635, 818,
+)
+_COURIER = (600,) * 95
+
+# (font-family, bold) -> char widths
+_FONTS = {
+    ('Arial', False): _HELVETICA,
+    ('Arial', True): _HELVETICA_BOLD,
+    ('Helvetica', False): _HELVETICA,
+    ('Helvetica', True): _HELVETICA_BOLD,
+    ('Times', False): _TIMES,
+    ('Times', True): _TIMES_BOLD,
+    ('Verdana', False): _VERDANA,
+    ('Verdana', True): tuple(int(w * 1.1) for w in _VERDANA),
+    ('Courier', False): _COURIER,
+    ('Courier', True): _COURIER,
+}
+
+
+class _Widths(dict):
+    """
+    Char -> width (1/1000 em) map with fallbacks for characters outside printable ASCII.
+    """
+
+    __slots__ = ('latin', 'wide')
+
+    def __init__(self, widths):
+        # type: (tuple) -> _Widths
+        super().__init__((chr(32 + i), w) for i, w in enumerate(widths))
+        # accented latin, greek, cyrillic, etc are about as wide as an 'o'
+        self.latin = self['o']
+        # CJK & other full width characters
+        self.wide = 1000
+
+    def __missing__(self, char):
+        # type: (str) -> int
+        return self.latin if char < '⺀' else self.wide
+
+
+_WIDTHS = {k: _Widths(v) for k, v in _FONTS.items()}
+
+
+def font_px(size):
+    # type: (Any) -> int
+    """
+    :param Any size: Font size as an :py:class:`int` or CSS string, e.g. '12px'
+    :return: The font size in pixels
+    :rtype: int
+    """
+    if isinstance(size, str):
+        size = size.strip().lower()
+        if size.endswith('px'):
+            size = size[:-2]
+
+    return int(size)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def measure(text, family='Courier', size='12px', bold=False):
+    # type: (str, str, Any, bool) -> tuple
+    """
+    Measures a string as it would be rendered, without any padding.
+
+    Results are memoized (LRU, ``CACHE_SIZE`` entries), so repeated measurements are dict lookups.
+
+    :param str text: The text to measure; newlines start a new line
+    :param str family: The font-family (Arial, Helvetica, Courier, Times, Verdana)
+    :param Any size: The font-size, e.g. '12px'
+    :param bool bold: Flag for bold text
+    :return: The (width, height) in pixels, rounded up
+    :rtype: tuple
+    :raises: :py:class:`KeyError`
+    """
+    widths = _WIDTHS[(family, bool(bold))]
+    px = font_px(size)
+    lines = text.split('\n')
+    units = max(sum(map(widths.__getitem__, line)) for line in lines)
+
+    return int(math.ceil(units * px / 1000.0)), px * len(lines)
+
+
+def measure_many(texts, family='Courier', size='12px', bold=False):
+    # type: (Iterable[str], str, Any, bool) -> list
+    """
+    Measures many strings in the same font, e.g. every column name of a table.
+
+    :param Iterable[str] texts: The strings to measure
+    :param str family: The font-family (Arial, Helvetica, Courier, Times, Verdana)
+    :param Any size: The font-size, e.g. '12px'
+    :param bool bold: Flag for bold text
+    :return: A (width, height) tuple for each string, in the same order
+    :rtype: list
+    """
+    bold = bool(bold)
+
+    return [measure(t, family, size, bold) for t in texts]
+
+
+def cache_info():
+    # type: () -> tuple
+    """
+    :return: Hit/miss/size stats for the measurement cache
+    :rtype: tuple
+    """
+    return measure.cache_info()
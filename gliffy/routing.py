@@ -0,0 +1,327 @@
+"""
+Orthogonal connector routing for Line Entities.
+
+Routes are found with A* over a coarse occupancy grid built from the bounding boxes of the
+Stage's top-level Entities, so Lines go around tables instead of through them. Bends cost
+extra, so routes prefer long straight runs.
+
+Routes are cached by (source bbox, target bbox, grid version). When the grid changes, routes
+that don't pass through any of the changed cells are carried over to the new version, so
+moving one table only re-routes the Lines it actually affects. The grid is always lined up
+with whole cells of the Stage, so cached routes are carried over when it grows or shrinks too.
+"""
+
+# Standard Library
+import heapq
+# Third Party
+# Local
+from .base import GliffyObject
+
+# (dx, dy) of the 4 directions a route can move in
+_STEPS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+class Router(GliffyObject):
+    """
+    Computes orthogonal ``controlPath`` points between Entity bounding boxes.
+
+    Call ``update()`` with the obstacle boxes whenever the layout changes, then ``route()`` for each Line.
+    """
+
+    __slots__ = ('cell', 'margin', 'bend_cost', 'max_steps', 'left', 'top', 'cols', 'rows', 'grid', 'boxes',
+                 'version', 'cache', 'hits', 'misses')
+
+    def __init__(self, cell=10, margin=0, bend_cost=5, max_steps=200000):
+        # type: (int, int, int, int) -> Router
+        """
+        :param int cell: Size (px) of a grid cell
+        :param int margin: Space (px) kept between a route & the obstacles
+        :param int bend_cost: Extra cost of a bend, in cells
+        :param int max_steps: Max number of cells A* visits before giving up & using a plain elbow
+        :rtype: Router
+        """
+        self.cell = cell
+        self.margin = margin
+        self.bend_cost = bend_cost
+        self.max_steps = max_steps
+        # upper-left corner of the area routed in
+        self.left = 0
+        self.top = 0
+        self.cols = 0
+        self.rows = 0
+        # 1 if the cell is blocked
+        self.grid = bytearray()
+        self.boxes = frozenset()
+        self.version = 0
+        # (source bbox, target bbox, version) -> (points, cells)
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, boxes, width, height, left=0, top=0):
+        # type: (Iterable[tuple], int, int, int, int) -> Router
+        """
+        Rebuilds the occupancy grid from the obstacles' (left, top, right, bottom) boxes.
+
+        Nothing happens if neither the boxes nor the area have changed. Otherwise the grid version goes
+        up & cached routes that are inside the new area & don't cross a changed cell are kept for it.
+
+        Routes never leave the area, so it can be just the part of the Stage around a Line's ends.
+
+        :param Iterable[tuple] boxes: Absolute bounding boxes of the obstacles
+        :param int width: Width of the area to route in
+        :param int height: Height of the area to route in
+        :param int left: X coord of the area's upper-left corner
+        :param int top: Y coord of the area's upper-left corner
+        :rtype: Router
+        """
+        boxes = frozenset(boxes)
+        c = self.cell
+        # the area is widened to start on a whole cell
+        cols = (width + left % c) // c + 2
+        rows = (height + top % c) // c + 2
+        left = left // c * c
+        top = top // c * c
+        moved = (left, top, cols, rows) != (self.left, self.top, self.cols, self.rows)
+        if boxes == self.boxes and not moved:
+            return self
+
+        old_left = self.left // c
+        old_top = self.top // c
+        old_cols = self.cols
+        self.left = left
+        self.top = top
+        self.cols = cols
+        self.rows = rows
+        changed = set()
+        # the changed cells are only needed to carry cached routes over
+        if self.cache:
+            for box in boxes.symmetric_difference(self.boxes):
+                changed.update(self._cells(box, cols, rows))
+
+        self.grid = bytearray(cols * rows)
+        for box in boxes:
+            for idx in self._cells(box, cols, rows):
+                self.grid[idx] = 1
+        self.boxes = boxes
+
+        old = self.version
+        self.version += 1
+        cache = {}
+        for (src, tgt, ver), (points, cells) in self.cache.items():
+            # routes that couldn't be found (no cells) are tried again
+            if ver != old or not cells:
+                continue
+            if moved:
+                cells = self._move(cells, old_left, old_top, old_cols)
+            if cells is not None and not changed.intersection(cells):
+                cache[(src, tgt, self.version)] = (points, cells)
+        self.cache = cache
+
+        return self
+
+    def route(self, source, target):
+        # type: (tuple, tuple) -> list
+        """
+        Finds an orthogonal route from the side of ``source`` to the side of ``target``.
+
+        :param tuple source: Absolute (left, top, right, bottom) box of the Entity the route starts at
+        :param tuple target: Absolute (left, top, right, bottom) box of the Entity the route ends at
+        :return: Absolute [x, y] points of the route, starting at the source's edge & ending at the target's
+        :rtype: list
+        """
+        key = (source, target, self.version)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.hits += 1
+            return hit[0]
+
+        self.misses += 1
+        start, end = _ends(source, target)
+        first = self._cell_at(_outside(start[0], source, self.margin), start[1])
+        last = self._cell_at(_outside(end[0], target, self.margin), end[1])
+        cells = self._search(first, last)
+        if cells is None:
+            points = _elbow(start, end)
+            cells = ()
+        else:
+            points = self._points(start, end, cells)
+        self.cache[key] = (points, frozenset(cells))
+
+        return points
+
+    def _cells(self, box, cols, rows):
+        # type: (tuple, int, int) -> Iterator[int]
+        """
+        :return: Indexes of the grid cells covered by the box plus the margin
+        :rtype: Iterator[int]
+        """
+        c = self.cell
+        m = self.margin
+        x0 = max((box[0] - self.left - m) // c, 0)
+        x1 = min((box[2] - self.left + m - 1) // c, cols - 1)
+        y0 = max((box[1] - self.top - m) // c, 0)
+        y1 = min((box[3] - self.top + m - 1) // c, rows - 1)
+        for y in range(y0, y1 + 1):
+            row = y * cols
+            for x in range(x0, x1 + 1):
+                yield row + x
+
+    def _move(self, cells, left, top, cols):
+        # type: (frozenset, int, int, int) -> Any
+        """
+        :param frozenset cells: Cells of a route on the previous grid
+        :param int left: The previous grid's left column, in whole cells of the Stage
+        :param int top: The previous grid's top row, in whole cells of the Stage
+        :param int cols: The previous grid's number of columns
+        :return: The same cells on the current grid; None if the route isn't inside it
+        :rtype: Any
+        """
+        dx = left - self.left // self.cell
+        dy = top - self.top // self.cell
+        moved = []
+        for idx in cells:
+            x = idx % cols + dx
+            y = idx // cols + dy
+            if not (0 <= x < self.cols and 0 <= y < self.rows):
+                return None
+            moved.append(y * self.cols + x)
+
+        return frozenset(moved)
+
+    def _cell_at(self, x, y):
+        # type: (int, int) -> int
+        cx = min(max(int(x - self.left) // self.cell, 0), self.cols - 1)
+        cy = min(max(int(y - self.top) // self.cell, 0), self.rows - 1)
+
+        return cy * self.cols + cx
+
+    def _search(self, first, last):
+        # type: (int, int) -> Any
+        """
+        A* from cell ``first`` to cell ``last``; the search state includes the direction so bends can cost extra.
+
+        :return: The cell indexes along the route; None if there isn't one
+        :rtype: Any
+        """
+        cols = self.cols
+        rows = self.rows
+        grid = self.grid
+        bend = self.bend_cost
+        lx, ly = last % cols, last // cols
+
+        def h(idx):
+            return abs(idx % cols - lx) + abs(idx // cols - ly)
+
+        # (f, g, cell, direction)
+        todo = [(h(first), 0, first, -1)]
+        best = {(first, -1): 0}
+        came = {}
+        steps = 0
+        while todo:
+            f, g, idx, d = heapq.heappop(todo)
+            if idx == last:
+                path = [idx]
+                state = (idx, d)
+                while state in came:
+                    state = came[state]
+                    path.append(state[0])
+                path.reverse()
+                return path
+            if best.get((idx, d), g) < g:
+                continue
+            steps += 1
+            if steps > self.max_steps:
+                return None
+            x, y = idx % cols, idx // cols
+            for nd, (dx, dy) in enumerate(_STEPS):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                nidx = ny * cols + nx
+                # the end cell is allowed even if it's blocked, since it hugs the target
+                if grid[nidx] and nidx != last:
+                    continue
+                ng = g + 1 + (bend if d != -1 and nd != d else 0)
+                if ng < best.get((nidx, nd), ng + 1):
+                    best[(nidx, nd)] = ng
+                    came[(nidx, nd)] = (idx, d)
+                    heapq.heappush(todo, (ng + h(nidx), ng, nidx, nd))
+
+        return None
+
+    def _points(self, start, end, cells):
+        # type: (list, list, list) -> list
+        """
+        Turns a list of grid cells into the corner points of an orthogonal route.
+        """
+        cols = self.cols
+        half = self.cell // 2
+        x = self.left + half
+        y = self.top + half
+        centers = [[idx % cols * self.cell + x, idx // cols * self.cell + y] for idx in cells]
+        # join the exact start/end points onto the grid with horizontal then vertical moves
+        points = [list(start), [centers[0][0], start[1]]] + centers + [[centers[-1][0], end[1]], list(end)]
+
+        return _corners(points)
+
+
+def _ends(source, target):
+    # type: (tuple, tuple) -> tuple
+    """
+    Picks the sides the route leaves the source from & enters the target on.
+
+    :return: The absolute [x, y] start & end points
+    :rtype: tuple
+    """
+    s_mid = (source[0] + source[2]) / 2
+    t_mid = (target[0] + target[2]) / 2
+    s_y = (source[1] + source[3]) // 2
+    t_y = (target[1] + target[3]) // 2
+    if source == target or abs(s_mid - t_mid) < 1:
+        # same column; go out & back in on the right
+        return [source[2], s_y], [target[2], t_y]
+    if s_mid < t_mid:
+        return [source[2], s_y], [target[0], t_y]
+
+    return [source[0], s_y], [target[2], t_y]
+
+
+def _outside(x, box, margin):
+    # type: (int, tuple, int) -> int
+    """
+    :return: The x coord just past the margin on the side of the box that x is on
+    :rtype: int
+    """
+    return x + margin if x >= box[2] else x - margin - 1
+
+
+def _elbow(start, end):
+    # type: (list, list) -> list
+    """
+    :return: A simple 3 segment orthogonal route, used when no clear route can be found
+    :rtype: list
+    """
+    mid = (start[0] + end[0]) // 2
+
+    return _corners([list(start), [mid, start[1]], [mid, end[1]], list(end)])
+
+
+def _corners(points):
+    # type: (list) -> list
+    """
+    :return: The points with duplicates & points in the middle of straight runs removed
+    :rtype: list
+    """
+    out = []
+    for p in points:
+        if out and out[-1] == p:
+            continue
+        if len(out) > 1:
+            a, b = out[-2], out[-1]
+            if (a[0] == b[0] == p[0]) or (a[1] == b[1] == p[1]):
+                out[-1] = p
+                continue
+        out.append(p)
+
+    return out
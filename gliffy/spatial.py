@@ -0,0 +1,163 @@
+"""
+Spatial index for answering "what intersects this rectangle?" without scanning every Entity.
+"""
+
+# Standard Library
+# Third Party
+# Local
+from .base import GliffyObject
+
+
+class SpatialIndex(GliffyObject):
+    """
+    Uniform grid index of (left, top, right, bottom) boxes.
+
+    Each box is filed under every grid cell it covers, so a query only looks at the boxes
+    in the cells the query box covers. With a cell size around the size of a typical box,
+    inserts & queries cost about the same no matter how many boxes are indexed.
+
+    Boxes touching at an edge don't count as intersecting.
+    """
+
+    __slots__ = ('cell', 'buckets', 'boxes')
+
+    def __init__(self, cell=256):
+        # type: (int) -> SpatialIndex
+        """
+        :param int cell: Size (px) of a grid cell
+        :rtype: SpatialIndex
+        """
+        self.cell = cell
+        # (cell x, cell y) -> set of keys
+        self.buckets = {}
+        # key -> box
+        self.boxes = {}
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.boxes)
+
+    def __contains__(self, key):
+        # type: (Any) -> bool
+        return key in self.boxes
+
+    def insert(self, key, box):
+        # type: (Any, tuple) -> SpatialIndex
+        """
+        Adds a box to the index, replacing the key's old box if it has one.
+
+        :param Any key: Anything hashable that identifies the box, e.g. an Entity
+        :param tuple box: The (left, top, right, bottom) box
+        :rtype: SpatialIndex
+        """
+        if key in self.boxes:
+            self.remove(key)
+        self.boxes[key] = box
+        for c in self._cells(box):
+            bucket = self.buckets.get(c)
+            if bucket is None:
+                self.buckets[c] = {key}
+            else:
+                bucket.add(key)
+
+        return self
+
+    def update(self, key, box):
+        # type: (Any, tuple) -> SpatialIndex
+        """
+        Same as ``insert()``, but does nothing if the key's box hasn't changed.
+
+        :rtype: SpatialIndex
+        """
+        if self.boxes.get(key) != box:
+            self.insert(key, box)
+
+        return self
+
+    def remove(self, key):
+        # type: (Any) -> SpatialIndex
+        """
+        Removes a key's box from the index; unknown keys are ignored.
+
+        :rtype: SpatialIndex
+        """
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return self
+        for c in self._cells(box):
+            bucket = self.buckets[c]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[c]
+
+        return self
+
+    def clear(self):
+        # type: () -> SpatialIndex
+        self.buckets = {}
+        self.boxes = {}
+
+        return self
+
+    def query(self, box):
+        # type: (tuple) -> set
+        """
+        :param tuple box: The (left, top, right, bottom) box to check
+        :return: The keys of the boxes that intersect the box
+        :rtype: set
+        """
+        found = set()
+        seen = set()
+        for c in self._cells(box):
+            for key in self.buckets.get(c, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if intersects(self.boxes[key], box):
+                    found.add(key)
+
+        return found
+
+    def overlaps(self):
+        # type: () -> list
+        """
+        :return: (key, key) pairs of every two boxes that intersect; each pair is only reported once
+        :rtype: list
+        """
+        pairs = []
+        seen = set()
+        boxes = self.boxes
+        for bucket in self.buckets.values():
+            if len(bucket) < 2:
+                continue
+            keys = list(bucket)
+            for i, a in enumerate(keys):
+                box_a = boxes[a]
+                for b in keys[i + 1:]:
+                    pair = (a, b) if id(a) < id(b) else (b, a)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    if intersects(box_a, boxes[b]):
+                        pairs.append(pair)
+
+        return pairs
+
+    def _cells(self, box):
+        # type: (tuple) -> Iterator[tuple]
+        c = self.cell
+        # the right/bottom edges aren't part of the box
+        x1 = (box[2] - 1) // c if box[2] > box[0] else box[0] // c
+        y1 = (box[3] - 1) // c if box[3] > box[1] else box[1] // c
+        for x in range(int(box[0] // c), int(x1) + 1):
+            for y in range(int(box[1] // c), int(y1) + 1):
+                yield x, y
+
+
+def intersects(a, b):
+    # type: (tuple, tuple) -> bool
+    """
+    :return: True if the two (left, top, right, bottom) boxes overlap; touching edges don't count
+    :rtype: bool
+    """
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
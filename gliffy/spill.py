@@ -0,0 +1,220 @@
+"""
+Out-of-core storage of top-level Entities, for diagrams whose Entity tree is too big to hold in memory.
+
+With spilling on (see ``Gliffy.set_spill()``), each top-level Entity is sized & encoded as soon as it's
+added to the Stage, its JSON is appended to a temp file & the Stage keeps a small ``Spilled`` handle
+(id, size, position & where the JSON is) in its place. The JSON is left without the Entity's x/y, since
+those are only known after the layout, so they're put back in as the JSON is streamed out.
+
+The Entity objects themselves are hollowed out: the ones the caller still holds (e.g. cells kept
+for linking) only keep their id & their position relative to the handle, which is all the Lines &
+``Stage.remove()`` need; everything else is freed.
+"""
+
+# Standard Library
+import json
+import tempfile
+from collections import OrderedDict
+# Third Party
+# Local
+from .base import GliffyObject
+from . import layout, styles
+
+# what the JSON of an Entity whose x/y are None starts with; x & y are always the first keys
+_PREFIX = '{"x": null, "y": null, '
+
+
+class Spilled(GliffyObject):
+    """
+    Stands in for a spilled top-level Entity on the Stage.
+
+    It has the parts of the Entity interface the layout, Lines & JSON writers use; its content
+    can't be changed.
+    """
+
+    __slots__ = ('store', 'offset', 'length', 'settings', 'type_def')
+
+    # a spilled Entity has no (in memory) graphic or children & is always top-level
+    graphic = None
+    children = ()
+    parent = None
+    dirty = False
+
+    def __init__(self, store, offset, length, settings, type_def):
+        # type: (SpillStore, int, int, dict, dict) -> Spilled
+        """
+        :param SpillStore store: Where the JSON is
+        :param int offset: Where the JSON starts in the store
+        :param int length: Size of the (utf-8 encoded) JSON
+        :param dict settings: The Entity's settings
+        :param dict type_def: The Entity's x, y, id, width & height
+        :rtype: Spilled
+        """
+        self.store = store
+        self.offset = offset
+        self.length = length
+        self.settings = settings
+        self.type_def = type_def
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Spilled {} @{}>'.format(self.type_def['id'], self.offset)
+
+    @property
+    def id(self):
+        # type: () -> int
+        return self.type_def['id']
+
+    @property
+    def coords(self):
+        # type: () -> dict
+        return {'x': self.type_def['x'], 'y': self.type_def['y']}
+
+    @coords.setter
+    def coords(self, coords={}):
+        # type: (dict) -> None
+        for c in ('x', 'y'):
+            if c in coords:
+                self.type_def[c] = int(coords[c])
+
+    @property
+    def size(self):
+        # type: () -> dict
+        return {'width': self.type_def['width'], 'height': self.type_def['height']}
+
+    def touch(self):
+        # type: () -> Spilled
+        # the position is put in as the JSON is read, so there's nothing to invalidate
+        return self
+
+    def is_type(self, ent_type):
+        # type: (str) -> bool
+        return ent_type.lower() in ('entity', self.settings['_type'].lower())
+
+    def to_json(self, text_style=None):
+        # type: (Any) -> str
+        """
+        .. note:: The JSON was made with the ``text_style`` in use when the Entity was spilled.
+
+        :rtype: str
+        """
+        return '{{"x": {}, "y": {}, '.format(json.dumps(self.type_def['x']), json.dumps(self.type_def['y'])) + \
+            self.store.read(self.offset, self.length)
+
+    def get_type_def(self, text_style=None):
+        # type: (Any) -> dict
+        """
+        :return: A new type def decoded from the spilled JSON; changing it doesn't change the Entity
+        :rtype: dict
+        """
+        return json.loads(self.to_json(text_style), object_pairs_hook=OrderedDict)
+
+
+class SpillStore(GliffyObject):
+    """
+    Temp file holding the JSON of the spilled top-level Entities; it's deleted when closed (or freed).
+
+    Only JSON is kept in it (nothing is pickled), & the file has no name other processes could open, so
+    the directory it's made in doesn't have to be trusted.
+    """
+
+    __slots__ = ('file', 'size', 'shared', 'table', 'text_style')
+
+    def __init__(self, directory=None):
+        # type: (str) -> SpillStore
+        """
+        :param str directory: Where to make the temp file (Default the system temp directory)
+        :rtype: SpillStore
+        """
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.size = 0
+        # whether the JSON was made with shared styles; None until something is spilled
+        self.shared = None
+        # the styles used by the spilled Entities, for the Stage's textStyles/shapeStyles tables
+        self.table = styles.StyleTable()
+        # the global TextStyle the JSON was made with; when styles are shared it's picked from the first
+        # spilled Entity, since it has to be known before anything is encoded
+        self.text_style = None
+
+    def put(self, ent, shared=False):
+        # type: (Entity, bool) -> Spilled
+        """
+        Sizes & encodes a numbered top-level Entity, writes its JSON to the file & hollows the Entity out.
+
+        :param Entity ent: The Entity to spill, with all of its children
+        :param bool shared: True if the Stage's styles are shared
+        :return: The handle to keep on the Stage instead of the Entity
+        :rtype: Spilled
+        :raises: :py:class:`ValueError`
+        """
+        if self.shared is not None and shared != self.shared:
+            raise ValueError('The styles can\'t be changed once Entities have been spilled.')
+        layout.update_sizes([ent])
+        self.shared = shared
+        if shared:
+            self.table.collect([ent])
+            if self.text_style is None:
+                self.text_style = self.table.text
+
+        td = ent.type_def
+        x, y = td['x'], td['y']
+        td['x'] = td['y'] = None
+        ent.touch()
+        data = ent.to_json(self.text_style)
+        if not data.startswith(_PREFIX):
+            raise ValueError('Only Entities whose type def starts with x & y can be spilled.')
+        data = data[len(_PREFIX):].encode('utf-8')
+        self.file.seek(0, 2)
+        self.file.write(data)
+        handle = Spilled(self, self.size, len(data), ent.settings, {
+            'x': x, 'y': y, 'id': td['id'], 'width': td['width'], 'height': td['height'],
+        })
+        self.size += len(data)
+        _hollow(ent, handle)
+
+        return handle
+
+    def read(self, offset, length):
+        # type: (int, int) -> str
+        """
+        :return: Spilled JSON
+        :rtype: str
+        """
+        self.file.seek(offset)
+
+        return self.file.read(length).decode('utf-8')
+
+    def close(self):
+        # type: () -> None
+        """
+        Deletes the temp file; the handles can't be read afterwards.
+        """
+        self.file.close()
+
+
+def _hollow(ent, handle):
+    # type: (Entity, Spilled) -> None
+    """
+    Strips a spilled Entity tree down to what the Entities still held by the caller need: each keeps its
+    id, settings & its position relative to the top-level Entity, with the handle as its parent, so
+    ``layout.absolute_bbox()`` still works once the handle is placed.
+    """
+    # (entity, x/y of its parent relative to the top-level Entity)
+    stack = [(ent, None, None)]
+    while stack:
+        e, px, py = stack.pop()
+        td = e.type_def
+        if px is None:
+            # the top-level Entity is where the handle is
+            x = y = 0
+        else:
+            x = (td['x'] or 0) + px
+            y = (td['y'] or 0) + py
+        stack.extend((c, x, y) for c in e.children)
+        e.type_def = {'x': x, 'y': y, 'id': td['id'], 'width': td['width'], 'height': td['height']}
+        e.parent = handle
+        e.children = []
+        if e.graphic is not None:
+            e.graphic.owner = None
+            e.graphic = None
+        e._fragment = None
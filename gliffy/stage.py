@@ -3,18 +3,29 @@ This is the 'stage' for Gliffy; the primary container for all objects.
 """
 
 # Standard Library
-import json
+import io
+import itertools
+import multiprocessing
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 # Third Party
 # Local
 from .base import GliffyObject
-from .entities import Entity, Group
-from . import graphics
+from .entities import Entity
+from .ids import IdAllocator
+from . import layout, force
+from .routing import Router
+from .spatial import SpatialIndex
+from .spill import SpillStore, Spilled
+from .fragments import Cached, numbered_from, strip_coords
+from . import styles
+from utils import util
 
 
 class Stage(GliffyObject):
 
-    __slots__ = ('children', 'type_def', 'settings')
+    __slots__ = ('children', 'type_def', 'settings', 'ids', 'links', 'lines', 'router', 'index', 'spill', 'fragments',
+                 'styles', '_pending', '_stale', '_text_style', '_counted')
 
     # json object definition
     def __init__(self):
@@ -23,8 +34,41 @@ class Stage(GliffyObject):
             'y': 0,
             'pad_x': 0,
             'pad_y': 0,
+            # how to position top-level Entities: 'shelf' (packed) or 'force' (linked Entities close together)
+            'layout': 'shelf',
+            # 'inline' puts the full CSS in every Text's html; 'shared' lists the styles once in the
+            # Stage's textStyles/shapeStyles tables & leaves it out of Text using the global text style
+            'styles': 'inline',
+            # number of processes write() encodes the changed top-level Entities with; 1 encodes in process
+            'workers': 1,
+            # 'sequential' numbers the top-level Entities one after the other; 'stable' numbers each from a
+            # block picked by its key, so adding/removing one doesn't renumber the rest (see set_ids())
+            'ids': 'sequential',
         }
         self.children = []
+        # (source, target) Entity pairs that are related, e.g. by a foreign key
+        self.links = []
+        # the Line Entities drawn for the links; lines[i] is drawn for links[i]
+        self.lines = []
+        self.router = Router()
+        # bounding boxes of the top-level Entities, updated by layout()
+        self.index = SpatialIndex()
+        # hands out the Entity ids/orders
+        self.ids = IdAllocator()
+        # where top-level Entities are spilled to when they're added; None keeps them in memory
+        self.spill = None
+        # the FragmentCache add_cached() looks top-level Entities up in; None always builds them
+        self.fragments = None
+        # the styles used by the top-level Entities when styles are shared, kept up to date by update_styles()
+        self.styles = styles.StyleTable()
+        # id(top-level Entity) -> the (Style, number of uses) pairs it added to styles
+        self._counted = {}
+        # (Entity, key, settings, id count, order count) of the add_cached() misses, saved by write()
+        self._pending = []
+        # flags that Entities have been added since the last layout
+        self._stale = False
+        # the global TextStyle the cached Entity JSON was made with; None when styles are inlined
+        self._text_style = None
         self.type_def = OrderedDict([
             ('contentType', 'application/gliffy+json'),
             ('version', '1.1'),
@@ -161,6 +205,15 @@ class Stage(GliffyObject):
         self.settings['pad_y'] = pad_y
         return self
 
+    @property
+    def stale(self):
+        # type: () -> bool
+        """
+        :return: True if Entities or links have been added/removed since the last ``layout()``
+        :rtype: bool
+        """
+        return self._stale
+
     @property
     def node_index(self):
         # type: () -> int
@@ -206,84 +259,613 @@ class Stage(GliffyObject):
         stg = self.type_def['stage']
         return {'width': stg['width'], 'height': stg['height']}
 
-    def add(self, children):
-        # type: (Any) -> Stage
+    def add(self, children, keys=None):
+        # type: (Any, list) -> Stage
         """
         Adds a single Entity or :py:class:`list` of Entities to the Stage
 
+        Ids/orders are only assigned to the newly added Entities & their descendants, so
+        add children to Entities/Groups *before* adding them to the Stage (or call ``renumber()``).
+
+        When spilling (see ``set_spill()``) each Entity is written out to the spill file & replaced
+        by a handle, so it can't be changed once it's added.
+
         :param Any children: Single Entity or :py:class:`list` of Entities
+        :param list keys: What each Entity is numbered by when ids are 'stable' (see ``set_ids()``); Entities
+                          without a key are numbered by their content
         :rtype: Stage
         """
+        added = []
         for c in list(children):
             if not isinstance(c, GliffyObject):
                 raise TypeError('Only GliffyObjects can be added to Stage.')
-            else:
-                self.children.append(c)
+            added.append(c)
 
-        self.test(self.children)
-        # self.reorder_children()
-        # self.update_coordinates()
-        # self.update_sizes()
+        self.node_index = self.ids.assign(added, keys)
+        if self.spill is not None:
+            shared = self.settings['styles'] == 'shared'
+            added = [self.spill.put(c, shared) for c in added]
+        self._append(added)
 
         return self
 
-    def test(self, children, eid=0, order=0):
-        # type: (list[Entity], int, int) -> tuple
-        print('\n\n------------------- START --------------------------')
-        print('\n-- eid = ', eid)
-        print('\n-- order = ', order)
-        print('\n', children)
-
-        for c in children:
-            # type: Entity
-
-            # if it's a graphic, set eid = nodeIndex
-            #   nodeIndex += 2
-            if isinstance(c, Group):
-                # groups can have an order AFTER their children are ordered
-                print('\n- is Group')
-                if c.children:
-                    print('\n+++++++++++++++++++++++++ STARTING GROUP KIDS +++++++++++++++++++++++++')
-                    eid, order = self.test(c.children, eid, order)
-                    print('\n+++++++++++++++++++++++++ DONE WITH GROUP KIDS +++++++++++++++++++++++++')
-                print('\n~~~~~ setting Group id to ', eid, ', order to ', order)
-                c.id = eid
-                eid += 1
-                c.order = order
-                order += 1
-            else:
-                print('\n- is Entity ', c.graphic.get_type_def()['type'])
-                c.id = eid
-                c.order = 'auto' if c.graphic and isinstance(c.graphic, graphics.Text) else order
-                print('\n~~~~~ setting Entity id to ', c.id, ', order to ', c.order)
-                eid += 2
-                order += 2
-                c.size = {'width': 100, 'height': 100}
-
-        print('\n-- final eid: ', eid)
-        print('\n-- final order: ', order)
-        print('\n-------------------- FINISH -------------------------\n')
-        return eid, order
-        self.node_index = eid
-
-    def reorder_children(self):
-        pass
+    def add_cached(self, key, build):
+        # type: (Any, Callable) -> tuple
+        """
+        Adds a top-level Entity, using its JSON from the fragment cache (see ``set_fragment_cache()``) if
+        it's there, instead of building it.
+
+        On a hit a ``Cached`` placeholder is added; it can't be changed & its children are ``Part`` stubs.
+        On a miss ``build()`` is called & the Entity is added as usual, & its JSON is saved to the cache by
+        the next ``write()``; it mustn't be changed before then. Without a fragment cache (or when spilling)
+        the Entity is always built.
+
+        :param Any key: Identifies what ``build()`` makes (e.g. a table's name, columns & styles); its repr
+                        has to be the same from run to run
+        :param Callable build: Makes the Entity, with all of its children
+        :return: The Entity (or placeholder) & a list of its direct children (or their stubs)
+        :rtype: tuple
+        """
+        cache = self.fragments
+        if cache is None or self.spill is not None:
+            ent = build()
+            children = list(ent.children)
+            self.add([ent], [key])
+            return ent, children
+
+        ids = self.ids
+        first_id, first_order = ids.start(key)
+        # the JSON depends on the styles mode; the ids are shifted on a hit & the x/y aren't in it
+        cache_key = (key, self.settings['styles'])
+        entry = cache.get(cache_key)
+        if entry is None:
+            ent = build()
+            end_id, end_order = ids.number(ent, first_id, first_order)
+            self.node_index = ids.next_id
+            self._append([ent])
+            self._pending.append((ent, cache_key, dict(ent.settings), end_id - first_id, end_order - first_order))
+            return ent, list(ent.children)
+
+        handle = Cached(cache, cache_key, entry, build, first_id, first_order)
+        ids.next_id = max(ids.next_id, first_id + entry['ids'])
+        ids.next_order = max(ids.next_order, first_order + entry['orders'])
+        self.node_index = ids.next_id
+        self._append([handle])
+
+        return handle, handle.parts
+
+    def _append(self, added):
+        # type: (list) -> None
+        for c in added:
+            self.children.append(c)
+            # the Lines always come after the other Entities
+            self.type_def['stage']['objects'].insert(len(self.children) - 1, c.type_def)
+        self._stale = True
+
+    def remove(self, children):
+        # type: (Any) -> Stage
+        """
+        Removes a single top-level Entity or :py:class:`list` of them from the Stage, along with the
+        links (& Lines) to or from them or their descendants.
+
+        :param Any children: Single Entity or :py:class:`list` of Entities
+        :rtype: Stage
+        """
+        if isinstance(children, GliffyObject):
+            children = [children]
+        # a spilled Entity is on the Stage as its handle
+        gone = {id(c.parent if isinstance(c.parent, Spilled) else c) for c in children}
+        # every Entity in the removed subtrees, for dropping their links
+        removed = set()
+        stack = [c for c in self.children if id(c) in gone]
+        while stack:
+            ent = stack.pop()
+            removed.add(id(ent))
+            self.index.remove(ent)
+            stack.extend(ent.children)
+        if not removed:
+            return self
+
+        self.ids.release(c.id for c in self.children if id(c) in gone)
+        for key in gone:
+            pairs = self._counted.pop(key, None)
+            if pairs is not None:
+                self.styles.subtract(pairs)
+        self.children = [c for c in self.children if id(c) not in gone]
+        keep = [i for i, (source, target) in enumerate(self.links)
+                if id(source) not in removed and id(target) not in removed and
+                id(source.parent) not in removed and id(target.parent) not in removed]
+        kept = set(keep)
+        self.ids.release(line.id for i, line in enumerate(self.lines) if i not in kept)
+        self.links = [self.links[i] for i in keep]
+        self.lines = [self.lines[i] for i in keep if i < len(self.lines)]
+        self.type_def['stage']['objects'] = [c.type_def for c in itertools.chain(self.children, self.lines)]
+        self._stale = True
+
+        return self
+
+    def link(self, source, target):
+        # type: (Entity, Entity) -> Stage
+        """
+        Records that two Entities are related (e.g. a foreign key column & the column it references).
+
+        :param Entity source: The Entity the link starts at
+        :param Entity target: The Entity the link ends at
+        :rtype: Stage
+        """
+        self.links.append((source, target))
+        self._stale = True
+
+        return self
+
+    def renumber(self):
+        # type: () -> Stage
+        """
+        Re-assigns the ids/orders of every Entity on the Stage, starting from 0, then of the Lines, so
+        they stay below the ``nodeIndex``. The Lines are attached to their ends' new ids by the next ``layout()``.
+
+        :rtype: Stage
+        :raises: :py:class:`ValueError` if Entities have been spilled or come from the fragment cache, since
+                 their ids are already written out
+        """
+        if any(isinstance(c, Spilled) for c in self.children):
+            raise ValueError('Spilled or cached Entities can\'t be renumbered.')
+        # 'stable' ids are numbered by the same keys again
+        keys = [self.ids.key(c.id) for c in self.children]
+        self.ids.reset()
+        self.ids.assign(self.children, keys)
+        keys = [('line', source.id, target.id) for source, target in self.links[:len(self.lines)]]
+        self.node_index = self.ids.assign(self.lines, keys)
+        self._stale = True
+
+        return self
+
+    def set_spill(self, directory=None):
+        # type: (str) -> Stage
+        """
+        Spills each top-level Entity out of memory as it's added; see :py:mod:`gliffy.spill`.
+
+        :param str directory: Where to make the spill file (Default the system temp directory)
+        :rtype: Stage
+        :raises: :py:class:`ValueError` if Entities have already been added
+        """
+        if self.children:
+            raise ValueError('Spilling has to be turned on before Entities are added to the Stage.')
+        if self.spill is not None:
+            self.spill.close()
+        self.spill = SpillStore(directory)
+
+        return self
+
+    def set_layout(self, mode='shelf'):
+        # type: (str) -> Stage
+        """
+        Sets how the top-level Entities are positioned; see ``update_coordinates()``.
+
+        :param str mode: 'shelf' (Default) or 'force'
+        :rtype: Stage
+        :raises: :py:class:`ValueError`
+        """
+        mode = mode.lower()
+        if mode not in ('shelf', 'force'):
+            raise ValueError('Unknown Stage layout `{}`; use \'shelf\' or \'force\'.'.format(mode))
+        self.settings['layout'] = mode
+
+        return self
+
+    def set_styles(self, mode='inline'):
+        # type: (str) -> Stage
+        """
+        Sets how Text & Shape styles are written out; see ``update_styles()``.
+
+        :param str mode: 'inline' (Default) or 'shared'
+        :rtype: Stage
+        :raises: :py:class:`ValueError`
+        """
+        mode = mode.lower()
+        if mode not in ('inline', 'shared'):
+            raise ValueError('Unknown Stage styles `{}`; use \'inline\' or \'shared\'.'.format(mode))
+        self.settings['styles'] = mode
+
+        return self
+
+    def set_ids(self, mode='sequential'):
+        # type: (str) -> Stage
+        """
+        Sets how ids/orders are handed out; see :py:class:`gliffy.ids.IdAllocator`.
+
+        :param str mode: 'sequential' (Default) or 'stable'
+        :rtype: Stage
+        :raises: :py:class:`ValueError` if Entities have already been added
+        """
+        mode = mode.lower()
+        if mode not in ('sequential', 'stable'):
+            raise ValueError('Unknown Stage ids `{}`; use \'sequential\' or \'stable\'.'.format(mode))
+        if self.children:
+            raise ValueError('The ids have to be set before Entities are added to the Stage.')
+        self.settings['ids'] = mode
+        self.ids = IdAllocator(self.ids.debug, mode == 'stable')
+
+        return self
+
+    def set_fragment_cache(self, cache):
+        # type: (FragmentCache) -> Stage
+        """
+        Sets where ``add_cached()`` looks top-level Entities up; see :py:mod:`gliffy.fragments`.
+
+        :param FragmentCache cache: The cache; None turns caching off
+        :rtype: Stage
+        """
+        self.fragments = cache
+
+        return self
 
     def update_coordinates(self):
-        pass
+        # type: () -> Stage
+        """
+        Positions the top-level 'auto' positioned Entities on the Stage, starting at the Stage's x/y coords,
+        & sets the Stage's width/height to fit.
+
+        The 'shelf' layout packs them tightly, keeping Entities placed by the last layout where they are
+        (see ``repack()``); the 'force' layout (requires NumPy) puts linked Entities close together.
+
+        :rtype: Stage
+        :raises: :py:class:`ValueError`
+        """
+        mode = self.settings['layout']
+        if mode == 'shelf':
+            layout.update_coordinates(self)
+        elif mode == 'force':
+            force.update_coordinates(self)
+        else:
+            raise ValueError('Unknown Stage layout `{}`; use \'shelf\' or \'force\'.'.format(mode))
+
+        return self
 
     def update_sizes(self):
-        pass
+        # type: () -> Stage
+        """
+        Sizes every 'auto' sized Entity & positions 'auto' positioned children inside their parents.
+
+        :rtype: Stage
+        """
+        layout.update_sizes(self.children)
+
+        return self
+
+    def update_index(self):
+        # type: () -> Stage
+        """
+        Brings the spatial index of the top-level Entities' bounding boxes up to date.
+
+        :rtype: Stage
+        """
+        for c in self.children:
+            self.index.update(c, layout.absolute_bbox(c))
+
+        return self
+
+    def query(self, box):
+        # type: (tuple) -> set
+        """
+        Finds the top-level Entities that intersect a rectangle.
+
+        :param tuple box: The (left, top, right, bottom) box to check
+        :return: The Entities whose bounding boxes intersect the box
+        :rtype: set
+        """
+        if self._stale:
+            self.layout()
+
+        return self.index.query(box)
+
+    def overlaps(self):
+        # type: () -> list
+        """
+        Finds the top-level Entities that overlap each other.
+
+        :return: (Entity, Entity) pairs of overlapping Entities
+        :rtype: list
+        """
+        if self._stale:
+            self.layout()
+
+        return self.index.overlaps()
+
+    def update_lines(self):
+        # type: () -> Stage
+        """
+        Draws an orthogonal Line for each link, routed around the top-level Entities.
+
+        Routes are cached, so only Lines whose ends moved or whose route is blocked by a change
+        are re-routed.
+
+        :rtype: Stage
+        """
+        if not self.links:
+            return self
+
+        self.update_index()
+        self.router.update(self.index.boxes.values(), self.width, self.height)
+        new = []
+        keys = []
+        for i, (source, target) in enumerate(self.links):
+            if i < len(self.lines):
+                line = self.lines[i]
+            else:
+                line = Entity(graphic_type='line')
+                self.lines.append(line)
+                self.type_def['stage']['objects'].append(line.type_def)
+                new.append(line)
+                keys.append(('line', source.id, target.id))
+            s_box = layout.absolute_bbox(source)
+            t_box = layout.absolute_bbox(target)
+            points = self.router.route(s_box, t_box)
+            sides = (int(points[0][0] >= s_box[2]), int(points[-1][0] >= t_box[2]))
+            line.connect(source, target, points, sides)
+        if new:
+            self.node_index = self.ids.assign(new, keys)
+
+        return self
+
+    def layout(self):
+        # type: () -> Stage
+        """
+        Sizes & positions all 'auto' Entities.
+
+        This is done automatically before the JSON is generated if Entities have been added since
+        the last layout, so it only needs to be called manually after changing existing Entities.
+
+        :rtype: Stage
+        """
+        self.update_sizes()
+        self.update_coordinates()
+        self.update_index()
+        self.update_lines()
+        self._stale = False
+
+        return self
+
+    def repack(self):
+        # type: () -> Stage
+        """
+        Lays out every 'auto' Entity again from scratch, e.g. to close the gaps left by removed Entities
+        or after changing the Stage's start coords/padding; ``layout()`` only places new or resized ones.
+
+        :rtype: Stage
+        """
+        # layout() keeps the Entities whose boxes are still in the index
+        self.index.clear()
+
+        return self.layout()
+
+    def update_styles(self):
+        # type: () -> Stage
+        """
+        Fills in the Stage's textStyles/shapeStyles tables from the styles in use, if styles are shared.
+
+        The style counts are kept between calls: only top-level Entities that are new or have been changed
+        (see ``Entity.touch()``) since the last call are counted again; ``remove()`` takes back the counts of
+        the Entities it removes.
+
+        Cached Entity JSON that depends on which style is the global text style is cleared when that changes.
+
+        :rtype: Stage
+        :raises: :py:class:`ValueError`
+        """
+        mode = self.settings['styles']
+        stg = self.type_def['stage']
+        spill = self.spill
+        if spill is not None and spill.shared is not None and spill.shared != (mode == 'shared'):
+            raise ValueError('The styles can\'t be changed once Entities have been spilled.')
+        if mode == 'shared':
+            if spill is None:
+                table = self._count_styles()
+                text_style = table.text
+            else:
+                # the spilled JSON was made with the global style picked when spilling started
+                table = spill.table
+                text_style = spill.text_style
+            stg['textStyles'] = {'global': text_style.text_style()} if text_style is not None else {}
+            stg['shapeStyles'] = table.shape_styles()
+        elif mode == 'inline':
+            text_style = None
+            stg['textStyles'] = {}
+            stg['shapeStyles'] = {}
+        else:
+            raise ValueError('Unknown Stage styles `{}`; use \'inline\' or \'shared\'.'.format(mode))
+
+        if text_style is not self._text_style:
+            changed = {self._text_style, text_style} - {None}
+            stack = list(self.children)
+            while stack:
+                ent = stack.pop()
+                if getattr(ent.graphic, 'style', None) in changed:
+                    ent.touch()
+                stack.extend(ent.children)
+            self._text_style = text_style
+
+        return self
+
+    def _count_styles(self):
+        # type: () -> styles.StyleTable
+        """
+        Counts the styles of the top-level Entities that haven't been counted since they were added or last changed.
+
+        :rtype: styles.StyleTable
+        """
+        table = self.styles
+        counted = self._counted
+        for c in self.children:
+            key = id(c)
+            if key in counted:
+                if not c.dirty:
+                    continue
+                table.subtract(counted[key])
+            pairs = styles.StyleTable().collect([c]).style_counts()
+            counted[key] = pairs
+            table.add(pairs)
+
+        return table
 
     def get_type_def(self):
         # type: () -> dict
-        # reset objects so we don't add copies
-        self.type_def['stage']['objects'] = []
-        for c in self.children:
-            self.type_def['stage']['objects'].append(c.get_type_def())
+        """
+        .. note:: ``objects`` is kept in sync as Entities are added; see ``Entity.get_type_def()``.
+                  ``write()``/``to_json()`` don't need this. When Entities have been spilled, a copy of
+                  the type def is returned with the spilled Entities read back in, which undoes the savings.
+                  The same goes for Entities from the fragment cache.
+
+        :rtype: dict
+        """
+        self.update_styles()
+        if any(isinstance(c, Spilled) for c in self.children):
+            type_def = OrderedDict(self.type_def)
+            type_def['stage'] = OrderedDict(self.type_def['stage'])
+            type_def['stage']['objects'] = [c.get_type_def(self._text_style)
+                                            for c in itertools.chain(self.children, self.lines)]
+            return type_def
+
+        for c in itertools.chain(self.children, self.lines):
+            c.get_type_def(self._text_style)
 
         return self.type_def
 
     def to_json(self):
         # type: () -> str
-        return json.dumps(self.get_type_def())
+        """
+        Entities that haven't changed since the last call reuse their cached JSON.
+
+        :rtype: str
+        """
+        buf = io.StringIO()
+        self.write(buf)
+
+        return buf.getvalue()
+
+    def write(self, fp):
+        # type: (Any) -> Stage
+        """
+        Writes the Stage's JSON to a file-like object one Entity at a time.
+
+        Only a single top-level Entity's JSON is held in memory at once, instead of the
+        whole diagram. The output is byte-identical to ``json.dumps(get_type_def())``.
+
+        :param Any fp: A writable file-like object (anything with a ``write(str)`` method)
+        :rtype: Stage
+        """
+        if self._stale:
+            self.layout()
+        self.update_styles()
+        text_style = self._text_style
+        if self.settings['workers'] > 1:
+            self.encode_parallel(self.settings['workers'])
+        head, tail = util.json_split(self.type_def, 'stage')
+        stg_head, stg_tail = util.json_split(self.type_def['stage'], 'objects')
+
+        fp.write(head)
+        fp.write(stg_head)
+        fp.write('[')
+        for i, c in enumerate(itertools.chain(self.children, self.lines)):
+            if i:
+                fp.write(', ')
+            fp.write(c.to_json(text_style))
+        fp.write(']')
+        fp.write(stg_tail)
+        fp.write(tail)
+        if self._pending:
+            self.save_fragments()
+
+        return self
+
+    def save_fragments(self):
+        # type: () -> Stage
+        """
+        Saves the JSON of the Entities added by ``add_cached()`` misses to the fragment cache; ``write()``
+        does this, so it only needs to be called to fill the cache without writing the JSON.
+
+        :rtype: Stage
+        """
+        if self._stale:
+            self.layout()
+        self.update_styles()
+        text_style = self._text_style
+        on_stage = {id(c) for c in self.children}
+        for ent, key, settings, n_ids, n_orders in self._pending:
+            # it may have been removed since
+            if id(ent) not in on_stage:
+                continue
+            td = ent.type_def
+            first_id, first_order = numbered_from(ent)
+            self.fragments.put(key, {
+                'settings': settings,
+                'first_id': first_id,
+                'first_order': first_order,
+                'id': td['id'],
+                'width': td['width'],
+                'height': td['height'],
+                'ids': n_ids,
+                'orders': n_orders,
+                'parts': [(c.id, c.type_def['x'], c.type_def['y'], c.type_def['width'], c.type_def['height'])
+                          for c in ent.children],
+                'styles': styles.StyleTable().collect([ent]).style_counts(),
+                'json': {text_style: strip_coords(ent.to_json(text_style), td['x'], td['y'])},
+            })
+        self._pending = []
+        self.fragments.evict()
+
+        return self
+
+    def encode_parallel(self, workers):
+        # type: (int) -> Stage
+        """
+        Encodes the changed top-level Entities in worker processes & caches their JSON, so the
+        next ``write()`` only has to join it. The JSON is the same as encoding in process.
+
+        The workers are forked, so they inherit the Entities instead of having them pickled (pickling
+        an Entity costs more than encoding it); each one is sent a range of indexes & sends back JSON.
+        Nothing is done where processes can't be forked, or when there are too few changed Entities
+        to make up for starting the workers.
+
+        :param int workers: Number of worker processes
+        :rtype: Stage
+        """
+        dirty = [c for c in self.children if c.dirty]
+        if workers < 2 or len(dirty) < PARALLEL_MIN or 'fork' not in multiprocessing.get_all_start_methods():
+            return self
+
+        self.update_styles()
+        # a few chunks per worker evens out Entities of different sizes
+        size = -(-len(dirty) // (workers * 4))
+        ranges = [(i, min(i + size, len(dirty))) for i in range(0, len(dirty), size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_worker, initargs=(dirty, self._text_style)) as pool:
+            for (start, stop), fragments in zip(ranges, pool.map(_encode_range, *zip(*ranges))):
+                for ent, fragment in zip(dirty[start:stop], fragments):
+                    ent.set_json(fragment)
+
+        return self
+
+
+# fewest changed top-level Entities worth starting worker processes for (see Stage.encode_parallel())
+PARALLEL_MIN = 256
+
+# the (Entities, global TextStyle) a forked worker encodes; set by _init_worker()
+_worker_state = None
+
+
+def _init_worker(entities, text_style):
+    # type: (list, Any) -> None
+    global _worker_state
+    _worker_state = (entities, text_style)
+
+
+def _encode_range(start, stop):
+    # type: (int, int) -> list
+    """
+    :return: The JSON of the worker's Entities[start:stop]
+    :rtype: list
+    """
+    entities, text_style = _worker_state
+
+    return [e.to_json(text_style) for e in entities[start:stop]]
@@ -0,0 +1,252 @@
+"""
+Writes a diagram's JSON while it is still being drawn, for diagrams too big to hold in memory.
+
+Each top-level Entity is sized, placed, numbered, written & released as soon as it's made, so
+memory use depends on the biggest Entity rather than on the size of the diagram. Only a small
+``Handle`` (id & bounding box) is kept for the Entities that Lines will be drawn to.
+
+Example::
+
+    g = Gliffy()
+    writer = StreamWriter(g.stage, f)
+    for table in adapter.iter_tables():
+        ent = g.table(table.name, [c.name for c in table.columns])
+        handles = writer.write(ent, keep=ent.children)
+        ...
+    writer.link(source_handle, target_handle)
+    writer.close()
+
+The Entities are placed on shelves in the order they arrive, since they can't be sorted by height
+without holding them all, so the layout is looser than ``Stage.layout()``'s. Each Line is routed
+in just the part of the diagram around its ends, so drawing the Lines doesn't need a routing grid
+the size of the whole diagram either.
+"""
+
+# Standard Library
+import bisect
+from array import array
+# Third Party
+# Local
+from .base import GliffyObject
+from .entities import Entity
+from .routing import Router
+from . import layout, styles
+from utils import util
+
+# space (px) around a Line's ends that its route can go through
+ROUTE_MARGIN = 100
+
+
+class Handle(GliffyObject):
+    """
+    What's kept of a written Entity that Lines can still be drawn to.
+    """
+
+    __slots__ = ('id', 'bbox')
+
+    def __init__(self, id, bbox):
+        # type: (int, tuple) -> Handle
+        """
+        :param int id: The Entity's id
+        :param tuple bbox: The Entity's absolute (left, top, right, bottom) bounding box
+        :rtype: Handle
+        """
+        self.id = id
+        self.bbox = bbox
+
+    def __repr__(self):
+        # type: () -> str
+        return '<Handle {} {}>'.format(self.id, self.bbox)
+
+
+class StreamWriter(GliffyObject):
+    """
+    Writes a Stage's JSON to a file-like object one top-level Entity at a time.
+
+    The Stage only provides the settings (start coords, padding, styles), ids & type def; Entities
+    are never added to it. Call ``close()`` once every Entity has been written, to draw the Lines &
+    finish the JSON.
+    """
+
+    __slots__ = ('stage', 'fp', 'packer', 'table', 'text_style', 'boxes', 'shelves', 'starts', 'links', 'count',
+                 'closed')
+
+    def __init__(self, stage, fp, width=None):
+        # type: (Stage, Any, int) -> StreamWriter
+        """
+        :param Stage stage: An empty Stage with the settings to use; only the 'shelf' layout can be streamed
+        :param Any fp: A writable file-like object (anything with a ``write(str)`` method)
+        :param int width: Width of the shelves the Entities are placed on (Default the Stage's maxWidth)
+        :rtype: StreamWriter
+        :raises: :py:class:`ValueError`
+        """
+        if stage.children:
+            raise ValueError('Only an empty Stage can be streamed.')
+        if stage.settings['layout'] != 'shelf':
+            raise ValueError('Only the \'shelf\' layout can be streamed.')
+        if stage.settings['styles'] not in ('inline', 'shared'):
+            raise ValueError('Unknown Stage styles `{}`; use \'inline\' or \'shared\'.'.format(stage.settings['styles']))
+
+        self.stage = stage
+        self.fp = fp
+        width = width or stage.type_def['stage']['maxWidth']
+        self.packer = layout.ShelfPacker(stage.x, stage.y, width, stage.pad_x, stage.pad_y)
+        # the styles used so far, when styles are shared
+        self.table = styles.StyleTable() if stage.settings['styles'] == 'shared' else None
+        # the global TextStyle; picked from the first Entity, since it has to be known before anything is written
+        self.text_style = None
+        # bounding boxes of the written Entities, for routing the Lines around them; 4 values per box, since
+        # a box is kept for every Entity (routes are on a grid, so whole pixels are close enough)
+        self.boxes = array('l')
+        # top of each shelf & the index in ``boxes`` of its first Entity, for finding the boxes near a Line
+        self.shelves = []
+        self.starts = []
+        # (source Handle, target Handle) pairs to draw Lines between
+        self.links = []
+        self.count = 0
+        self.closed = False
+
+        head = util.json_split(stage.type_def, 'stage')[0]
+        stg_head = util.json_split(stage.type_def['stage'], 'objects')[0]
+        fp.write(head)
+        fp.write(stg_head)
+        fp.write('[')
+
+    def write(self, ent, keep=()):
+        # type: (Entity, Iterable[Entity]) -> list
+        """
+        Sizes, places & numbers a top-level Entity, writes its JSON & releases it.
+
+        The Entity must not be changed (or written again) afterwards.
+
+        :param Entity ent: The Entity to write, with all of its children
+        :param Iterable[Entity] keep: Descendants (or the Entity itself) that Lines may be drawn to
+        :return: A Handle for each of the ``keep`` Entities
+        :rtype: list
+        :raises: :py:class:`ValueError` if the writer is closed
+        """
+        if self.closed:
+            raise ValueError('The StreamWriter is closed.')
+
+        layout.update_sizes([ent])
+        ent.coords = self.packer.place(ent.type_def['width'] or 0, ent.type_def['height'] or 0)
+        self.stage.node_index = self.stage.ids.assign([ent])
+        if self.table is not None:
+            self.table.collect([ent])
+            if self.text_style is None:
+                self.text_style = self.table.text
+
+        if self.count:
+            self.fp.write(', ')
+        self.fp.write(ent.to_json(self.text_style))
+        self.count += 1
+        box = [int(v) for v in layout.absolute_bbox(ent)]
+        if not self.shelves or box[1] > self.shelves[-1]:
+            self.shelves.append(box[1])
+            self.starts.append(len(self.boxes) // 4)
+        self.boxes.extend(box)
+        handles = [Handle(k.id, layout.absolute_bbox(k)) for k in keep]
+        release(ent)
+
+        return handles
+
+    def link(self, source, target):
+        # type: (Handle, Handle) -> StreamWriter
+        """
+        Records that two written Entities are related; the Lines are drawn by ``close()``.
+
+        :param Handle source: The Entity the link starts at
+        :param Handle target: The Entity the link ends at
+        :rtype: StreamWriter
+        """
+        self.links.append((source, target))
+
+        return self
+
+    def close(self):
+        # type: () -> StreamWriter
+        """
+        Draws & writes a Line for each link, then the rest of the Stage's JSON.
+
+        :rtype: StreamWriter
+        """
+        if self.closed:
+            return self
+
+        stage = self.stage
+        stg = stage.type_def['stage']
+        # the packer starts at the Stage's x & y, even if nothing was written
+        stage.width = (self.packer.right if self.count else 0) + stage.pad_x
+        stage.height = (self.packer.bottom if self.count else 0) + stage.pad_y
+        stg['maxWidth'] = max(stg['maxWidth'], stage.width)
+        stg['maxHeight'] = max(stg['maxHeight'], stage.height)
+
+        if self.links:
+            router = Router()
+            for source, target in self.links:
+                left = max(min(source.bbox[0], target.bbox[0]) - ROUTE_MARGIN, 0)
+                top = max(min(source.bbox[1], target.bbox[1]) - ROUTE_MARGIN, 0)
+                right = max(source.bbox[2], target.bbox[2]) + ROUTE_MARGIN
+                bottom = max(source.bbox[3], target.bbox[3]) + ROUTE_MARGIN
+                router.update(self._near((left, top, right, bottom)), right - left, bottom - top, left, top)
+                points = router.route(source.bbox, target.bbox)
+                # each route is only used once
+                router.cache.clear()
+                line = Entity(graphic_type='line')
+                sides = (int(points[0][0] >= source.bbox[2]), int(points[-1][0] >= target.bbox[2]))
+                line.connect(source, target, points, sides)
+                stage.node_index = stage.ids.assign([line], [('line', source.id, target.id)])
+                if self.count:
+                    self.fp.write(', ')
+                self.fp.write(line.to_json())
+                self.count += 1
+            self.links = []
+        self.boxes = array('l')
+        self.shelves = []
+        self.starts = []
+
+        if self.table is not None:
+            stg['textStyles'] = {'global': self.text_style.text_style()} if self.text_style is not None else {}
+            stg['shapeStyles'] = self.table.shape_styles()
+        self.fp.write(']')
+        self.fp.write(util.json_split(stg, 'objects')[1])
+        self.fp.write(util.json_split(stage.type_def, 'stage')[1])
+        self.closed = True
+
+        return self
+
+    def _near(self, area):
+        # type: (tuple) -> list
+        """
+        The Entities are placed a shelf at a time, top to bottom, so only the shelves that start inside
+        the area (& the one it starts on) are looked at.
+
+        :param tuple area: A (left, top, right, bottom) box
+        :return: The bounding boxes of the written Entities that intersect the area
+        :rtype: list
+        """
+        first = self.starts[max(bisect.bisect_right(self.shelves, area[1]) - 1, 0)]
+        last = bisect.bisect_left(self.shelves, area[3])
+        last = self.starts[last] if last < len(self.starts) else len(self.boxes) // 4
+        boxes = self.boxes[first * 4:last * 4]
+        boxes = zip(boxes[0::4], boxes[1::4], boxes[2::4], boxes[3::4])
+
+        return [b for b in boxes if b[0] < area[2] and area[0] < b[2] and b[1] < area[3] and area[1] < b[3]]
+
+
+def release(ent):
+    # type: (Entity) -> None
+    """
+    Breaks the parent/owner reference cycles in a finished Entity tree, so it's freed as soon as
+    it's no longer used instead of waiting for the garbage collector.
+
+    :param Entity ent: The root of the tree
+    """
+    stack = [ent]
+    while stack:
+        e = stack.pop()
+        e.parent = None
+        e._fragment = None
+        if e.graphic is not None:
+            e.graphic.owner = None
+        stack.extend(e.children)
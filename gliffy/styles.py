@@ -0,0 +1,408 @@
+"""
+Shared, immutable style objects for Graphics.
+
+Thousands of cells in a schema diagram share the exact same look, so instead of every Graphic
+carrying its own copy of its properties, each one points at an interned Style. There is only
+ever one Style object per distinct set of values, so they can be compared with ``is`` and
+anything derived from them (e.g. html/JSON) only has to be worked out once.
+"""
+
+# Standard Library
+import json
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from weakref import WeakValueDictionary
+# Third Party
+# Local
+from .base import GliffyObject
+from utils import util
+
+
+# max number of inputs -> Style results each Graphic class remembers (see ``StyleCache``)
+CACHE_SIZE = 4096
+
+
+def freeze(values):
+    # type: (dict) -> tuple
+    """
+    :param dict values: Flat dict of hashable values
+    :return: A hashable, order-independent version of the dict; the values' types are included, since
+             e.g. True, 1 & 1.0 are equal but aren't written the same way
+    :rtype: tuple
+    :raises: :py:class:`TypeError` if a value isn't hashable
+    """
+    key = tuple(sorted((k, type(v), v) for k, v in values.items()))
+    hash(key)
+
+    return key
+
+
+class StyleCache(OrderedDict):
+    """
+    Map of Graphic inputs (e.g. a Style & the frozen properties applied to it) -> the resulting Style,
+    so each distinct input is only validated & merged once.
+
+    Only the ``max_size`` most recently used entries are kept, so diagrams with many one-off styles
+    don't grow it (& the Styles it holds on to) without limit.
+    """
+
+    __slots__ = ('max_size',)
+
+    def __init__(self, max_size=CACHE_SIZE):
+        # type: (int) -> StyleCache
+        """
+        :param int max_size: Max number of entries
+        :rtype: StyleCache
+        """
+        super().__init__()
+        self.max_size = max_size
+
+    def get(self, key, default=None):
+        # type: (Any, Any) -> Any
+        style = super().get(key, default)
+        if style is not default:
+            self.move_to_end(key)
+
+        return style
+
+    def __setitem__(self, key, value):
+        # type: (Any, Any) -> None
+        super().__setitem__(key, value)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class Style(GliffyObject):
+    """
+    Immutable set of Graphic property values; use ``get()`` rather than creating them directly.
+    """
+
+    # weakly referenced from _interned
+    __slots__ = ('values', 'key', '__weakref__')
+
+    # (frozen values) -> Style; each subclass has its own. Styles nothing uses any more drop out,
+    # so one-off styles don't pile up over a long run
+    _interned = WeakValueDictionary()
+
+    def __init__(self, values, key):
+        # type: (dict, tuple) -> Style
+        """
+        :param dict values: The property values
+        :param tuple key: The frozen values
+        :rtype: Style
+        """
+        self.values = MappingProxyType(dict(values))
+        self.key = key
+
+    def __getitem__(self, item):
+        # type: (str) -> Any
+        return self.values[item]
+
+    def __repr__(self):
+        # type: () -> str
+        return '<{} {}>'.format(type(self).__name__, dict(self.values))
+
+    def __reduce__(self):
+        # type: () -> tuple
+        # unpickled (e.g. in a worker process) through get(), so the copies are interned as well
+        return type(self).get, (dict(self.values),)
+
+    @classmethod
+    def get(cls, values):
+        # type: (dict) -> Style
+        """
+        :param dict values: The (already validated) property values
+        :return: The one Style object for these values
+        :rtype: Style
+        """
+        key = freeze(values)
+        style = cls._interned.get(key)
+        if style is None:
+            style = cls._interned[key] = cls(values, key)
+
+        return style
+
+    def to_dict(self):
+        # type: () -> dict
+        """
+        :return: A modifiable copy of the Style's values
+        :rtype: dict
+        """
+        return dict(self.values)
+
+
+class TextStyle(Style):
+    """
+    The CSS of a Text Graphic, along with the html & JSON that wrap the text itself.
+    """
+
+    __slots__ = ('html_head', 'html_tail', 'plain_html_head', 'json_head', 'json_tail', 'plain_json_head')
+
+    _interned = WeakValueDictionary()
+
+    def __init__(self, values, key):
+        # type: (dict, tuple) -> TextStyle
+        super().__init__(values, key)
+        css = self.values
+        p_css = 'text-align: {};'.format(css['text-align'])
+        css_props = ['font-size: {};', 'font-family: {};', 'white-space: pre-wrap;',
+                     'text-decoration: {};', 'line-height: {};', 'color: {};']
+        if css['bold']:
+            css_props.append('font-weight: bold;')
+        if css['italic']:
+            css_props.append('font-style: italic;')
+        text_dec = 'underline' if css['underline'] else 'none'
+        span_css = ' '.join(css_props).format(css['font-size'], css['font-family'], text_dec,
+                                              css['font-size'], css['color'])
+
+        self.html_head = '<p style=\'{}\'><span style=\'{}\'>'.format(p_css, span_css)
+        self.html_tail = '</span></p>'
+        # used when the style is the Stage's global text style, which supplies the font & color
+        self.plain_html_head = '<p style=\'{}\'><span>'.format(p_css)
+
+        # JSON escaping works char by char, so the text can be encoded on its own & dropped in between
+        type_def = text_type_def('')
+        head, tail = util.json_split(type_def, 'Text')
+        t_head, t_tail = util.json_split(type_def['Text'], 'html')
+        self.json_head = head + t_head + json.dumps(self.html_head)[:-1]
+        self.json_tail = json.dumps(self.html_tail)[1:] + t_tail + tail
+        self.plain_json_head = head + t_head + json.dumps(self.plain_html_head)[:-1]
+
+    def html(self, text, plain=False):
+        # type: (str, bool) -> str
+        """
+        :param str text: The text to show
+        :param bool plain: Leave out the font & color CSS, which the Stage's global text style supplies instead
+        :return: The html for the text in this style
+        :rtype: str
+        """
+        return (self.plain_html_head if plain else self.html_head) + text + self.html_tail
+
+    def to_json(self, text, plain=False):
+        # type: (str, bool) -> str
+        """
+        :param str text: The text to show
+        :param bool plain: See ``html()``
+        :return: The JSON of a Text Graphic showing the text in this style
+        :rtype: str
+        """
+        head = self.plain_json_head if plain else self.json_head
+
+        return head + json.dumps(text)[1:-1] + self.json_tail
+
+    def text_style(self):
+        # type: () -> OrderedDict
+        """
+        :return: The style as a Stage ``textStyles`` entry
+        :rtype: OrderedDict
+        """
+        css = self.values
+        entry = OrderedDict([
+            ('face', css['font-family']),
+            ('size', css['font-size']),
+            ('color', css['color']),
+        ])
+        for k in ('bold', 'italic', 'underline'):
+            if css[k]:
+                entry[k] = True
+
+        return entry
+
+
+class ShapeStyle(Style):
+    """
+    The values of a Shape Graphic (including its tid), along with the Shape's JSON.
+    """
+
+    __slots__ = ('json',)
+
+    _interned = WeakValueDictionary()
+
+    # the order gliffy expects the values in
+    fields = ('tid', 'strokeWidth', 'strokeColor', 'fillColor', 'gradient', 'dropShadow', 'state',
+              'shadowX', 'shadowY', 'opacity')
+
+    def __init__(self, values, key):
+        # type: (dict, tuple) -> ShapeStyle
+        super().__init__(values, key)
+        self.json = json.dumps(self.type_def())
+
+    def shape_style(self):
+        # type: () -> OrderedDict
+        """
+        :return: The style as a Stage ``shapeStyles`` entry
+        :rtype: OrderedDict
+        """
+        return OrderedDict([
+            ('fill', self.values['fillColor']),
+            ('stroke', self.values['strokeColor']),
+            ('strokeWidth', self.values['strokeWidth']),
+        ])
+
+    def type_def(self):
+        # type: () -> OrderedDict
+        """
+        :return: A new Shape Graphic type def using this style
+        :rtype: OrderedDict
+        """
+        return OrderedDict([
+            ('type', 'Shape'),
+            ('Shape', OrderedDict((f, self.values[f]) for f in self.fields)),
+        ])
+
+
+def text_type_def(html):
+    # type: (str) -> OrderedDict
+    """
+    :return: A new Text Graphic type def
+    :rtype: OrderedDict
+    """
+    return OrderedDict([
+        ('type', 'Text'),
+        ('Text', OrderedDict([
+            ('tid', None),
+            ('valign', 'middle'),
+            ('overflow', 'none'),
+            ('vposition', 'none'),
+            ('hposition', 'none'),
+            ('html', html),
+            ('paddingLeft', 0),
+            ('paddingRight', 0),
+            ('paddingBottom', 0),
+            ('paddingTop', 0)
+        ]))
+    ])
+
+
+class StyleTable(GliffyObject):
+    """
+    The distinct styles used on a Stage, for the Stage's ``textStyles`` & ``shapeStyles`` tables.
+
+    The most used TextStyle becomes the 'global' text style; Text Graphics using it only need
+    minimal html, since the font & color come from the table. The most used ShapeStyle of each
+    kind of shape is listed under the shape's tid.
+    """
+
+    __slots__ = ('text_counts', 'shape_counts')
+
+    def __init__(self):
+        # type: () -> StyleTable
+        # TextStyle -> number of uses
+        self.text_counts = Counter()
+        # tid -> ShapeStyle -> number of uses
+        self.shape_counts = {}
+
+    def collect(self, entities):
+        # type: (Iterable[Entity]) -> StyleTable
+        """
+        Counts the styles used by the Entities & all of their descendants.
+
+        :param Iterable[Entity] entities: The Entities to walk
+        :rtype: StyleTable
+        """
+        stack = list(entities)
+        while stack:
+            ent = stack.pop()
+            style = getattr(ent.graphic, 'style', None)
+            if isinstance(style, TextStyle):
+                self.text_counts[style] += 1
+            elif isinstance(style, ShapeStyle):
+                self.shape_counts.setdefault(style['tid'], Counter())[style] += 1
+            elif ent.graphic is None:
+                # a placeholder for an Entity that isn't in memory (see gliffy.fragments) lists its styles
+                self.add(getattr(ent, 'style_counts', ()))
+            stack.extend(ent.children)
+
+        return self
+
+    def add(self, pairs):
+        # type: (Iterable[tuple]) -> StyleTable
+        """
+        :param Iterable[tuple] pairs: (Style, number of uses) pairs, as made by ``style_counts()``
+        :rtype: StyleTable
+        """
+        for style, n in pairs:
+            if isinstance(style, TextStyle):
+                self.text_counts[style] += n
+            else:
+                self.shape_counts.setdefault(style['tid'], Counter())[style] += n
+
+        return self
+
+    def subtract(self, pairs):
+        # type: (Iterable[tuple]) -> StyleTable
+        """
+        Takes back counts added by ``add()``/``collect()``; styles that are no longer used are dropped.
+
+        :param Iterable[tuple] pairs: (Style, number of uses) pairs, as made by ``style_counts()``
+        :rtype: StyleTable
+        """
+        for style, n in pairs:
+            if isinstance(style, TextStyle):
+                counts = self.text_counts
+            else:
+                counts = self.shape_counts[style['tid']]
+            counts[style] -= n
+            if counts[style] <= 0:
+                del counts[style]
+                if not counts and counts is not self.text_counts:
+                    del self.shape_counts[style['tid']]
+
+        return self
+
+    @property
+    def text(self):
+        # type: () -> Any
+        """
+        :return: The 'global' TextStyle; None if no Text is used
+        :rtype: Any
+        """
+        if not self.text_counts:
+            return None
+
+        return _most_common(self.text_counts)
+
+    def style_counts(self):
+        # type: () -> list
+        """
+        :return: (Style, number of uses) pairs for every counted style
+        :rtype: list
+        """
+        pairs = list(self.text_counts.items())
+        for tid in sorted(self.shape_counts):
+            pairs.extend(self.shape_counts[tid].items())
+
+        return pairs
+
+    def text_styles(self):
+        # type: () -> dict
+        """
+        :return: The Stage ``textStyles`` table
+        :rtype: dict
+        """
+        text = self.text
+        if text is None:
+            return {}
+
+        return {'global': text.text_style()}
+
+    def shape_styles(self):
+        # type: () -> OrderedDict
+        """
+        :return: The Stage ``shapeStyles`` table
+        :rtype: OrderedDict
+        """
+        return OrderedDict((tid, _most_common(self.shape_counts[tid]).shape_style())
+                           for tid in sorted(self.shape_counts))
+
+
+def _most_common(counts):
+    # type: (Counter) -> Style
+    """
+    :return: The most used Style; ties go to the Style with the lowest key, so the result doesn't
+             depend on the order the Styles were seen in
+    :rtype: Style
+    """
+    best = max(counts.values())
+
+    return min((style for style, n in counts.items() if n == best), key=lambda style: repr(style.key))
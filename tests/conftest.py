@@ -0,0 +1,14 @@
+"""
+Makes the repo's top-level packages (gliffy, database, utils & main) importable from the tests.
+"""
+
+# Standard Library
+import os
+import sys
+# Third Party
+# Local
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
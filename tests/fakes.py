@@ -0,0 +1,59 @@
+"""
+A DB-API 2.0 connection that replays canned catalog rows, for testing the adapters of databases that
+can't be run here.
+"""
+
+# Standard Library
+# Third Party
+# Local
+
+
+class FakeConnection(object):
+    """
+    Answers each query with the rows given for its SQL text & records how they were read.
+    """
+
+    def __init__(self, results):
+        # type: (dict) -> FakeConnection
+        """
+        :param dict results: SQL text -> list of rows
+        """
+        self.results = results
+        # (sql, params) of every query run
+        self.executed = []
+        # the size asked for by every fetchmany()
+        self.fetches = []
+        self.open_cursors = 0
+
+    def cursor(self):
+        # type: () -> FakeCursor
+        self.open_cursors += 1
+        return FakeCursor(self)
+
+
+class FakeCursor(object):
+
+    def __init__(self, connection):
+        # type: (FakeConnection) -> FakeCursor
+        self.connection = connection
+        self.rows = None
+
+    def execute(self, sql, params=()):
+        # type: (str, Any) -> None
+        self.connection.executed.append((sql, tuple(params)))
+        # a KeyError means the adapter ran a query the test didn't expect
+        self.rows = list(self.connection.results[sql])
+
+    def fetchmany(self, size):
+        # type: (int) -> list
+        self.connection.fetches.append(size)
+        page, self.rows = self.rows[:size], self.rows[size:]
+        return page
+
+    def fetchone(self):
+        # type: () -> Any
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        # type: () -> None
+        self.connection.open_cursors -= 1
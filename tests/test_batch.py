@@ -0,0 +1,100 @@
+"""
+``introspect_many()`` with local SQLite files & a slow adapter.
+"""
+
+# Standard Library
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+# Third Party
+import pytest
+# Local
+from database.batch import Job, introspect_many
+from database.sqlite import SQLiteAdapter
+
+
+class SlowAdapter(SQLiteAdapter):
+    """
+    Takes ``delay`` seconds to introspect & counts how many introspections run at once.
+    """
+
+    __slots__ = ('delay',)
+
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def __init__(self, connection, delay):
+        super().__init__(connection)
+        self.delay = delay
+
+    def introspect(self, schema=None):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.most = max(cls.most, cls.running)
+        try:
+            time.sleep(self.delay)
+            return super().introspect(schema)
+        finally:
+            with cls.lock:
+                cls.running -= 1
+
+
+@pytest.fixture
+def make_job(tmp_path):
+    SlowAdapter.running = SlowAdapter.most = 0
+
+    def make_job(name, delay=0.0):
+        path = str(tmp_path / (name + '.db'))
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE {} (id INTEGER PRIMARY KEY)'.format(name))
+        conn.close()
+        return Job(name, lambda: SlowAdapter(sqlite3.connect(path, check_same_thread=False), delay))
+
+    return make_job
+
+
+def collect(jobs, **kwargs):
+    # type: (list, Any) -> dict
+    """
+    :return: {job name: (table names, error)}
+    """
+    async def main():
+        return [r async for r in introspect_many(jobs, **kwargs)]
+
+    return {job.name: (list(schema.tables) if schema else None, error) for job, schema, error in asyncio.run(main())}
+
+
+def test_results(make_job):
+    results = collect([make_job('a'), make_job('b', 0.05), make_job('c')], limit=2)
+
+    assert results == {'a': (['a'], None), 'b': (['b'], None), 'c': (['c'], None)}
+    assert SlowAdapter.most <= 2
+
+
+def test_timeout(make_job):
+    results = collect([make_job('slow', 1.0), make_job('fast')], limit=2, timeout=0.2)
+
+    assert isinstance(results['slow'][1], asyncio.TimeoutError)
+    assert results['fast'] == (['fast'], None)
+
+
+def test_abandoned_job_keeps_its_slot(make_job):
+    # the 2nd job has to wait for the abandoned 1st one's thread, which mustn't count against its timeout
+    results = collect([make_job('slow', 0.8), make_job('next', 0.1)], limit=1, timeout=0.3)
+
+    assert isinstance(results['slow'][1], asyncio.TimeoutError)
+    assert results['next'] == (['next'], None)
+    assert SlowAdapter.most == 1
+
+
+def test_timeout_starts_when_the_job_does(make_job):
+    # a shared executor with fewer threads than the limit queues jobs
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        jobs = [make_job(name, 0.2) for name in 'abc']
+        results = collect(jobs, limit=3, timeout=0.35, executor=executor)
+
+    assert results == {'a': (['a'], None), 'b': (['b'], None), 'c': (['c'], None)}
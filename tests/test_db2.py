@@ -0,0 +1,103 @@
+"""
+``DB2Adapter`` against catalog rows replayed by a fake cursor.
+"""
+
+# Standard Library
+import datetime
+import math
+# Third Party
+import pytest
+# Local
+from database import db2
+from database.db2 import DB2Adapter
+from database.schema import Column, ForeignKey, Index
+from fakes import FakeConnection
+
+CURRENT_SCHEMA_SQL = 'SELECT CURRENT SCHEMA FROM SYSIBM.SYSDUMMY1'
+
+COLUMNS = [
+    ('BIG_ORDERS', 'V', 'ID', 'INTEGER', 4, 0, 'N', None),
+    ('CUSTOMERS', 'T', 'ID', 'INTEGER', 4, 0, 'N', None),
+    ('CUSTOMERS', 'T', 'REGION', 'CHARACTER ', 2, 0, 'N', "'EU'"),
+    ('CUSTOMERS', 'T', 'NAME', 'VARCHAR', 50, 0, 'Y', None),
+    ('ORDERS', 'T', 'ID', 'INTEGER', 4, 0, 'N', None),
+    ('ORDERS', 'T', 'CUST_ID', 'INTEGER', 4, 0, 'Y', None),
+    ('ORDERS', 'T', 'CUST_REGION', 'CHARACTER', 2, 0, 'Y', None),
+    ('ORDERS', 'T', 'TOTAL', 'DECIMAL', 10, 2, 'Y', '0'),
+]
+
+KEYS = [
+    ('CUSTOMERS', 'PK_CUST', 1, 1, 'REGION'),
+    ('CUSTOMERS', 'PK_CUST', 1, 1, 'ID'),
+    ('CUSTOMERS', 'UQ_NAME', 1, 0, 'NAME'),
+    ('ORDERS', 'PK_ORD', 1, 1, 'ID'),
+]
+
+FOREIGN_KEYS = [
+    ('ORDERS', 'FK_AUDIT', 'ID', 'AUDIT', 'LOG', 'ORDER_ID'),
+    ('ORDERS', 'FK_CUST', 'CUST_REGION', 'APP', 'CUSTOMERS', 'REGION'),
+    ('ORDERS', 'FK_CUST', 'CUST_ID', 'APP', 'CUSTOMERS', 'ID'),
+]
+
+
+@pytest.fixture
+def conn():
+    return FakeConnection({
+        # CURRENT SCHEMA is padded like a CHAR
+        CURRENT_SCHEMA_SQL: [('APP     ',)],
+        db2.COLUMNS_SQL: COLUMNS,
+        db2.KEYS_SQL: KEYS,
+        db2.FOREIGN_KEYS_SQL: FOREIGN_KEYS,
+        db2.FINGERPRINT_SQL: [('SAMPLE  ', 3, datetime.datetime(2024, 5, 1, 12, 30))],
+    })
+
+
+def test_schema(conn):
+    schema = DB2Adapter(conn).introspect()
+
+    assert schema.name == 'APP'
+    assert list(schema.tables) == ['BIG_ORDERS', 'CUSTOMERS', 'ORDERS']
+    assert schema['BIG_ORDERS'].kind == 'view'
+    assert schema['CUSTOMERS'].columns == [
+        Column('ID', 'INTEGER', False, None, 2),
+        Column('REGION', 'CHARACTER(2)', False, "'EU'", 1),
+        Column('NAME', 'VARCHAR(50)', True, None, 0),
+    ]
+    assert schema['CUSTOMERS'].indexes == [
+        Index('PK_CUST', ('REGION', 'ID'), True, True),
+        Index('UQ_NAME', ('NAME',), True),
+    ]
+    assert schema['ORDERS'].column('TOTAL') == Column('TOTAL', 'DECIMAL(10, 2)', True, '0', 0)
+    assert schema['ORDERS'].primary_key == ('ID',)
+    assert schema['ORDERS'].foreign_keys == [
+        ForeignKey('FK_AUDIT', ('ID',), 'LOG', ('ORDER_ID',), 'AUDIT'),
+        ForeignKey('FK_CUST', ('CUST_REGION', 'CUST_ID'), 'CUSTOMERS', ('REGION', 'ID')),
+    ]
+
+
+def test_queries_are_filtered_by_schema(conn):
+    DB2Adapter(conn).introspect('OTHER')
+
+    assert conn.executed == [(db2.COLUMNS_SQL, ('OTHER',)), (db2.KEYS_SQL, ('OTHER',)),
+                             (db2.FOREIGN_KEYS_SQL, ('OTHER',))]
+    assert conn.open_cursors == 0
+
+
+def test_rows_are_read_in_pages(conn):
+    DB2Adapter(conn, page_size=3).introspect('APP')
+
+    # every query is read with fetchmany() until an empty page, never all at once
+    pages = sum(math.ceil(len(rows) / 3) + 1 for rows in (COLUMNS, KEYS, FOREIGN_KEYS))
+    assert conn.fetches == [3] * pages
+
+
+def test_default_page_size(conn):
+    DB2Adapter(conn).introspect('APP')
+
+    assert set(conn.fetches) == {1000}
+
+
+def test_fingerprint(conn):
+    assert DB2Adapter(conn).fingerprint() == (('SAMPLE', 'APP'), (3, '2024-05-01 12:30:00'))
+    assert conn.executed[-1] == (db2.FINGERPRINT_SQL, ('APP',))
+    assert conn.open_cursors == 0
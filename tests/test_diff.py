@@ -0,0 +1,170 @@
+"""
+Schema diffs & redrawing only the tables that changed.
+"""
+
+# Standard Library
+import copy
+import json
+# Third Party
+import pytest
+# Local
+from database.diff import diff
+from database.schema import Column, ForeignKey, Index, Schema
+from main import GliffyDB
+
+
+def make_schema(n=12):
+    # type: (int) -> Schema
+    """
+    :return: users, posts (-> users) & n unrelated tables
+    :rtype: Schema
+    """
+    schema = Schema('test')
+    users = schema.table('users')
+    users.columns = [Column('id', 'INTEGER', False, None, 1), Column('name', 'TEXT'), Column('email', 'TEXT')]
+    posts = schema.table('posts')
+    posts.columns = [Column('id', 'INTEGER', False, None, 1), Column('user_id', 'INTEGER'), Column('body', 'TEXT')]
+    posts.foreign_keys = [ForeignKey(None, ('user_id',), 'users', ('id',))]
+    posts.indexes = [Index('posts_user', ('user_id',))]
+    for i in range(n):
+        table = schema.table('t{}'.format(i))
+        table.columns = [Column('id', 'INTEGER', False, None, 1)] + [Column('c{}'.format(c)) for c in range(i % 4)]
+
+    return schema
+
+
+def test_no_changes():
+    assert not diff(make_schema(), make_schema())
+
+
+def test_column_changes():
+    new = make_schema()
+    users = new['users']
+    users.columns = [users.columns[0], Column('name', 'VARCHAR(50)'), Column('created_at', 'TEXT')]
+    changes = diff(make_schema(), new)
+
+    assert (changes.added, changes.removed, [t.name for t in changes.changed]) == ([], [], ['users'])
+    (table,) = changes.changed
+    assert table.added_columns == ['created_at']
+    assert table.removed_columns == ['email']
+    assert table.changed_columns == ['name']
+    assert changes.affected == {'users'}
+
+
+def test_added_foreign_key():
+    new = make_schema()
+    new['t1'].columns.append(Column('user_id', 'INTEGER'))
+    new['t1'].foreign_keys.append(ForeignKey(None, ('user_id',), 'users', ('id',)))
+    (table,) = diff(make_schema(), new).changed
+
+    assert table.added_columns == ['user_id']
+    assert table.added_foreign_keys == [ForeignKey(None, ('user_id',), 'users', ('id',))]
+    assert table.removed_foreign_keys == []
+
+
+def test_tables_added_and_dropped():
+    new = make_schema()
+    del new.tables['t3']
+    new.table('tags').columns = [Column('id', 'INTEGER', False, None, 1)]
+    changes = diff(make_schema(), new)
+
+    assert (changes.added, changes.removed, changes.changed) == (['tags'], ['t3'], [])
+    assert changes.affected == {'tags'}
+
+
+def test_reordered_columns_are_a_change():
+    new = make_schema()
+    new['users'].columns.reverse()
+    (table,) = diff(make_schema(), new).changed
+
+    assert (table.added_columns, table.removed_columns, table.changed_columns) == ([], [], [])
+
+
+def check_lines(doc):
+    # type: (dict) -> None
+    """
+    Checks that every Line starts & ends at an Entity that is in the diagram.
+    """
+    ids = set()
+    stack = list(doc['stage']['objects'])
+    while stack:
+        obj = stack.pop()
+        ids.add(obj['id'])
+        stack.extend(obj.get('children') or ())
+    for obj in doc['stage']['objects']:
+        if obj['graphic']['type'] == 'Line':
+            assert int(obj['constraints']['startConstraint']['StartPositionConstraint']['nodeId']) in ids
+            assert int(obj['constraints']['endConstraint']['EndPositionConstraint']['nodeId']) in ids
+
+
+@pytest.fixture
+def redrawn():
+    """
+    :return: The GliffyDB after redrawing, the table Entities from before & the JSON from before & after
+    """
+    gdb = GliffyDB()
+    old = make_schema()
+    before = json.loads(gdb.make_tables(old))
+    entities = dict(gdb.tables)
+    coords = {name: (e.type_def['id'], e.type_def['x'], e.type_def['y']) for name, e in entities.items()}
+
+    new = copy.deepcopy(old)
+    # users changes, t3 is dropped, t5 gets a key to users & tags is new
+    new['users'].columns.append(Column('created_at', 'TEXT'))
+    del new.tables['t3']
+    new['t5'].columns.append(Column('user_id', 'INTEGER'))
+    new['t5'].foreign_keys.append(ForeignKey(None, ('user_id',), 'users', ('id',)))
+    new.table('tags').columns = [Column('id', 'INTEGER', False, None, 1), Column('label', 'TEXT')]
+    after = json.loads(gdb.update_tables(new))
+
+    return gdb, entities, coords, before, after
+
+
+def test_only_changed_tables_are_rebuilt(redrawn):
+    gdb, entities, _, _, _ = redrawn
+    rebuilt = {name for name, e in gdb.tables.items() if entities.get(name) is not e}
+
+    assert rebuilt == {'users', 't5', 'tags'}
+    assert 't3' not in gdb.tables
+    assert not any(name == 't3' for name, _ in gdb.cells)
+    # posts references users, so its link is redrawn, but the table itself isn't
+    assert gdb.tables['posts'] is entities['posts']
+
+
+def test_unchanged_tables_keep_their_place(redrawn):
+    gdb, _, coords, _, _ = redrawn
+    kept = set(gdb.tables) - {'users', 't5', 'tags'}
+
+    assert kept
+    for name in kept:
+        e = gdb.tables[name]
+        assert (e.type_def['id'], e.type_def['x'], e.type_def['y']) == coords[name]
+        # & aren't pinned by the redraw
+        assert e.settings['position'] == 'auto'
+    assert gdb.g.stage.overlaps() == []
+
+
+def test_lines_only_point_at_drawn_tables(redrawn):
+    _, _, _, before, after = redrawn
+    check_lines(before)
+    check_lines(after)
+    # posts -> users & t5 -> users
+    assert sum(o['graphic']['type'] == 'Line' for o in after['stage']['objects']) == 2
+
+
+def table_names(doc):
+    # type: (dict) -> list
+    return sorted(o['children'][0]['children'][0]['graphic']['Text']['html']
+                  for o in doc['stage']['objects'] if o['graphic']['type'] != 'Line')
+
+
+def test_redraw_draws_the_same_tables_as_a_fresh_drawing(redrawn):
+    gdb, _, _, _, after = redrawn
+    fresh = GliffyDB()
+
+    assert table_names(after) == table_names(json.loads(fresh.make_tables(gdb.schema)))
+
+
+def test_update_needs_a_drawn_schema():
+    with pytest.raises(ValueError):
+        GliffyDB().update_tables(make_schema())
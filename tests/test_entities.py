@@ -0,0 +1,77 @@
+"""
+Entity JSON caching: changes reset the cached fragments of the Entity & its ancestors only.
+"""
+
+# Standard Library
+# Third Party
+import pytest
+# Local
+from gliffy.gliffy import Gliffy
+
+CHANGES = {
+    'coords': lambda ent, g: setattr(ent, 'coords', {'x': 7, 'y': 9}),
+    'size': lambda ent, g: setattr(ent, 'size', {'width': 333, 'height': 44}),
+    'order': lambda ent, g: setattr(ent, 'order', 99),
+    'id': lambda ent, g: setattr(ent, 'id', 1234),
+    'set_properties': lambda ent, g: ent.set_properties({'strokeWidth': 5}),
+    'add_child': lambda ent, g: ent.add_child(g.text({'text': 'extra'})),
+}
+
+
+def cached_table():
+    # type: () -> tuple
+    g = Gliffy()
+    table = g.table('users', ['id', 'name'])
+    g.add([table])
+    g.to_json()
+
+    return g, table
+
+
+def test_to_json_caches_every_fragment():
+    _, table = cached_table()
+    stack = [table]
+    while stack:
+        ent = stack.pop()
+        assert ent._fragment is not None
+        stack.extend(ent.children)
+
+
+@pytest.mark.parametrize('change', sorted(CHANGES))
+def test_changes_reset_the_entity_and_its_ancestors(change):
+    g, table = cached_table()
+    cell, sibling = table.children[1], table.children[2]
+    CHANGES[change](cell, g)
+
+    assert cell._fragment is None
+    assert table._fragment is None
+    # the rest of the table keeps its JSON
+    assert cell.children[0]._fragment is not None
+    assert sibling._fragment is not None
+    assert sibling.children[0]._fragment is not None
+    assert table.children[0]._fragment is not None
+
+
+@pytest.mark.parametrize('change', sorted(CHANGES))
+def test_changes_show_up_in_the_json(change):
+    g, table = cached_table()
+    CHANGES[change](table.children[1], g)
+    cached = g.to_json()
+    # encoded again from scratch
+    stack = [table]
+    while stack:
+        ent = stack.pop()
+        ent._fragment = None
+        stack.extend(ent.children)
+
+    assert g.to_json() == cached
+
+
+def test_setting_the_same_value_keeps_the_cache():
+    _, table = cached_table()
+    cell = table.children[1]
+    cell.coords = cell.coords
+    cell.order = cell.order
+
+    assert cell._fragment is not None
+    assert table._fragment is not None
@@ -0,0 +1,86 @@
+"""
+Force-directed layout: deterministic, overlap-free & pulls linked tables together.
+"""
+
+# Standard Library
+import itertools
+import math
+# Third Party
+import pytest
+# Local
+from gliffy.gliffy import Gliffy
+from gliffy.layout import bbox
+
+np = pytest.importorskip('numpy')
+
+
+def draw(n=40):
+    # type: (int) -> tuple
+    """
+    :return: The Gliffy & its (source, target) linked table pairs; table i links to table i + n // 2
+    :rtype: tuple
+    """
+    g = Gliffy().set_layout('force')
+    tables = [g.table('t{}'.format(i), ['id', 'other_id'] + ['c{}'.format(c) for c in range(i % 5)])
+              for i in range(n)]
+    g.add(tables)
+    # the linked tables start out far apart, on different shelves
+    pairs = [(tables[i], tables[i + n // 2]) for i in range(0, n // 2, 2)]
+    for source, target in pairs:
+        g.link(source.children[2], target.children[1])
+    g.stage.layout()
+
+    return g, pairs
+
+
+def distance(a, b):
+    # type: (Entity, Entity) -> float
+    ax, ay, ar, ab = bbox(a)
+    bx, by, br, bb = bbox(b)
+
+    return math.hypot((ax + ar) / 2.0 - (bx + br) / 2.0, (ay + ab) / 2.0 - (by + bb) / 2.0)
+
+
+def test_is_deterministic():
+    first, _ = draw()
+    second, _ = draw()
+
+    assert [bbox(c) for c in first.stage.children] == [bbox(c) for c in second.stage.children]
+    assert first.to_json() == second.to_json()
+
+
+def test_nothing_overlaps():
+    g, _ = draw()
+    pad_x, pad_y = g.stage.pad_x, g.stage.pad_y
+
+    assert g.stage.overlaps() == []
+    for a, b in itertools.combinations([bbox(c) for c in g.stage.children], 2):
+        assert (a[2] + pad_x <= b[0] or b[2] + pad_x <= a[0]
+                or a[3] + pad_y <= b[1] or b[3] + pad_y <= a[1]), (a, b)
+
+
+def test_linked_tables_are_closer():
+    g, pairs = draw()
+    linked = {frozenset(p) for p in pairs}
+    near = [distance(a, b) for a, b in pairs]
+    far = [distance(a, b) for a, b in itertools.combinations(g.stage.children, 2) if frozenset((a, b)) not in linked]
+
+    assert sum(near) / len(near) < sum(far) / len(far)
+    # & closer than the packed layout put them
+    g.stage.settings['layout'] = 'shelf'
+    g.stage.repack()
+    assert sum(near) < sum(distance(a, b) for a, b in pairs)
+
+
+def test_fixed_tables_arent_moved():
+    g = Gliffy().set_layout('force')
+    pinned = g.table('pinned', ['id'])
+    pinned.settings['position'] = 'fixed'
+    pinned.coords = {'x': 500, 'y': 40}
+    other = g.table('other', ['id', 'pinned_id'])
+    g.add([g.table('t{}'.format(i), ['id']) for i in range(10)] + [pinned, other])
+    g.link(other.children[2], pinned.children[1])
+    g.stage.layout()
+
+    assert (pinned.type_def['x'], pinned.type_def['y']) == (500, 40)
+    assert g.stage.overlaps() == []
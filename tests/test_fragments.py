@@ -0,0 +1,150 @@
+"""
+FragmentCache: hits & misses, LRU eviction & sharing the directory between processes.
+"""
+
+# Standard Library
+import glob
+import multiprocessing
+import os
+# Third Party
+import pytest
+# Local
+from gliffy import fragments
+from gliffy.fragments import FragmentCache
+from gliffy.gliffy import Gliffy
+
+TABLES = {'users': ['id', 'name'], 'posts': ['id', 'user_id', 'body'], 'tags': ['id', 'label']}
+
+
+def draw(cache, tables, mode='inline', ids='sequential'):
+    # type: (FragmentCache, dict, str, str) -> str
+    g = Gliffy().set_styles(mode)
+    g.set_ids(ids)
+    if cache is not None:
+        g.set_fragment_cache(cache)
+    cells = {}
+    for name, cols in tables.items():
+        _, children = g.add_cached(('table', name, tuple(cols)), lambda n=name, c=cols: g.table(n, c))
+        cells[name] = children
+    if 'posts' in cells and 'users' in cells:
+        g.link(cells['posts'][2], cells['users'][1])
+
+    return g.to_json()
+
+
+@pytest.mark.parametrize('mode', ['inline', 'shared'])
+def test_hits_and_misses(tmp_path, mode):
+    expected = draw(None, TABLES, mode)
+    first = FragmentCache(str(tmp_path))
+    assert draw(first, TABLES, mode) == expected
+    assert (first.hits, first.misses) == (0, 3)
+
+    second = FragmentCache(str(tmp_path))
+    assert draw(second, TABLES, mode) == expected
+    assert (second.hits, second.misses) == (3, 0)
+
+    # only the changed table misses
+    changed = dict(TABLES, tags=['id', 'label', 'color'])
+    third = FragmentCache(str(tmp_path))
+    assert draw(third, changed, mode) == draw(None, changed, mode)
+    assert (third.hits, third.misses) == (2, 1)
+
+
+@pytest.mark.parametrize('ids', ['sequential', 'stable'])
+def test_later_tables_still_hit(tmp_path, ids):
+    draw(FragmentCache(str(tmp_path)), TABLES, ids=ids)
+    # with sequential ids the tables after it are renumbered, so their JSON is restamped
+    changed = dict(TABLES, users=['id', 'name', 'email', 'created_at', 'updated_at'])
+    cache = FragmentCache(str(tmp_path))
+
+    assert draw(cache, changed, ids=ids) == draw(None, changed, ids=ids)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_restamping_leaves_text_alone(tmp_path):
+    # column names that look like the ids/orders in the JSON
+    tables = {'users': ['id', '"id": 1', '"order": 2'], 'posts': ['id', 'user_id', '"id": 3, "order": 4']}
+    draw(FragmentCache(str(tmp_path)), tables)
+    changed = dict(tables, users=['id', '"id": 1', '"order": 2', 'email'])
+    cache = FragmentCache(str(tmp_path))
+
+    assert draw(cache, changed) == draw(None, changed)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_old_versions_miss(tmp_path, monkeypatch):
+    draw(FragmentCache(str(tmp_path)), TABLES)
+    monkeypatch.setattr(fragments, 'VERSION', fragments.VERSION + 1)
+    cache = FragmentCache(str(tmp_path))
+    draw(cache, TABLES)
+
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_corrupt_entries_miss(tmp_path):
+    cache = FragmentCache(str(tmp_path))
+    cache.put('key', {'a': 1})
+    (path,) = glob.glob(os.path.join(str(tmp_path), '*' + fragments.EXTENSION))
+    with open(path, 'wb') as f:
+        f.write(b'not an entry')
+
+    assert cache.get('key') is None
+    assert cache.misses == 1
+
+
+def test_evict_removes_the_least_recently_used(tmp_path):
+    cache = FragmentCache(str(tmp_path))
+    for i in range(5):
+        cache.put(i, {'data': 'x' * 1000})
+        # older entries were used longer ago
+        os.utime(cache._path(i), (1000 + i, 1000 + i))
+    size = os.path.getsize(cache._path(0))
+    # the oldest is used again, so it's now the most recently used
+    assert cache.get(0) == {'data': 'x' * 1000}
+
+    cache.max_bytes = size * 3
+    cache.evict()
+    assert [os.path.exists(cache._path(i)) for i in range(5)] == [True, False, False, True, True]
+
+    # nothing is evicted while the entries fit
+    cache.evict()
+    assert len(glob.glob(os.path.join(str(tmp_path), '*' + fragments.EXTENSION))) == 3
+
+
+def hammer(directory, worker, rounds, keys):
+    # type: (str, int, int, int) -> int
+    """
+    Overwrites every key & reads every key back, over & over.
+
+    :return: Number of reads that found no complete entry
+    :rtype: int
+    """
+    cache = FragmentCache(directory)
+    for r in range(rounds):
+        for k in range(keys):
+            cache.put(k, {'key': k, 'writer': worker, 'round': r, 'data': str(k) * 5000})
+        for k in range(keys):
+            entry = cache.get(k)
+            assert entry is None or (entry['key'] == k and entry['data'] == str(k) * 5000)
+
+    return cache.misses
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='the writers are forked')
+def test_concurrent_puts(tmp_path):
+    directory = str(tmp_path)
+    keys = 10
+    for k in range(keys):
+        FragmentCache(directory).put(k, {'key': k, 'writer': None, 'round': None, 'data': str(k) * 5000})
+
+    ctx = multiprocessing.get_context('fork')
+    with ctx.Pool(4) as pool:
+        misses = pool.starmap(hammer, [(directory, w, 20, keys) for w in range(4)])
+
+    # every entry was always there & complete, since they're replaced atomically
+    assert misses == [0, 0, 0, 0]
+    cache = FragmentCache(directory)
+    for k in range(keys):
+        assert cache.get(k)['key'] == k
+    assert not glob.glob(os.path.join(directory, '*.tmp'))
+    assert len(glob.glob(os.path.join(directory, '*' + fragments.EXTENSION))) == keys
@@ -0,0 +1,60 @@
+"""
+Gliffy.table(): tables stamped out from prototype cells.
+"""
+
+# Standard Library
+import json
+# Third Party
+# Local
+from gliffy.gliffy import Gliffy
+
+STYLES = Gliffy.table_styles
+
+
+def per_cell(g, name, columns):
+    # type: (Gliffy, str, list) -> Entity
+    cont = g.rectangle(STYLES['table'])
+    cont.add_child(g.rectangle(STYLES['name_cell']).add_child(g.text({'text': name, 'css': STYLES['name_text']})))
+    for col in columns:
+        text = g.text({'text': col, 'css': STYLES['column_text']})
+        cont.add_child(g.rectangle(STYLES['column_cell']).add_child(text))
+
+    return cont
+
+
+def test_table_matches_cells_made_one_by_one():
+    g = Gliffy()
+    columns = ['id', 'name', 'created_at']
+
+    assert g.table('users', columns).to_json() == per_cell(g, 'users', columns).to_json()
+    # from the prototypes this time
+    assert g.table('users', columns).to_json() == per_cell(g, 'users', columns).to_json()
+
+
+def test_tables_dont_share_state():
+    g = Gliffy()
+    a = g.table('a', ['id'])
+    b = g.table('b', ['id'])
+    a.children[1].children[0].graphic.set_text('changed')
+    a.children[1].settings['position'] = 'fixed'
+    a.children[1].type_def['linkMap'].append('x')
+
+    assert b.children[1].children[0].graphic.text == 'id'
+    assert g.table('b', ['id']).to_json() == b.to_json()
+    assert b.children[1].settings['position'] == 'auto'
+    assert b.children[1].type_def['linkMap'] == []
+    for cell in b.children:
+        assert cell.parent is b
+        assert cell.graphic.owner is cell
+        assert cell.children[0].parent is cell
+
+
+def test_lines_keep_their_constraints_before_the_graphic():
+    g = Gliffy()
+    a = g.table('a', ['id', 'b_id'])
+    b = g.table('b', ['id'])
+    g.add([a, b])
+    g.link(a.children[2], b.children[1])
+    line = json.loads(g.to_json())['stage']['objects'][-1]
+
+    assert list(line)[-4:] == ['constraints', 'graphic', 'children', 'linkMap']
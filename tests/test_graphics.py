@@ -0,0 +1,98 @@
+"""
+Graphic properties: validation & the shared styles.
+"""
+
+# Standard Library
+import gc
+# Third Party
+import pytest
+# Local
+from gliffy import styles
+from gliffy.graphics import Shape, Text
+
+
+def test_shape_properties_are_validated():
+    shape = Shape('square', {'strokeWidth': '3', 'strokeColor': 'FF0000AA', 'unknown': 1})
+
+    assert shape.properties['strokeWidth'] == 3
+    assert shape.properties['strokeColor'] == '#FF0000'
+    assert 'unknown' not in shape.properties
+
+
+def test_invalid_shape_properties_get_the_defaults(capsys):
+    shape = Shape('square', {'strokeWidth': 'wide', 'fillColor': '#00FF00'})
+
+    assert shape.properties['strokeWidth'] == Shape.defaults['strokeWidth']
+    assert shape.properties['fillColor'] == '#00FF00'
+    assert 'strokeWidth' in capsys.readouterr().out
+
+
+def test_shape_properties_are_validated_once(monkeypatch):
+    props = {'strokeWidth': '5', 'fillColor': 'ABCDEF'}
+    first = Shape('square', props)
+    calls = []
+    monkeypatch.setattr(Shape, 'validate_properties', lambda self, p: calls.append(p))
+    second = Shape('square', props)
+
+    assert second.style is first.style
+    assert calls == []
+    # the caller's dict isn't changed
+    assert props == {'strokeWidth': '5', 'fillColor': 'ABCDEF'}
+
+
+@pytest.mark.parametrize('graphic', [lambda: Shape('square'), lambda: Text()])
+def test_equal_properties_share_a_style(graphic):
+    a = graphic()
+    b = graphic()
+
+    assert a.style is b.style
+
+
+def test_freeze_keeps_types_apart():
+    keys = {styles.freeze({'opacity': v}) for v in (True, 1, 1.0)}
+
+    assert len(keys) == 3
+    assert styles.freeze({'a': 1, 'b': 2}) == styles.freeze({'b': 2, 'a': 1})
+
+
+def test_equal_values_of_other_types_get_their_own_style():
+    one = Shape('square', {'strokeWidth': 1})
+    true = Shape('square')
+    true.style = styles.ShapeStyle.get(dict(true.style.values, strokeWidth=True))
+
+    assert one.style is not true.style
+    assert one.to_json() != true.to_json()
+
+
+def test_style_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(Shape, '_styles', styles.StyleCache(8))
+    base = Shape('square')
+    for width in range(50):
+        Shape('square', {'strokeWidth': width})
+
+    assert len(Shape._styles) == 8
+    # an evicted input just makes the same (interned) Style again
+    assert Shape('square').style is base.style
+
+
+def test_unused_styles_are_dropped(monkeypatch):
+    monkeypatch.setattr(Shape, '_styles', styles.StyleCache(8))
+    before = len(styles.ShapeStyle._interned)
+    kept = Shape('square', {'strokeWidth': 1000})
+    for width in range(1001, 1100):
+        Shape('square', {'strokeWidth': width})
+    gc.collect()
+
+    # only the ones still used by a Graphic or held by the StyleCache are left
+    assert len(styles.ShapeStyle._interned) <= before + 1 + 8
+    assert styles.ShapeStyle.get(dict(kept.style.values)) is kept.style
+
+
+def test_style_cache_evicts_the_least_recently_used():
+    cache = styles.StyleCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    cache.get('a')
+    cache['c'] = 3
+
+    assert list(cache) == ['a', 'c']
@@ -0,0 +1,109 @@
+"""
+Shelf layout: no overlaps, 'fixed' Entities stay put, the Stage fits everything & re-layouts keep placed Entities.
+"""
+
+# Standard Library
+import itertools
+# Third Party
+# Local
+from gliffy.gliffy import Gliffy
+from gliffy.layout import bbox
+
+
+def tables(g, n, prefix='t'):
+    # type: (Gliffy, int, str) -> list
+    # varied sizes, so the shelves aren't all the same
+    return [g.table('{}{}'.format(prefix, i), ['column_{}'.format(c) for c in range(1 + i % 7)]) for i in range(n)]
+
+
+def assert_apart(boxes, pad_x, pad_y):
+    # type: (list, int, int) -> None
+    for a, b in itertools.combinations(boxes, 2):
+        assert (a[2] + pad_x <= b[0] or b[2] + pad_x <= a[0]
+                or a[3] + pad_y <= b[1] or b[3] + pad_y <= a[1]), (a, b)
+
+
+def test_nothing_overlaps():
+    g = Gliffy()
+    g.add(tables(g, 60))
+    g.stage.layout()
+
+    assert g.stage.overlaps() == []
+    assert_apart([bbox(c) for c in g.stage.children], g.stage.pad_x, g.stage.pad_y)
+    # starting at the Stage's start coords
+    assert min(bbox(c)[0] for c in g.stage.children) == g.stage.x
+    assert min(bbox(c)[1] for c in g.stage.children) == g.stage.y
+
+
+def test_fixed_entities_arent_moved():
+    g = Gliffy()
+    pinned = g.table('pinned', ['id', 'name', 'email'])
+    pinned.settings['position'] = 'fixed'
+    pinned.coords = {'x': 60, 'y': 70}
+    g.add(tables(g, 30) + [pinned])
+    g.stage.layout()
+
+    assert (pinned.type_def['x'], pinned.type_def['y']) == (60, 70)
+    assert_apart([bbox(c) for c in g.stage.children], g.stage.pad_x, g.stage.pad_y)
+
+
+def test_stage_fits_everything():
+    g = Gliffy()
+    g.set_entity_padding({'pad_x': 13, 'pad_y': 17})
+    g.add(tables(g, 25))
+    g.stage.layout()
+    boxes = [bbox(c) for c in g.stage.children]
+
+    assert g.stage.width == max(b[2] for b in boxes) + 13
+    assert g.stage.height == max(b[3] for b in boxes) + 17
+    stg = g.stage.type_def['stage']
+    assert stg['maxWidth'] >= g.stage.width
+    assert stg['maxHeight'] >= g.stage.height
+
+
+def test_layout_only_places_new_entities():
+    g = Gliffy()
+    old = tables(g, 30)
+    g.add(old)
+    g.stage.layout()
+    before = [bbox(c) for c in old]
+
+    new = tables(g, 5, 'new')
+    g.add(new)
+    g.stage.layout()
+
+    assert [bbox(c) for c in old] == before
+    assert_apart([bbox(c) for c in g.stage.children], g.stage.pad_x, g.stage.pad_y)
+
+
+def test_resized_entities_are_placed_again():
+    g = Gliffy()
+    old = tables(g, 30)
+    g.add(old)
+    g.stage.layout()
+    grown = old[5]
+    before = bbox(grown)
+    # too tall for its old spot now
+    for _ in range(20):
+        grown.add_child(g.rectangle(Gliffy.table_styles['column_cell']).add_child(g.text({'text': 'extra'})))
+    g.stage.layout()
+
+    assert bbox(grown)[:2] != before[:2]
+    assert_apart([bbox(c) for c in g.stage.children], g.stage.pad_x, g.stage.pad_y)
+
+
+def test_repack_matches_a_fresh_layout():
+    g = Gliffy()
+    old = tables(g, 30)
+    g.add(old)
+    g.stage.layout()
+    g.remove(old[::2])
+    g.stage.repack()
+
+    fresh = Gliffy()
+    kept = tables(fresh, 30)[1::2]
+    fresh.add(kept)
+    fresh.stage.layout()
+
+    assert [bbox(c) for c in g.stage.children] == [bbox(c) for c in kept]
+    assert g.stage.width == fresh.stage.width
@@ -0,0 +1,77 @@
+"""
+Font metrics: known AFM widths, bold vs regular & the measurement cache.
+"""
+
+# Standard Library
+# Third Party
+import pytest
+# Local
+from gliffy import metrics
+from gliffy.metrics import measure, measure_many
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    measure.cache_clear()
+    yield
+    measure.cache_clear()
+
+
+@pytest.mark.parametrize('text, family, size, expected', [
+    # every Courier char is 600/1000 em
+    ('abc', 'Courier', '12px', (22, 12)),
+    ('id', 'Courier', 10, (12, 10)),
+    # H 722 + e 556 + l 222 + l 222 + o 556 = 2278
+    ('Hello', 'Helvetica', '12px', (28, 12)),
+    ('Hello', 'Arial', '20px', (46, 20)),
+    # the widest line & a line-height per line
+    ('ab\nabcd', 'Courier', '10px', (24, 20)),
+    ('', 'Courier', '12px', (0, 12)),
+])
+def test_known_widths(text, family, size, expected):
+    assert measure(text, family, size) == expected
+
+
+def test_bold_is_wider():
+    # H 722 + e 556 + l 278 + l 278 + o 611 = 2445
+    assert measure('Hello', 'Helvetica', '12px', True) == (30, 12)
+    assert measure('Hello', 'Helvetica', '12px', True)[0] > measure('Hello', 'Helvetica', '12px')[0]
+    # monospaced either way
+    assert measure('Hello', 'Courier', '12px', True) == measure('Hello', 'Courier', '12px')
+
+
+def test_chars_outside_ascii():
+    # accented latin as wide as an 'o', CJK a full em
+    assert measure('é', 'Helvetica', '100px') == measure('o', 'Helvetica', '100px')
+    assert measure('表', 'Helvetica', '100px') == (100, 100)
+
+
+def test_unknown_fonts_raise():
+    with pytest.raises(KeyError):
+        measure('abc', 'Comic Sans')
+
+
+def test_cache_hits_dont_measure_again(monkeypatch):
+    calls = []
+    font_px = metrics.font_px
+    monkeypatch.setattr(metrics, 'font_px', lambda size: calls.append(size) or font_px(size))
+    names = ['id', 'name', 'email', 'id', 'name']
+
+    first = measure_many(names, 'Helvetica', '12px')
+    assert len(calls) == 3
+    assert metrics.cache_info().hits == 2
+
+    # bold=1 & bold=True share entries, since measure_many() normalizes the flag
+    assert measure_many(names, 'Helvetica', '12px', 1) == measure_many(names, 'Helvetica', '12px', True)
+    assert len(calls) == 6
+
+    assert measure_many(names, 'Helvetica', '12px') == first
+    assert len(calls) == 6
+    assert metrics.cache_info().currsize == 6
+
+
+def test_cache_is_bounded():
+    for i in range(metrics.CACHE_SIZE + 10):
+        measure(str(i))
+
+    assert metrics.cache_info().currsize == metrics.CACHE_SIZE
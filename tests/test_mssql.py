@@ -0,0 +1,136 @@
+"""
+``MSSQLAdapter`` against catalog rows replayed by a fake cursor.
+"""
+
+# Standard Library
+import datetime
+# Third Party
+import pytest
+# Local
+from database import mssql
+from database.base import Adapter
+from database.mssql import MSSQLAdapter
+from database.schema import Column, ForeignKey, Index, Routine, Schema
+from fakes import FakeConnection
+
+COLUMNS = [
+    ('customers', 'U ', 'id', 'int', 4, 10, 0, 0, None),
+    ('customers', 'U ', 'name', 'nvarchar', 100, 0, 0, 0, None),
+    ('customers', 'U ', 'notes', 'varchar', -1, 0, 0, 1, None),
+    ('orders', 'U ', 'id', 'int', 4, 10, 0, 0, None),
+    ('orders', 'U ', 'customer_id', 'int', 4, 10, 0, 1, None),
+    ('orders', 'U ', 'total', 'decimal', 9, 10, 2, 1, '((0))'),
+    ('orders', 'U ', 'code', 'char', 3, 0, 0, 0, "('NEW')"),
+    ('recent_orders', 'V ', 'id', 'int', 4, 10, 0, 0, None),
+]
+
+INDEXES = [
+    ('customers', 'PK_customers', 1, 1, 'id'),
+    ('customers', 'UQ_customers_name', 1, 0, 'name'),
+    ('orders', 'IX_orders_customer', 0, 0, 'customer_id'),
+    ('orders', 'IX_orders_customer', 0, 0, 'id'),
+    ('orders', 'PK_orders', 1, 1, 'code'),
+    ('orders', 'PK_orders', 1, 1, 'id'),
+]
+
+FOREIGN_KEYS = [
+    ('orders', 'FK_orders_audit', 'id', 'audit', 'log', 'order_id'),
+    ('orders', 'FK_orders_customers', 'customer_id', 'dbo', 'customers', 'id'),
+]
+
+MODULES = [
+    ('fn_total', 'FN', 'CREATE FUNCTION fn_total() RETURNS int AS BEGIN RETURN 1 END'),
+    ('tvf_orders', 'IF', 'CREATE FUNCTION tvf_orders() RETURNS TABLE AS RETURN SELECT 1 AS x'),
+    ('usp_archive', 'P ', 'CREATE PROCEDURE usp_archive AS SELECT 1'),
+]
+
+
+@pytest.fixture
+def conn():
+    return FakeConnection({
+        'SELECT SCHEMA_NAME()': [('dbo',)],
+        mssql.COLUMNS_SQL: COLUMNS,
+        mssql.INDEXES_SQL: INDEXES,
+        mssql.FOREIGN_KEYS_SQL: FOREIGN_KEYS,
+        mssql.MODULES_SQL: MODULES,
+        mssql.FINGERPRINT_SQL: [('SRV/shop/dbo', 12, datetime.datetime(2024, 5, 1, 12, 30))],
+    })
+
+
+def test_schema(conn):
+    schema = MSSQLAdapter(conn).introspect()
+
+    assert schema.name == 'dbo'
+    assert list(schema.tables) == ['customers', 'orders', 'recent_orders']
+    assert schema['recent_orders'].kind == 'view'
+    assert schema['customers'].columns == [
+        Column('id', 'int', False, None, 1),
+        Column('name', 'nvarchar(50)', False, None, 0),
+        Column('notes', 'varchar(max)', True, None, 0),
+    ]
+    assert schema['orders'].column('total') == Column('total', 'decimal(10, 2)', True, '((0))', 0)
+    assert schema['orders'].column('code') == Column('code', 'char(3)', False, "('NEW')", 1)
+    assert schema['orders'].primary_key == ('code', 'id')
+    assert schema['orders'].indexes == [
+        Index('IX_orders_customer', ('customer_id', 'id')),
+        Index('PK_orders', ('code', 'id'), True, True),
+    ]
+    assert schema['orders'].foreign_keys == [
+        ForeignKey('FK_orders_audit', ('id',), 'log', ('order_id',), 'audit'),
+        ForeignKey('FK_orders_customers', ('customer_id',), 'customers', ('id',)),
+    ]
+
+
+def test_routines(conn):
+    schema = MSSQLAdapter(conn).introspect('dbo')
+
+    assert list(schema.routines.values()) == [
+        Routine('fn_total', 'function', MODULES[0][2]),
+        Routine('tvf_orders', 'function', MODULES[1][2]),
+        Routine('usp_archive', 'procedure', MODULES[2][2]),
+    ]
+    assert repr(schema.routines['usp_archive']) == '<Routine usp_archive (procedure)>'
+
+
+def test_queries(conn):
+    MSSQLAdapter(conn, page_size=4).introspect('sales')
+
+    assert [e[1] for e in conn.executed] == [('sales',)] * 4
+    assert set(conn.fetches) == {4}
+    assert conn.open_cursors == 0
+
+
+def test_fingerprint(conn):
+    assert MSSQLAdapter(conn).fingerprint() == ('SRV/shop/dbo', (12, '2024-05-01 12:30:00'))
+    assert conn.executed[-1] == (mssql.FINGERPRINT_SQL, ('dbo', 'dbo'))
+
+
+def test_add_foreign_keys():
+    schema = Schema('main')
+    schema.table('a')
+    Adapter.add_foreign_keys(schema, [
+        ('a', 'fk', 'x', 'main', 'b', 'p'),
+        ('a', 'fk', 'y', 'main', 'b', 'q'),
+        ('a', 'fk2', 'x', 'other', 'c', 'p'),
+        # tables that weren't read are skipped
+        ('missing', 'fk', 'x', 'main', 'b', 'p'),
+    ])
+
+    assert schema['a'].foreign_keys == [ForeignKey('fk', ('x', 'y'), 'b', ('p', 'q')),
+                                        ForeignKey('fk2', ('x',), 'c', ('p',), 'other')]
+    assert list(schema.tables) == ['a']
+
+
+def test_add_indexes():
+    schema = Schema('main')
+    table = schema.table('a')
+    table.columns = [Column('x'), Column('y'), Column('z')]
+    Adapter.add_indexes(schema, [
+        ('a', 'pk', 1, 1, 'y'),
+        ('a', 'pk', 1, 1, 'x'),
+        ('a', 'ix', 0, 0, 'z'),
+        ('missing', 'pk', 1, 1, 'x'),
+    ])
+
+    assert table.indexes == [Index('pk', ('y', 'x'), True, True), Index('ix', ('z',))]
+    assert table.primary_key == ('y', 'x')
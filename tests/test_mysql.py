@@ -0,0 +1,90 @@
+"""
+``MySQLAdapter`` against catalog rows replayed by a fake cursor.
+"""
+
+# Standard Library
+# Third Party
+import pytest
+# Local
+from database import mysql
+from database.mysql import MySQLAdapter
+from database.schema import Column, ForeignKey, Index
+from fakes import FakeConnection
+
+COLUMNS = [
+    ('customers', 'BASE TABLE', 'id', 'int', 'NO', None),
+    ('customers', 'BASE TABLE', 'region', 'char(2)', 'NO', 'EU'),
+    ('customers', 'BASE TABLE', 'email', 'varchar(100)', 'YES', None),
+    # older connectors return information_schema strings as bytes
+    (b'order_items', b'BASE TABLE', b'order_id', b'int', b'NO', None),
+    (b'order_items', b'BASE TABLE', b'line', b'smallint', b'NO', None),
+    ('orders', 'BASE TABLE', 'id', 'int', 'NO', None),
+    ('orders', 'BASE TABLE', 'cust_id', 'int', 'YES', None),
+    ('orders', 'BASE TABLE', 'cust_region', 'char(2)', 'YES', None),
+    ('recent_orders', 'VIEW', 'id', 'int', 'NO', None),
+]
+
+KEYS = [
+    ('customers', 'PRIMARY', 1, 1, 'region'),
+    ('customers', 'PRIMARY', 1, 1, 'id'),
+    ('customers', 'uq_email', 1, 0, 'email'),
+    (b'order_items', b'PRIMARY', 1, 1, b'order_id'),
+    (b'order_items', b'PRIMARY', 1, 1, b'line'),
+    ('orders', 'PRIMARY', 1, 1, 'id'),
+]
+
+FOREIGN_KEYS = [
+    (b'order_items', b'fk_order', b'order_id', b'shop', b'orders', b'id'),
+    ('orders', 'fk_audit', 'id', 'audit', 'log', 'order_id'),
+    ('orders', 'fk_customer', 'cust_region', 'shop', 'customers', 'region'),
+    ('orders', 'fk_customer', 'cust_id', 'shop', 'customers', 'id'),
+]
+
+
+@pytest.fixture
+def conn():
+    return FakeConnection({
+        'SELECT DATABASE()': [(b'shop',)],
+        mysql.COLUMNS_SQL: COLUMNS,
+        mysql.KEYS_SQL: KEYS,
+        mysql.FOREIGN_KEYS_SQL: FOREIGN_KEYS,
+        mysql.FINGERPRINT_SQL: [(b'db1:3306/shop', '9:123', '6:456')],
+    })
+
+
+def test_schema(conn):
+    schema = MySQLAdapter(conn).introspect()
+
+    assert schema.name == 'shop'
+    assert list(schema.tables) == ['customers', 'order_items', 'orders', 'recent_orders']
+    assert schema['recent_orders'].kind == 'view'
+    assert schema['customers'].columns == [
+        Column('id', 'int', False, None, 2),
+        Column('region', 'char(2)', False, 'EU', 1),
+        Column('email', 'varchar(100)', True, None, 0),
+    ]
+    assert schema['customers'].indexes == [
+        Index('PRIMARY', ('region', 'id'), True, True),
+        Index('uq_email', ('email',), True),
+    ]
+    assert schema['order_items'].primary_key == ('order_id', 'line')
+    assert schema['order_items'].foreign_keys == [ForeignKey('fk_order', ('order_id',), 'orders', ('id',))]
+    assert schema['orders'].foreign_keys == [
+        ForeignKey('fk_audit', ('id',), 'log', ('order_id',), 'audit'),
+        ForeignKey('fk_customer', ('cust_region', 'cust_id'), 'customers', ('region', 'id')),
+    ]
+    assert schema['recent_orders'].indexes == []
+
+
+def test_queries(conn):
+    MySQLAdapter(conn, page_size=2).introspect('shop')
+
+    assert conn.executed == [(mysql.COLUMNS_SQL, ('shop',)), (mysql.KEYS_SQL, ('shop',)),
+                             (mysql.FOREIGN_KEYS_SQL, ('shop',))]
+    assert set(conn.fetches) == {2}
+    assert conn.open_cursors == 0
+
+
+def test_fingerprint(conn):
+    assert MySQLAdapter(conn).fingerprint() == ('db1:3306/shop', ('9:123', '6:456'))
+    assert conn.executed[-1] == (mysql.FINGERPRINT_SQL, ('shop', 'shop', 'shop'))
@@ -0,0 +1,77 @@
+"""
+Encoding in worker processes (Stage.encode_parallel()) & pickling Entities.
+"""
+
+# Standard Library
+import multiprocessing
+import pickle
+# Third Party
+import pytest
+# Local
+from gliffy import stage
+from gliffy.entities import Entity
+from gliffy.gliffy import Gliffy
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                                reason='worker processes are forked')
+
+
+def diagram(workers, mode):
+    # type: (int, str) -> Gliffy
+    g = Gliffy().set_workers(workers).set_styles(mode)
+    tables = [g.table('table_{}'.format(i), ['id'] + ['col_{}_{}'.format(i, j) for j in range(i % 7)])
+              for i in range(60)]
+    tables.append(g.table('red', ['id'], {'column_text': {'font-size': '12px', 'color': '#FF0000'}}))
+    g.add(tables)
+    for i in range(1, 60, 3):
+        g.link(tables[i].children[1], tables[i - 1].children[1])
+
+    return g
+
+
+@pytest.mark.parametrize('mode', ['inline', 'shared'])
+def test_parallel_output_is_byte_identical(monkeypatch, mode):
+    monkeypatch.setattr(stage, 'PARALLEL_MIN', 8)
+    adopted = []
+    set_json = Entity.set_json
+    monkeypatch.setattr(Entity, 'set_json', lambda self, fragment: adopted.append(self) or set_json(self, fragment))
+    serial = diagram(1, mode)
+    parallel = diagram(3, mode)
+
+    assert parallel.to_json() == serial.to_json()
+    assert len(adopted) == len(parallel.stage.children)
+    # the workers' JSON is cached, so nothing is encoded again
+    assert not any(c.dirty for c in parallel.stage.children)
+
+    # redraws after changing one cell, & after changing enough to use the workers again
+    for g in (serial, parallel):
+        g.stage.children[5].children[1].children[0].graphic.set_text('changed')
+    assert parallel.to_json() == serial.to_json()
+    for g in (serial, parallel):
+        for c in g.stage.children[:30]:
+            c.children[0].children[0].graphic.set_text('renamed')
+    assert parallel.to_json() == serial.to_json()
+
+
+def test_entities_round_trip_through_pickle():
+    g = Gliffy()
+    table = g.table('users', ['id', 'name'])
+    g.add([table])
+    before = g.to_json()
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy.to_json() == table.to_json()
+    assert copy.parent is None
+    for cell in copy.children:
+        assert cell.parent is copy
+        assert cell.graphic.owner is cell
+    # the styles are interned again
+    for copied, cell in zip(copy.children, table.children):
+        assert copied.graphic.style is cell.graphic.style
+        assert copied.children[0].graphic.style is cell.children[0].graphic.style
+
+    # a subtree is pickled without its parent
+    cell = pickle.loads(pickle.dumps(table.children[1]))
+    assert cell.parent is None
+    assert cell.to_json() == table.children[1].to_json()
+    assert g.to_json() == before
@@ -0,0 +1,75 @@
+"""
+Router: routes around obstacles & the route cache.
+"""
+
+# Standard Library
+# Third Party
+# Local
+from gliffy.routing import Router
+
+SOURCE = (20, 100, 80, 140)
+TARGET = (320, 100, 380, 140)
+# between the source & target
+WALL = (150, 40, 170, 200)
+
+
+def crosses(points, box):
+    # type: (list, tuple) -> bool
+    """
+    :return: True if any segment of the orthogonal route passes through the box's inside
+    """
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if box[0] < max(x0, x1) and min(x0, x1) < box[2] and box[1] < max(y0, y1) and min(y0, y1) < box[3]:
+            return True
+
+    return False
+
+
+def test_routes_go_around_obstacles():
+    router = Router().update([SOURCE, TARGET, WALL], 400, 300)
+    points = router.route(SOURCE, TARGET)
+
+    assert points[0] == [SOURCE[2], 120]
+    assert points[-1] == [TARGET[0], 120]
+    assert not crosses(points, WALL)
+
+
+def test_cache_survives_a_resize():
+    router = Router().update([SOURCE, TARGET, WALL], 400, 300)
+    points = router.route(SOURCE, TARGET)
+    router.update([SOURCE, TARGET, WALL], 1200, 900)
+
+    assert router.route(SOURCE, TARGET) == points
+    assert (router.hits, router.misses) == (1, 1)
+
+
+def test_resize_only_drops_routes_through_changed_cells():
+    router = Router().update([SOURCE, TARGET, WALL], 400, 300)
+    points = router.route(SOURCE, TARGET)
+    other = router.route((20, 220, 80, 260), (320, 220, 380, 260))
+    # grows the area & blocks the first route, but not the second
+    blocker = (100, 180, 140, 220)
+    router.update([SOURCE, TARGET, WALL, blocker], 800, 300)
+
+    assert router.route((20, 220, 80, 260), (320, 220, 380, 260)) == other
+    rerouted = router.route(SOURCE, TARGET)
+    assert rerouted != points
+    assert not crosses(rerouted, blocker)
+    assert (router.hits, router.misses) == (1, 3)
+
+
+def test_routes_outside_a_smaller_area_are_dropped():
+    router = Router().update([SOURCE, TARGET], 400, 300)
+    router.route(SOURCE, TARGET)
+    router.update([SOURCE, TARGET], 400, 300, 200, 0)
+
+    assert not router.cache
+
+
+def test_unaligned_area():
+    router = Router().update([SOURCE, TARGET, WALL], 395, 295, 5, 5)
+    points = router.route(SOURCE, TARGET)
+
+    assert points[0] == [SOURCE[2], 120]
+    assert points[-1] == [TARGET[0], 120]
+    assert not crosses(points, WALL)
@@ -0,0 +1,128 @@
+"""
+Schema snapshots: round trips, reuse while the catalog fingerprint is unchanged & atomic writes.
+"""
+
+# Standard Library
+import glob
+import os
+import sqlite3
+# Third Party
+import pytest
+# Local
+from database import snapshot
+from database.snapshot import SnapshotCache
+from database.sqlite import SQLiteAdapter
+
+DDL = '''
+CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT UNIQUE);
+CREATE TABLE posts (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), body TEXT);
+CREATE INDEX posts_user ON posts (user_id);
+'''
+
+
+def execute(path, script):
+    # type: (str, str) -> None
+    # the adapter's connection is read only
+    conn = sqlite3.connect(path)
+    conn.executescript(script)
+    conn.close()
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    execute(str(tmp_path / 'test.db'), DDL)
+    adapter = SQLiteAdapter.connect(str(tmp_path / 'test.db'))
+    yield adapter
+    adapter.connection.close()
+
+
+def count_introspects(monkeypatch):
+    # type: (Any) -> list
+    calls = []
+    introspect = SQLiteAdapter.introspect
+    monkeypatch.setattr(SQLiteAdapter, 'introspect',
+                        lambda self, schema=None: calls.append(schema) or introspect(self, schema))
+
+    return calls
+
+
+def snapshots(directory):
+    # type: (str) -> list
+    return glob.glob(os.path.join(directory, '*' + snapshot.EXTENSION))
+
+
+def test_round_trip(adapter, tmp_path):
+    schema = adapter.introspect()
+    path = str(tmp_path / 'schema.snapshot')
+    snapshot.save(path, schema)
+
+    assert snapshot.load(path) == schema
+    assert list(snapshot.load(path).tables) == ['posts', 'users']
+
+
+def test_other_files_arent_loaded(tmp_path):
+    path = str(tmp_path / 'bad.snapshot')
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+
+    with pytest.raises(ValueError):
+        snapshot.load(path)
+
+
+def test_other_versions_arent_loaded(adapter, tmp_path, monkeypatch):
+    path = str(tmp_path / 'schema.snapshot')
+    snapshot.save(path, adapter.introspect())
+    monkeypatch.setattr(snapshot, 'VERSION', snapshot.VERSION + 1)
+
+    with pytest.raises(ValueError):
+        snapshot.load(path)
+
+
+def test_unchanged_fingerprint_skips_introspect(adapter, tmp_path, monkeypatch):
+    directory = str(tmp_path / 'snapshots')
+    expected = adapter.introspect()
+    calls = count_introspects(monkeypatch)
+
+    first = SnapshotCache(directory)
+    assert first.introspect(adapter) == expected
+    assert (len(calls), first.hits, first.misses) == (1, 0, 1)
+
+    second = SnapshotCache(directory)
+    assert second.introspect(adapter) == expected
+    assert (len(calls), second.hits, second.misses) == (1, 1, 0)
+
+
+def test_changed_fingerprint_introspects_again(adapter, tmp_path, monkeypatch):
+    directory = str(tmp_path / 'snapshots')
+    cache = SnapshotCache(directory)
+    cache.introspect(adapter)
+    execute(str(tmp_path / 'test.db'), 'CREATE TABLE tags (id INTEGER PRIMARY KEY, label TEXT);')
+    calls = count_introspects(monkeypatch)
+
+    schema = cache.introspect(adapter)
+    assert len(calls) == 1
+    assert 'tags' in schema.tables
+    # only the snapshot of the latest fingerprint is kept
+    assert len(snapshots(directory)) == 1
+    assert cache.introspect(adapter) == schema
+    assert len(calls) == 1
+
+
+def test_failed_write_leaves_no_tmp_file(adapter, tmp_path, monkeypatch):
+    schema = adapter.introspect()
+    path = str(tmp_path / 'schema.snapshot')
+    snapshot.save(path, schema)
+
+    def fail(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(os, 'replace', fail)
+    execute(str(tmp_path / 'test.db'), 'CREATE TABLE tags (id INTEGER PRIMARY KEY);')
+    changed = adapter.introspect()
+    assert changed != schema
+    with pytest.raises(OSError):
+        snapshot.save(path, changed)
+
+    assert glob.glob(str(tmp_path / '*.tmp')) == []
+    # the old snapshot is still there, whole
+    assert snapshot.load(path) == schema
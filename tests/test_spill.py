@@ -0,0 +1,78 @@
+"""
+Spilling (Gliffy.set_spill()) writes the same JSON as keeping the diagram in memory.
+"""
+
+# Standard Library
+import sqlite3
+# Third Party
+import pytest
+# Local
+from database.sqlite import SQLiteAdapter
+from gliffy.spill import Spilled
+from main import GliffyDB
+
+DDL = '''
+CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT);
+CREATE TABLE posts (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), body TEXT);
+CREATE TABLE tags (id INTEGER PRIMARY KEY, label TEXT);
+CREATE TABLE post_tags (
+    post_id INTEGER REFERENCES posts (id),
+    tag_id INTEGER REFERENCES tags (id),
+    PRIMARY KEY (post_id, tag_id)
+);
+'''
+# drops a table, changes one, adds one & links to it
+CHANGES = '''
+DROP TABLE tags;
+CREATE TABLE tags (id INTEGER PRIMARY KEY, label TEXT, color TEXT);
+DROP TABLE post_tags;
+CREATE TABLE comments (id INTEGER PRIMARY KEY, post_id INTEGER REFERENCES posts (id), body TEXT);
+'''
+
+
+def read_schema(path, script):
+    # type: (str, str) -> Schema
+    conn = sqlite3.connect(path)
+    conn.executescript(script)
+    conn.close()
+    adapter = SQLiteAdapter.connect(path)
+    try:
+        return adapter.introspect()
+    finally:
+        adapter.connection.close()
+
+
+@pytest.fixture(scope='module')
+def schemas(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('spill') / 'test.db')
+    # more tables, so the diagram is laid out over several shelves
+    extra = ''.join('CREATE TABLE t{0} (id INTEGER PRIMARY KEY, users_id INTEGER REFERENCES users (id), c{0} TEXT);'
+                    .format(i) for i in range(30))
+    first = read_schema(path, DDL + extra)
+
+    return first, read_schema(path, CHANGES)
+
+
+def draw(schemas, mode, spill_dir=None):
+    # type: (tuple, str, str) -> list
+    gdb = GliffyDB()
+    gdb.g.set_styles(mode)
+    if spill_dir is not None:
+        gdb.g.set_spill(spill_dir)
+    first, second = schemas
+    outputs = [gdb.make_tables(first), gdb.update_tables(second)]
+    if spill_dir is not None:
+        assert all(isinstance(c, Spilled) for c in gdb.g.stage.children)
+
+    return outputs
+
+
+@pytest.mark.parametrize('mode', ['inline', 'shared'])
+def test_spilled_output_is_byte_identical(schemas, mode, tmp_path):
+    in_memory = draw(schemas, mode)
+    spilled = draw(schemas, mode, str(tmp_path))
+
+    assert spilled[0] == in_memory[0]
+    # after update_tables() removed, redrew & added tables
+    assert spilled[1] == in_memory[1]
+    assert spilled[1] != spilled[0]
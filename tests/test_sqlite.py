@@ -0,0 +1,119 @@
+"""
+``SQLiteAdapter`` reads tables, keys & indexes from a real SQLite file.
+"""
+
+# Standard Library
+import sqlite3
+import time
+# Third Party
+import pytest
+# Local
+from database.schema import Column, ForeignKey, Index
+from database.sqlite import SQLiteAdapter
+
+DDL = '''
+CREATE TABLE parent (
+    a INTEGER NOT NULL,
+    b TEXT NOT NULL DEFAULT 'x',
+    note VARCHAR(20),
+    PRIMARY KEY (b, a)
+);
+CREATE TABLE child (
+    id INTEGER PRIMARY KEY,
+    pa INTEGER,
+    pb TEXT,
+    FOREIGN KEY (pb, pa) REFERENCES parent (b, a)
+);
+CREATE TABLE b_orphan (
+    id INTEGER PRIMARY KEY,
+    -- the parent is read after this table & the key has no columns
+    pid INTEGER REFERENCES z_parent,
+    -- the parent's key has 2 columns
+    pb TEXT, pa INTEGER,
+    FOREIGN KEY (pb, pa) REFERENCES parent
+);
+CREATE TABLE z_parent (
+    code TEXT PRIMARY KEY,
+    name TEXT UNIQUE
+);
+CREATE INDEX child_pa ON child (pa, pb);
+CREATE UNIQUE INDEX parent_note ON parent (note);
+CREATE VIEW child_view AS SELECT id, pa FROM child;
+'''
+
+
+@pytest.fixture(scope='module')
+def schema(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('sqlite') / 'test.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(DDL)
+    conn.close()
+    adapter = SQLiteAdapter.connect(path)
+    yield adapter.introspect()
+    adapter.connection.close()
+
+
+def test_tables(schema):
+    assert list(schema.tables) == ['b_orphan', 'child', 'child_view', 'parent', 'z_parent']
+    assert schema['child_view'].kind == 'view'
+    assert schema['parent'].kind == 'table'
+    assert schema['parent'].columns == [
+        Column('a', 'INTEGER', False, None, 2),
+        Column('b', 'TEXT', False, "'x'", 1),
+        Column('note', 'VARCHAR(20)', True, None, 0),
+    ]
+
+
+def test_primary_keys(schema):
+    assert schema['parent'].primary_key == ('b', 'a')
+    assert schema['child'].primary_key == ('id',)
+    assert schema['z_parent'].primary_key == ('code',)
+    assert schema['child_view'].primary_key == ()
+
+
+def test_multi_column_foreign_key(schema):
+    assert schema['child'].foreign_keys == [ForeignKey(None, ('pb', 'pa'), 'parent', ('b', 'a'))]
+
+
+def test_bare_references(schema):
+    # both parents are read after b_orphan, so their primary keys are looked up
+    assert schema['b_orphan'].foreign_keys == [
+        ForeignKey(None, ('pb', 'pa'), 'parent', ('b', 'a')),
+        ForeignKey(None, ('pid',), 'z_parent', ('code',)),
+    ]
+
+
+def test_indexes(schema):
+    assert schema['child'].indexes == [Index('child_pa', ('pa', 'pb'))]
+    assert schema['parent'].indexes == [
+        Index('parent_note', ('note',), True),
+        Index('sqlite_autoindex_parent_1', ('b', 'a'), True, True),
+    ]
+    assert schema['z_parent'].indexes == [
+        Index('sqlite_autoindex_z_parent_1', ('code',), True, True),
+        Index('sqlite_autoindex_z_parent_2', ('name',), True),
+    ]
+
+
+
+def test_introspecting_many_tables_is_fast(tmp_path):
+    path = str(tmp_path / 'big.db')
+    n = 2000
+    conn = sqlite3.connect(path)
+    # in one transaction, or building it takes longer than the test
+    conn.executescript('BEGIN; CREATE TABLE t0 (id INTEGER PRIMARY KEY, name TEXT);' + ''.join(
+        'CREATE TABLE t{0} (id INTEGER PRIMARY KEY, prev_id INTEGER REFERENCES t{1} (id), name TEXT, c{0} INTEGER);'
+        'CREATE INDEX t{0}_prev ON t{0} (prev_id, name);'.format(i, i - 1) for i in range(1, n)) + 'COMMIT;')
+    conn.close()
+    adapter = SQLiteAdapter.connect(path)
+    try:
+        start = time.perf_counter()
+        big = adapter.introspect()
+        elapsed = time.perf_counter() - start
+    finally:
+        adapter.connection.close()
+
+    assert len(big.tables) == n
+    assert big['t1999'].foreign_keys == [ForeignKey(None, ('prev_id',), 't1998', ('id',))]
+    assert big['t1999'].indexes == [Index('t1999_prev', ('prev_id', 'name'))]
+    assert elapsed < 1.0, elapsed
@@ -0,0 +1,293 @@
+"""
+Stage numbering & Lines.
+"""
+
+# Standard Library
+import io
+import itertools
+import json
+import sys
+# Third Party
+import pytest
+# Local
+from gliffy import ids as ids_module, styles
+from gliffy.entities import Entity
+from gliffy.gliffy import Gliffy
+from gliffy.ids import IdAllocator
+
+
+def all_ids(doc):
+    # type: (dict) -> list
+    ids = []
+    stack = list(doc['stage']['objects'])
+    while stack:
+        obj = stack.pop()
+        ids.append(obj['id'])
+        stack.extend(obj.get('children') or ())
+
+    return ids
+
+
+def lines(doc):
+    # type: (dict) -> list
+    return [o for o in doc['stage']['objects'] if o['graphic']['type'] == 'Line']
+
+
+def linked_tables(g, n=6):
+    # type: (Gliffy, int) -> list
+    """
+    :return: n tables on the Stage, each linked to the one before it
+    :rtype: list
+    """
+    tables = [g.table('t{}'.format(i), ['id', 'prev_id']) for i in range(n)]
+    g.add(tables)
+    for a, b in zip(tables[1:], tables):
+        g.link(a.children[2], b.children[1])
+
+    return tables
+
+
+def used_ids(ent):
+    # type: (Entity) -> list
+    """
+    :return: The ids of the Entity & its descendants, with the id each childless non-Group Entity reserves
+             after its own
+    :rtype: list
+    """
+    ids = []
+    stack = [ent]
+    while stack:
+        e = stack.pop()
+        ids.append(e.id)
+        if not e.children and not e.is_type('group'):
+            ids.append(e.id + 1)
+        stack.extend(e.children)
+
+    return ids
+
+
+def test_add_only_numbers_the_new_entities(monkeypatch):
+    numbered = []
+    number = IdAllocator.number
+    monkeypatch.setattr(IdAllocator, 'number', lambda self, ent, *a: numbered.append(ent) or number(self, ent, *a))
+    visits = []
+    is_type = Entity.is_type
+    monkeypatch.setattr(Entity, 'is_type', lambda self, t: visits.append(self) or is_type(self, t))
+    g = Gliffy()
+    per_add = []
+    for i in range(50):
+        table = g.table('t{}'.format(i), ['id', 'name'])
+        del numbered[:], visits[:]
+        g.add([table])
+        assert numbered == [table]
+        per_add.append(len(visits))
+
+    # the cost of an add doesn't grow with what's already on the Stage
+    assert per_add == [per_add[0]] * 50
+
+
+def test_node_index_is_one_past_the_last_id():
+    g = Gliffy()
+    for i in range(5):
+        g.add([g.table('t{}'.format(i), ['id'] * i), g.rectangle({})])
+        group = g.group()
+        group.add_child(g.rectangle({}))
+        g.add([group])
+        ids = [eid for c in g.stage.children for eid in used_ids(c)]
+
+        assert len(ids) == len(set(ids))
+        assert g.stage.node_index == max(ids) + 1
+
+
+def test_deeply_nested_groups_are_numbered():
+    g = Gliffy()
+    depth = sys.getrecursionlimit() * 3
+    inner = g.rectangle({})
+    top = inner
+    for _ in range(depth):
+        group = g.group()
+        group.add_child(top)
+        top = group
+    g.add([top])
+
+    # the innermost Entity comes first & each Group is numbered after its children
+    assert inner.id == 0
+    assert top.id == depth + 1
+    assert g.stage.node_index == depth + 2
+
+
+@pytest.mark.parametrize('mode', ['inline', 'shared'])
+def test_write_matches_get_type_def(mode):
+    g = Gliffy().set_styles(mode)
+    tables = linked_tables(g)
+    buf = io.StringIO()
+    g.dump(buf)
+
+    assert lines(json.loads(buf.getvalue()))
+    assert buf.getvalue() == json.dumps(g.stage.get_type_def())
+    # again, from the cached JSON, after a change
+    tables[2].children[1].children[0].graphic.set_text('changed')
+    assert g.to_json() == json.dumps(g.stage.get_type_def())
+
+
+@pytest.mark.parametrize('mode', ['sequential', 'stable'])
+def test_renumber_keeps_lines_below_the_node_index(mode):
+    g = Gliffy()
+    g.set_ids(mode)
+    a = g.table('a', ['id', 'b_id'])
+    b = g.table('b', ['id'])
+    g.add([a, b])
+    g.link(a.children[2], b.children[1])
+    json.loads(g.to_json())
+
+    # added to a table that's already on the Stage, so everything has to be renumbered
+    for col in ('x', 'y', 'z'):
+        cell = g.table('', [col]).children[1]
+        a.add_child(cell)
+    g.stage.renumber()
+    doc = json.loads(g.to_json())
+
+    ids = all_ids(doc)
+    assert len(ids) == len(set(ids))
+    assert max(ids) < doc['stage']['nodeIndex']
+    (line,) = lines(doc)
+    assert line['constraints']['startConstraint']['StartPositionConstraint']['nodeId'] == str(a.children[2].id)
+    assert line['constraints']['endConstraint']['EndPositionConstraint']['nodeId'] == str(b.children[1].id)
+
+
+def test_renumber_is_repeatable():
+    g = Gliffy()
+    a = g.table('a', ['id', 'b_id'])
+    b = g.table('b', ['id'])
+    g.add([a, b])
+    g.link(a.children[2], b.children[1])
+    first = g.to_json()
+    g.stage.renumber()
+
+    assert g.to_json() == first
+
+
+def full_counts(stage):
+    # type: (Any) -> tuple
+    table = styles.StyleTable().collect(stage.children)
+    return dict(table.text_counts), {tid: dict(c) for tid, c in table.shape_counts.items()}
+
+
+def test_shared_style_counts_are_kept_up_to_date(monkeypatch):
+    g = Gliffy().set_styles('shared')
+    tables = [g.table('t{}'.format(i), ['id', 'name']) for i in range(4)]
+    g.add(tables)
+    g.to_json()
+    stage = g.stage
+    assert (dict(stage.styles.text_counts), stage.styles.shape_counts) == full_counts(stage)
+
+    # a clean write doesn't walk the Entities again
+    walked = []
+    collect = styles.StyleTable.collect
+    monkeypatch.setattr(styles.StyleTable, 'collect', lambda self, ents: walked.extend(ents) or collect(self, ents))
+    first = g.to_json()
+    assert walked == []
+
+    # only the changed table is counted again
+    cell = g.table('', ['x'], {'column_text': {'font-size': '12px', 'color': '#FF0000'}}).children[1]
+    tables[1].add_child(cell)
+    g.to_json()
+    assert walked == [tables[1]]
+    assert (dict(stage.styles.text_counts), stage.styles.shape_counts) == full_counts(stage)
+
+    g.remove(tables[1])
+    assert (dict(stage.styles.text_counts), stage.styles.shape_counts) == full_counts(stage)
+    assert g.to_json() != first
+    monkeypatch.undo()
+    fresh = Gliffy().set_styles('shared')
+    fresh.add([fresh.table('t{}'.format(i), ['id', 'name']) for i in (0, 2, 3)])
+    fresh.to_json()
+    for table in ('textStyles', 'shapeStyles'):
+        assert stage.type_def['stage'][table] == fresh.stage.type_def['stage'][table]
+
+
+@pytest.mark.parametrize('setter, good, setting', [
+    ('set_layout', 'Force', 'layout'),
+    ('set_styles', 'SHARED', 'styles'),
+    ('set_ids', 'Stable', 'ids'),
+])
+def test_unknown_modes_raise(setter, good, setting):
+    g = Gliffy()
+    before = g.stage.settings[setting]
+    with pytest.raises(ValueError):
+        getattr(g, setter)('nonsense')
+    assert g.stage.settings[setting] == before
+
+    getattr(g, setter)(good)
+    assert g.stage.settings[setting] == good.lower()
+
+
+def stable_diagram(names):
+    # type: (list) -> dict
+    """
+    :return: Table name -> the (id, order) of each of its Entities, in the JSON of a diagram with 'stable' ids
+             of tables linked one to the next
+    :rtype: dict
+    """
+    g = Gliffy().set_ids('stable')
+    tables = [g.table(name, ['id', 'next_id', name + '_note']) for name in names]
+    g.add(tables, [('table', name) for name in names])
+    for a, b in zip(tables, tables[1:]):
+        g.link(a.children[2], b.children[1])
+    doc = json.loads(g.to_json())
+    numbers = {}
+    for name, obj in zip(names, doc['stage']['objects']):
+        numbers[name] = []
+        stack = [obj]
+        while stack:
+            o = stack.pop()
+            numbers[name].append((o['id'], o['order']))
+            stack.extend(o['children'] or ())
+
+    return numbers
+
+
+def test_stable_ids_dont_change_when_a_table_is_inserted():
+    names = ['t{}'.format(i) for i in range(10)]
+    before = stable_diagram(names)
+    after = stable_diagram(names[:5] + ['inserted'] + names[5:])
+
+    assert list(after) == names[:5] + ['inserted'] + names[5:]
+    for name in names:
+        assert after[name] == before[name]
+
+
+def test_stable_ids_rehash_collisions(monkeypatch):
+    # so few blocks that keys are bound to collide
+    monkeypatch.setattr(ids_module, 'SLOTS', 4)
+    first = IdAllocator(stable=True)
+    blocks = {}
+    for i in itertools.count():
+        block = first.start(('table', 't{}'.format(i)))[0] // ids_module.BLOCK
+        first.taken.clear()
+        if block in blocks:
+            a, b = blocks[block], 't{}'.format(i)
+            break
+        blocks[block] = 't{}'.format(i)
+
+    g = Gliffy().set_ids('stable')
+    ta, tb = g.table(a, ['id']), g.table(b, ['id'])
+    g.add([ta, tb], [('table', a), ('table', b)])
+
+    assert ta.id // ids_module.BLOCK != tb.id // ids_module.BLOCK
+    assert not set(used_ids(ta)) & set(used_ids(tb))
+    assert g.stage.ids.key(ta.id) == ('table', a)
+    assert g.stage.ids.key(tb.id) == ('table', b)
+
+
+def test_stable_node_index_is_above_every_id():
+    g = Gliffy().set_ids('stable')
+    tables = linked_tables(g, 20)
+    doc = json.loads(g.to_json())
+
+    assert doc['stage']['nodeIndex'] > max(all_ids(doc))
+    assert g.stage.node_index > max(i for t in tables for i in used_ids(t))
+    # & after removing the table with the highest block
+    g.remove(max(tables, key=lambda t: t.id))
+    doc = json.loads(g.to_json())
+    assert doc['stage']['nodeIndex'] > max(all_ids(doc))
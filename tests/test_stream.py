@@ -0,0 +1,104 @@
+"""
+Streaming a schema (``SQLiteAdapter.iter_tables()`` -> ``GliffyDB.stream_tables()``) keeps memory flat.
+"""
+
+# Standard Library
+import json
+import sqlite3
+import subprocess
+import sys
+# Third Party
+import pytest
+# Local
+from conftest import ROOT
+
+resource = pytest.importorskip('resource')
+
+SIZES = (1000, 5000, 20000)
+
+# each table's own memory (KB) once it's been written: the ids & boxes of the columns Lines can be drawn
+# to, which have to be kept until the Lines are drawn; a table drawn in memory takes ~200x as much
+PER_TABLE = 1.5
+
+# run in a new process for each size, since ru_maxrss is the process' peak
+SCRIPT = '''
+import resource, sys
+import database
+from main import GliffyDB
+
+adapter = database.connect(sys.argv[1])
+# SQLite keeps the parsed schema of every table, which isn't the drawing's memory
+adapter.scalar('SELECT COUNT(*) FROM sqlite_master')
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open(sys.argv[2], 'w') as f:
+    GliffyDB().stream_tables(adapter.iter_tables(), f)
+print(base, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def make_db(path, n):
+    # type: (str, int) -> None
+    """
+    Makes a SQLite file of ``n`` tables with 20 columns each; every 3rd table references a table just before it.
+    """
+    conn = sqlite3.connect(path)
+    for i in range(n):
+        ref = 'ref INTEGER REFERENCES t{:05d}(id), '.format(max(i - 1 - i % 7, 0)) if i % 3 == 0 else ''
+        cols = ', '.join('c{}_{} TEXT'.format(i, j) for j in range(20))
+        conn.execute('CREATE TABLE t{:05d} (id INTEGER PRIMARY KEY, {}{})'.format(i, ref, cols))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(scope='module')
+def streamed(tmp_path_factory):
+    """
+    :return: {size: (peak RSS above the baseline in KB, path of the JSON)}
+    """
+    tmp = tmp_path_factory.mktemp('stream')
+    result = {}
+    for n in SIZES:
+        db = str(tmp / 's{}.db'.format(n))
+        out = str(tmp / 's{}.gliffy'.format(n))
+        make_db(db, n)
+        proc = subprocess.run([sys.executable, '-c', SCRIPT, db, out], cwd=ROOT, check=True,
+                              stdout=subprocess.PIPE, universal_newlines=True)
+        base, peak = (int(v) for v in proc.stdout.split())
+        if sys.platform == 'darwin':
+            # bytes rather than KB
+            base, peak = base // 1024, peak // 1024
+        result[n] = (peak - base, out)
+
+    return result
+
+
+def test_peak_rss_is_flat(streamed):
+    small = SIZES[0]
+    for n in SIZES[1:]:
+        grown = streamed[n][0] - streamed[small][0]
+        assert grown < (n - small) * PER_TABLE, '{} tables took {} KB more than {}'.format(n, grown, small)
+
+
+@pytest.mark.parametrize('n', SIZES)
+def test_lines_resolve(streamed, n):
+    with open(streamed[n][1]) as f:
+        doc = json.load(f)
+
+    ids = set()
+    lines = []
+    stack = list(doc['stage']['objects'])
+    while stack:
+        obj = stack.pop()
+        ids.add(str(obj['id']))
+        if obj['graphic'] is not None and obj['graphic']['type'] == 'Line':
+            lines.append(obj)
+        stack.extend(obj.get('children') or ())
+
+    assert sum(1 for obj in doc['stage']['objects'] if obj['graphic'] is None or obj['graphic']['type'] != 'Line') == n
+    # 1 Line per foreign key
+    assert len(lines) == (n + 2) // 3
+    for line in lines:
+        constraints = line['constraints']
+        assert constraints['startConstraint']['StartPositionConstraint']['nodeId'] in ids
+        assert constraints['endConstraint']['EndPositionConstraint']['nodeId'] in ids
+        assert len(line['graphic']['Line']['controlPath']) >= 2
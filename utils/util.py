@@ -3,6 +3,10 @@ Generic utility functions
 """
 
 # Standard Library
+import gc
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
 # Third Party
 # Local
 
@@ -62,38 +66,127 @@ def join_dicts(*dicts):
     if any(not isinstance(d, dict) for d in dicts):
         raise ValueError('`join_dicts` can only process dict-like objects.')
 
-    # the only values that matter in the end are the ones in the right-most dicts
-    # looping over them in 'right -> left' order saves time
-    dicts = list(dicts)
-    res = dicts.pop(0)
-    dicts.reverse()
-
-    '''
-    Using a function since there's no way to break out of nested loops, and
-      we don't want to keep looking if we've already found a value to assign.
-    We also have to raise an exception since there's no way to tell if the
-      found value is actually 'None' or if the function is simply returning
-      'None' by default because no value was found.
-    '''
-    def _find_key(_key, _dicts):
-        # type: (str, list) -> Any
-        for _d in _dicts:
-            if isinstance(_d, dict) and _key in _d:
-                return _d[_key]
-        raise ValueError('no value')
-
-    for key in res:
-        try:
-            if isinstance(res[key], dict):
-                # grab sub-dicts from remaining dicts & un-reverse so they're handled properly
-                dicts_key = [d[key] for d in dicts if key in d]
-                dicts_key.reverse()
-                join_dicts(res[key], *dicts_key)
-            else:
-                res[key] = _find_key(key, dicts)
-        except ValueError:
-            continue
-        except KeyError:
-            print('\n\n', 'KeyError in join_dicts:\n-------------------------\n', 'args: ', dicts, '\n\n')
-            raise
+    # (dict to update, dicts to take values from) pairs; sub-dicts are queued instead of recursed into
+    stack = [(dicts[0], dicts[1:])]
+    while stack:
+        res, others = stack.pop()
+        # decided up front, since a sub-dict's key may get a non-dict value from another dict
+        nested = {k for k, v in res.items() if isinstance(v, dict)}
+        subs = {}
+        # a single left -> right pass over the keys of each dict, so the right-most value wins
+        for d in others:
+            for key, value in d.items():
+                if key not in res:
+                    continue
+                if key in nested:
+                    subs.setdefault(key, []).append(value)
+                else:
+                    res[key] = value
+        for key, values in subs.items():
+            # a sub-dict is left alone if any of the values for it aren't dicts
+            if all(isinstance(v, dict) for v in values):
+                stack.append((res[key], values))
+
+
+def json_split(dic, key):
+    # type: (dict, str) -> tuple
+    """
+    Splits the JSON encoding of a dict around one of its keys, so the value for that key can be written
+    separately (e.g. streamed in pieces to a file).
+
+    ``head + json.dumps(dic[key]) + tail`` is byte-identical to ``json.dumps(dic)``.
+
+    Example::
+
+        a = OrderedDict([('one', 1), ('two', [1, 2]), ('three', 3)])
+
+        json_split(a, 'two')
+            ('{"one": 1, "two": ', ', "three": 3}')
 
+    :param dict dic: The dict to encode
+    :param str key: The key whose value will be written by the caller
+    :return: The (head, tail) JSON strings surrounding the key's value
+    :rtype: tuple
+    :raises: :py:class:`KeyError`
+    """
+    if key not in dic:
+        raise KeyError('`json_split` key `{}` is not in the dict.'.format(key))
+
+    before = OrderedDict()
+    after = OrderedDict()
+    cur = before
+    for k, v in dic.items():
+        if k == key:
+            cur = after
+        else:
+            cur[k] = v
+
+    # strip the closing/opening braces so the pieces can be glued together
+    head = json.dumps(before)[:-1]
+    if before:
+        head += ', '
+    head += json.dumps(key) + ': '
+    tail = ', ' + json.dumps(after)[1:] if after else '}'
+
+    return head, tail
+
+
+def json_splice(dic, raw):
+    # type: (dict, dict) -> str
+    """
+    JSON encodes a dict, using already-encoded JSON strings for some of its values.
+
+    Lets cached JSON fragments be reused without decoding & re-encoding them.
+    The result is byte-identical to ``json.dumps()`` of the dict with the decoded values.
+
+    Example::
+
+        a = OrderedDict([('one', 1), ('two', None), ('three', 3)])
+
+        json_splice(a, {'two': '[1, 2]'})
+            '{"one": 1, "two": [1, 2], "three": 3}'
+
+    :param dict dic: The dict to encode
+    :param dict raw: Map of key -> JSON string to use in place of the dict's value for that key
+    :return: JSON string
+    :rtype: str
+    """
+    parts = []
+    run = OrderedDict()
+    for k, v in dic.items():
+        if k in raw:
+            # encode the pending 'plain' keys in a single pass
+            if run:
+                parts.append(json.dumps(run)[1:-1])
+                run.clear()
+            parts.append(json.dumps(k) + ': ' + raw[k])
+        else:
+            run[k] = v
+    if run:
+        parts.append(json.dumps(run)[1:-1])
+
+    return '{' + ', '.join(parts) + '}'
+
+
+@contextmanager
+def gc_paused():
+    # type: () -> Iterator[None]
+    """
+    Pauses the cyclic garbage collector, e.g. while building a big diagram.
+
+    Making hundreds of thousands of Entities keeps triggering collections that scan every
+    object made so far (& find nothing to free), which can cost more than making them.
+    The collector is restored afterwards if it was on, & nested pauses are fine.
+
+    Example::
+
+        with gc_paused():
+            ents = [g.table(t.name, [c.name for c in t.columns]) for t in schema]
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -53,3 +53,34 @@ def in_dict_as_type(dic, key, val_type, opt_convert=False, opt_raise=False):
     else:
         return False
 
+
+def type_converter(val_type):
+    # type: (Any) -> Callable
+    """
+    Precompiles the check & conversion ``in_dict_as_type(..., opt_convert=True)`` does for a type, so it can
+    be applied to many values without working out what to do each time.
+
+    ``'hex'`` checks for a hex color code: a ``str``, given a leading # if it doesn't have one.
+
+    :param Any val_type: Type of value to check for
+    :return: A function that takes a value & returns it as ``val_type``; it raises :py:class:`ValueError`
+             if the value can't be converted
+    :rtype: Callable
+    """
+    if val_type == 'hex':
+        def convert(value):
+            if not isinstance(value, str):
+                value = str(value)
+            return value if value.startswith('#') else '#' + value[0:6]
+    elif val_type is bool:
+        def convert(value):
+            if isinstance(value, bool):
+                return value
+            return str(value).lower() == 'true'
+    else:
+        def convert(value):
+            if isinstance(value, val_type):
+                return value
+            return val_type(value)
+
+    return convert